@@ -0,0 +1,85 @@
+"""Random access to turns of a large archive
+
+Writes an archive with many chats, then measures opening
+it and reading random turns by ID
+
+    python -m benchmarks.archive
+"""
+import os
+import random
+import tempfile
+import time
+import timeit
+
+from characterai import archive
+
+CHATS = 2000
+TURNS = 250
+ROUNDS = 5
+
+def turn(chat: int, i: int) -> dict:
+    return {
+        'turn_key': {
+            'chat_id': f'chat-{chat}', 'turn_id': f'turn-{chat}-{i}'
+        },
+        'create_time': f'2024-05-01T12:{i // 60 % 60:02d}:{i % 60:02d}Z',
+        'last_update_time': '2024-05-01T12:00:01.000000Z',
+        'state': 'STATE_OK',
+        'author': {'author_id': 'CHAR', 'name': 'Name'},
+        'candidates': [{
+            'candidate_id': f'cand-{i}',
+            'create_time': '2024-05-01T12:00:00.000000Z',
+            'raw_content': 'Some words of the message. ' * 10,
+            'is_final': True
+        }],
+        'primary_candidate_id': f'cand-{i}'
+    }
+
+def measure(func, number: int) -> float:
+    return min(timeit.repeat(
+        func, number=number, repeat=ROUNDS
+    )) / number * 1e6
+
+def main():
+    with tempfile.TemporaryDirectory() as folder:
+        run(os.path.join(folder, 'chats.arc'))
+
+def run(path: str):
+    start = time.perf_counter()
+
+    with archive.Writer(path) as writer:
+        for chat in range(CHATS):
+            writer.add_turns([turn(chat, i) for i in range(TURNS)])
+
+    spent = time.perf_counter() - start
+
+    print(
+        f'{CHATS * TURNS} turns, {os.path.getsize(path) / 2**20:.0f} MB,'
+        f' written in {spent:.1f} s'
+    )
+
+    start = time.perf_counter()
+    reader = archive.Reader(path)
+    spent = (time.perf_counter() - start) * 1e6
+
+    keys = [
+        (f'chat-{c}', f'turn-{c}-{random.randrange(TURNS)}')
+        for c in random.choices(range(CHATS), k=1000)
+    ]
+    found = iter(keys * 10000)
+
+    results = {
+        'open': spent,
+        'raw': measure(lambda: reader.raw(*next(found)), 10000),
+        'turn': measure(lambda: reader.turn(*next(found)), 10000),
+        'chat, 20 turns': measure(
+            lambda: reader.turns(next(found)[0], limit=20), 1000
+        )
+    }
+
+    for name, spent in results.items():
+        print(f'{name + ":":16}{spent:8.1f} us')
+
+    reader.close()
+
+main()
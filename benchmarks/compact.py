@@ -0,0 +1,67 @@
+"""Memory of a long chat2 history kept as models
+
+Compares :obj:`~characterai.types.chat2.TurnData` with
+:obj:`~characterai.types.chat2.CompactTurn` for the same turns
+
+    python -m benchmarks.compact
+"""
+import time
+import tracemalloc
+
+from characterai import codec
+from characterai.types import chat2
+
+TURNS = 100000
+
+def turn(i: int) -> dict:
+    return {
+        'turn_key': {'chat_id': 'CHAT_ID', 'turn_id': f'turn-{i}'},
+        'create_time': '2024-05-01T12:00:00.000000Z',
+        'last_update_time': '2024-05-01T12:00:01.000000Z',
+        'state': 'STATE_OK',
+        'author': {
+            'author_id': str(i % 2) if i % 2 else 'CHAR',
+            'name': 'Name', 'is_human': bool(i % 2)
+        },
+        'candidates': [{
+            'candidate_id': f'cand-{i}',
+            'create_time': '2024-05-01T12:00:00.000000Z',
+            'raw_content': f'Message number {i}.',
+            'is_final': True
+        }],
+        'primary_candidate_id': f'cand-{i}'
+    }
+
+def measure(make) -> tuple:
+    # Decoded again for each run, so no strings are shared
+    turns = codec.loads(codec.dumps([turn(i) for i in range(TURNS)]))
+
+    start = time.process_time()
+    result = [make(t) for t in turns]
+    spent = time.process_time() - start
+
+    del result
+
+    # Tracing slows the run down, so it is done separately
+    tracemalloc.start()
+    result = [make(t) for t in turns]
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    return size / TURNS, spent
+
+def main():
+    print(f'{TURNS} turns')
+
+    for name, make in (
+        ('TurnData', chat2.TurnData.model_validate),
+        ('CompactTurn', chat2.CompactTurn.from_dict)
+    ):
+        size, spent = measure(make)
+
+        print(
+            f'{name + ":":13}{size:7.0f} B/turn'
+            f'  {size * TURNS / 2**20:6.1f} MB  {spent:5.2f} s CPU'
+        )
+
+main()
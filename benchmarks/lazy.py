@@ -0,0 +1,107 @@
+"""CPU time of reading two fields of large answers
+
+Compares the ``validate`` and ``lazy`` modes of
+:obj:`characterai.models` for ``get_char``, ``get_me``
+and a chat1 history with many participants
+
+    python -m benchmarks.lazy
+"""
+import timeit
+
+from characterai import models
+from characterai.types import account, character, chat1
+
+ROUNDS = 5
+
+CHARACTER = {
+    'external_id': 'CHAR', 'title': 'Title', 'name': 'Name',
+    'visibility': 'PUBLIC', 'copyable': False,
+    'greeting': 'Hello! ' * 200,
+    'description': 'Description of the character. ' * 50,
+    'definition': 'Long definition of the character. ' * 1000,
+    'identifier': 'id:CHAR', 'avatar_file_name': 'uploaded/avatar.webp',
+    'songs': [], 'img_gen_enabled': False, 'base_img_prompt': None,
+    'img_prompt_regex': None, 'strip_img_prompt_from_msg': False,
+    'default_voice_id': None,
+    'starter_prompts': {'phrases': ['Hello'] * 10},
+    'comments_enabled': True, 'user__username': 'creator',
+    'participant__name': 'Name',
+    'participant__num_interactions': 1000,
+    'participant__user__username': 'internal_id:CHAR',
+    'voice_id': None, 'usage': 'default', 'upvotes': 10
+}
+
+PROFILE = {
+    'name': 'Name', 'avatar_type': 'UPLOADED',
+    'onboarding_complete': True,
+    'avatar_file_name': 'uploaded/avatar.webp',
+    'mobile_onboarding_complete': 1, 'bio': 'Bio ' * 100,
+    'username': 'user', 'id': 123, 'first_name': 'Name',
+    'is_staff': False, 'subscription': None, 'is_human': True,
+    'email': 'user@mail.com', 'needs_to_acknowledge_policy': False,
+    'suspended_until': '2024-05-01T12:00:00Z',
+    'hidden_characters': [f'char-{i}' for i in range(500)],
+    'blocked_users': [f'user-{i}' for i in range(500)]
+}
+
+def participant(i: int) -> dict:
+    return {
+        'user': {
+            'username': f'user-{i}', 'id': i, 'first_name': 'Name',
+            'account': {
+                'name': 'Name', 'avatar_type': 'UPLOADED',
+                'onboarding_complete': True,
+                'avatar_file_name': 'uploaded/avatar.webp',
+                'mobile_onboarding_complete': 1
+            },
+            'is_staff': False
+        },
+        'is_human': True, 'name': f'Name {i}', 'num_interactions': i
+    }
+
+HISTORY = {
+    'title': 'Room', 'external_id': 'CHAT_ID',
+    'participants': [participant(i) for i in range(200)],
+    'created': '2024-05-01T12:00:00Z',
+    'last_interaction': '2024-05-01T12:00:00Z',
+    'type': 'ROOM', 'description': 'Description',
+    'avatars': [{
+        'name': f'Name {i}',
+        'user__account__avatar_file_name': 'uploaded/avatar.webp'
+    } for i in range(200)],
+    'room_img_gen_enabled': False
+}
+
+ANSWERS = {
+    'get_char': (character.Character, CHARACTER, ('name', 'upvotes')),
+    'get_me': (account.Profile, PROFILE, ('username', 'id')),
+    'chat1 history': (chat1.ChatHistory, HISTORY, ('title', 'type'))
+}
+
+def measure(cls, data: dict, fields: tuple, mode: str) -> float:
+    def run():
+        model = models.parse(cls, data, mode)
+
+        for name in fields:
+            getattr(model, name)
+
+    run()
+
+    return min(timeit.repeat(
+        run, number=2000, repeat=ROUNDS
+    )) / 2000 * 1e6
+
+def main():
+    for name, (cls, data, fields) in ANSWERS.items():
+        assert models.parse(cls, data, 'lazy') \
+            == models.parse(cls, data, 'validate')
+
+        old = measure(cls, data, fields, 'validate')
+        new = measure(cls, data, fields, 'lazy')
+
+        print(
+            f'{name + ":":15}{old:8.1f} us -> {new:6.1f} us'
+            f'  {old / new:5.1f}x'
+        )
+
+main()
@@ -0,0 +1,69 @@
+"""CPU time of turning a large chat2 history into results
+
+Compares the ``validate``, ``construct`` and ``raw`` modes
+of :obj:`characterai.models` on the same decoded page
+
+    python -m benchmarks.models
+"""
+import time
+
+from characterai import codec, models
+from characterai.types import chat2
+
+TURNS = 20000
+ROUNDS = 5
+
+def turn(i: int) -> dict:
+    return {
+        'turn_key': {'chat_id': 'CHAT_ID', 'turn_id': f'turn-{i}'},
+        'create_time': '2024-05-01T12:00:00.000000Z',
+        'last_update_time': '2024-05-01T12:00:01.000000Z',
+        'state': 'STATE_OK',
+        'author': {
+            'author_id': str(i % 2) if i % 2 else 'CHAR',
+            'name': 'Name', 'is_human': bool(i % 2)
+        },
+        'candidates': [{
+            'candidate_id': f'cand-{i}',
+            'create_time': '2024-05-01T12:00:00.000000Z',
+            'raw_content': 'Some words of the message. ' * 10,
+            'is_final': True
+        }],
+        'primary_candidate_id': f'cand-{i}'
+    }
+
+def measure(mode: str, page: bytes) -> float:
+    best = None
+
+    for _ in range(ROUNDS):
+        start = time.process_time()
+
+        models.parse(
+            chat2.History, codec.loads(page), mode
+        )
+
+        spent = time.process_time() - start
+        best = spent if best is None else min(best, spent)
+
+    return best * 1000
+
+def main():
+    page = codec.dumps({
+        'turns': [turn(i) for i in range(TURNS)],
+        'meta': {'next_token': None}
+    }).encode()
+
+    print(f'{TURNS} turns, {len(page) / 2**20:.1f} MB, {codec.backend}')
+
+    results = {
+        mode: measure(mode, page)
+        for mode in models.MODES
+    }
+
+    for mode, spent in results.items():
+        print(
+            f'{mode + ":":11}{spent:8.1f} ms CPU'
+            f'  {results["validate"] / spent:5.1f}x'
+        )
+
+main()
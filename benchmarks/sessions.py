@@ -0,0 +1,68 @@
+"""Per-call latency of class-level methods against a local mock server
+
+Compares opening a new client for every call (the old behaviour
+of ``caimethod``) with borrowing one from ``aiocai.sessions``
+
+    python -m benchmarks.sessions
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import asyncio
+import threading
+import time
+
+from characterai import aiocai
+from characterai.aiocai.methods import utils
+
+CALLS = 300
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        body = b'{"status": "pong"}'
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        ...
+
+async def fresh():
+    async with aiocai.Client('TOKEN') as client:
+        await client.ping()
+
+async def pooled():
+    await aiocai.ping(token='TOKEN')
+
+async def measure(call) -> float:
+    await call()
+
+    start = time.perf_counter()
+
+    for _ in range(CALLS):
+        await call()
+
+    return (time.perf_counter() - start) / CALLS * 1000
+
+async def main():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    utils.NEO = f'http://127.0.0.1:{server.server_port}'
+
+    try:
+        old = await measure(fresh)
+        new = await measure(pooled)
+    finally:
+        await aiocai.sessions.close()
+        server.shutdown()
+
+    print(f'new client per call: {old:.3f} ms/call')
+    print(f'shared session:      {new:.3f} ms/call')
+    print(f'speedup:             {old / new:.1f}x')
+
+asyncio.run(main())
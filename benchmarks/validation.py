@@ -0,0 +1,115 @@
+"""Validation of list answers and the account answer
+
+Compares creating models one by one with a cached
+``TypeAdapter(List[Model])`` for the payloads of
+``get_histories``, ``get_recent_chats`` and ``get_trending``,
+and flattening ``chat/user/`` with the precompiled remap
+
+    python -m benchmarks.validation
+"""
+import timeit
+
+from characterai.aiocai.methods.account import PROFILE
+from characterai.aiocai.methods.utils import flatten
+from characterai.models import adapter
+from characterai.types import account, character, chat2
+
+ROUNDS = 5
+
+def turn(i: int) -> dict:
+    return {
+        'turn_key': {'chat_id': f'chat-{i}', 'turn_id': f'turn-{i}'},
+        'create_time': '2024-05-01T12:00:00.000000Z',
+        'last_update_time': '2024-05-01T12:00:01.000000Z',
+        'state': 'STATE_OK',
+        'author': {'author_id': 'CHAR', 'name': 'Name'},
+        'candidates': [{
+            'candidate_id': f'cand-{i}',
+            'create_time': '2024-05-01T12:00:00.000000Z',
+            'raw_content': 'Some words of the message.',
+            'is_final': True
+        }],
+        'primary_candidate_id': f'cand-{i}'
+    }
+
+def chat(i: int) -> dict:
+    return {
+        'chat_id': f'chat-{i}',
+        'create_time': '2024-05-01T12:00:00.000000Z',
+        'creator_id': '123',
+        'character_id': 'CHAR',
+        'state': 'STATE_ACTIVE',
+        'type': 'TYPE_ONE_ON_ONE',
+        'visibility': 'VISIBILITY_PRIVATE',
+        'preview_turns': [turn(i), turn(i + 1)]
+    }
+
+def char(i: int) -> dict:
+    return {
+        'external_id': f'char-{i}',
+        'title': 'Title',
+        'description': 'Description of the character',
+        'greeting': 'Hello',
+        'avatar_file_name': 'uploaded/avatar.webp',
+        'visibility': 'PUBLIC',
+        'copyable': False,
+        'participant__name': 'Name',
+        'user__id': i,
+        'user__username': 'creator',
+        'img_gen_enabled': False,
+        'participant__num_interactions': i * 100,
+        'upvotes': i,
+        'max_last_interaction': '2024-05-01T12:00:00+00:00'
+    }
+
+PAYLOADS = {
+    'get_histories': (chat2.ChatData, [chat(i) for i in range(50)]),
+    'get_recent_chats': (character.CharShort, [char(i) for i in range(30)]),
+    'get_trending': (character.CharShort, [char(i) for i in range(100)])
+}
+
+ME = {'user': {
+    'user': {
+        'username': 'user', 'id': 123, 'first_name': '',
+        'account': {
+            'name': 'Name', 'avatar_type': 'UPLOADED',
+            'onboarding_complete': True,
+            'avatar_file_name': 'uploaded/avatar.webp',
+            'mobile_onboarding_complete': 1
+        },
+        'is_staff': False, 'subscription': None
+    },
+    'is_human': True, 'name': 'Name', 'email': 'user@mail.com',
+    'needs_to_acknowledge_policy': False, 'suspended_until': None,
+    'hidden_characters': [], 'blocked_users': [], 'bio': ''
+}}
+
+def measure(func, number: int) -> float:
+    return min(timeit.repeat(
+        func, number=number, repeat=ROUNDS
+    )) / number * 1e6
+
+def main():
+    for name, (cls, data) in PAYLOADS.items():
+        adapter(cls)
+
+        old = measure(lambda: [cls(**a) for a in data], 200)
+        new = measure(lambda: adapter(cls).validate_python(data), 200)
+
+        print(
+            f'{name + ":":18}{old:9.1f} us -> {new:8.1f} us'
+            f'  {old / new:4.2f}x'
+        )
+
+    assert account.Profile.model_validate(flatten(ME)) \
+        == account.Profile.model_validate(PROFILE(ME))
+
+    old = measure(lambda: flatten(ME), 20000)
+    new = measure(lambda: PROFILE(ME), 20000)
+
+    print(
+        f'{"get_me remap:":18}{old:9.2f} us -> {new:8.2f} us'
+        f'  {old / new:4.2f}x'
+    )
+
+main()
@@ -4,8 +4,15 @@ import sys
 from .methods import Methods
 from .methods.chat1 import ChatV1
 from .methods.chat2 import WSConnect
-from .methods.utils import Request
+from .methods.utils import Request, sessions
+from .pool import WSPool
 
+from ..batch import Result
+from ..cache import Cache
+from ..hedge import Hedge
+from ..limiter import RateLimiter, AdaptiveLimit
+from ..retry import RetryPolicy
+
 from curl_cffi.requests import AsyncSession
 
 if sys.platform == 'win32':
@@ -16,6 +23,8 @@ if sys.platform == 'win32':
 class aiocai(Methods, Request):
     chat1 = ChatV1()
     connect = WSConnect(start=False)
+    sessions = sessions
+    WSPool = WSPool
 
     class Client(Methods, Request):
         """CharacterAI client
@@ -27,6 +36,34 @@ class aiocai(Methods, Request):
             identifier (``str``):
                 Which browser version to impersonate in the session
 
+            cache (:obj:`~characterai.cache.Cache` | ``bool``, *optional*):
+                Keep answers of read-only methods.
+                ``True`` uses the default settings
+
+            limiter (:obj:`~characterai.limiter.RateLimiter` | ``bool``, *optional*):
+                Limit how often requests are sent.
+                ``True`` uses the default settings
+
+            retry (:obj:`~characterai.retry.RetryPolicy` | ``bool``, *optional*):
+                Repeat requests that failed for a reason
+                that can pass. ``True`` uses the default settings
+
+            concurrency (:obj:`~characterai.limiter.AdaptiveLimit` | ``bool``, *optional*):
+                Limit how many requests are sent at the same time,
+                the limit adapts to the server. ``True`` uses the
+                default settings
+
+            hedge (:obj:`~characterai.hedge.Hedge` | ``bool``, *optional*):
+                Send a copy of a reading request that takes
+                too long. ``True`` uses the default settings
+
+            models (``str``, *optional*):
+                ``validate`` returns checked models,
+                ``construct`` builds models without checks,
+                ``lazy`` checks each field when it is read
+                and ``raw`` returns the decoded JSON,
+                see :obj:`~characterai.models.mode`
+
             **kwargs (``Any``):
                 Supports all arguments from curl_cffi `Session <https://curl-cffi.readthedocs.io/en/latest/api.html#sessions>`_
         
@@ -34,9 +71,21 @@ class aiocai(Methods, Request):
         def __init__(
             self, token: str = None,
             identifier: str ='chrome120',
+            cache: Cache | bool = None,
+            limiter: RateLimiter | bool = None,
+            retry: RetryPolicy | bool = None,
+            concurrency: AdaptiveLimit | bool = None,
+            hedge: Hedge | bool = None,
+            models: str = 'validate',
             **kwargs
         ):
             self.token = token
+            self.cache = Cache() if cache is True else cache or None
+            self.limiter = RateLimiter() if limiter is True else limiter or None
+            self.retry = RetryPolicy() if retry is True else retry or None
+            self.concurrency = AdaptiveLimit() \
+                if concurrency is True else concurrency or None
+            self.hedge = Hedge() if hedge is True else hedge or None
             self.session = AsyncSession(
                 impersonate=identifier,
                 headers={
@@ -47,6 +96,17 @@ class aiocai(Methods, Request):
 
             self.chat1 = ChatV1(self.session, token)
             self.connect = WSConnect(token, start=False)
+            self.connect.retry = self.retry
+            self.models = self.chat1.models = \
+                self.connect.models = models
+
+            # chat1 requests go through the same
+            # cache, limits, retries and hedging
+            self.chat1.cache = self.cache
+            self.chat1.limiter = self.limiter
+            self.chat1.retry = self.retry
+            self.chat1.concurrency = self.concurrency
+            self.chat1.hedge = self.hedge
 
         async def __aenter__(self):
             return self
@@ -54,6 +114,75 @@ class aiocai(Methods, Request):
         async def __aexit__(self, *args):
             await self.session.close()
 
+        async def batch(
+            self, method, ids: list, *,
+            concurrency: int = 16, **kwargs
+        ):
+            """Call a method for many IDs at once
+
+            Repeated IDs are called only once and at most
+            ``concurrency`` calls run at the same time. Results
+            are yielded as soon as they are ready, in any order.
+            A failed call doesn't stop the others, its error
+            is returned in the result
+
+            EXAMPLE::
+
+                async for char, info, error in client.batch(
+                    client.get_char, ['CHAR_1', 'CHAR_2']
+                ):
+                    print(char, error or info.name)
+
+            Args:
+                method (``Callable`` | ``str``):
+                    Client method or its name.
+                    It is called with the ID as the first argument
+
+                ids (List of ``Any``):
+                    IDs to call the method for
+
+                concurrency (``int``, *optional*):
+                    Maximum number of calls at the same time
+
+                **kwargs (``Any``):
+                    Other arguments of the method
+
+            Returns:
+                :obj:`~characterai.batch.Result`
+            """
+            if concurrency < 1:
+                raise ValueError('concurrency must be at least 1')
+
+            if isinstance(method, str):
+                method = getattr(self, method)
+
+            ids = list(dict.fromkeys(ids))
+            pending = iter(ids)
+            results = asyncio.Queue()
+
+            # Each worker takes the next ID when it is free,
+            # so only ``concurrency`` calls are ever started
+            async def work():
+                for id in pending:
+                    try:
+                        result = Result(id, await method(id, **kwargs))
+                    except Exception as e:
+                        result = Result(id, error=e)
+
+                    await results.put(result)
+
+            workers = [
+                asyncio.create_task(work())
+                for _ in range(min(concurrency, len(ids)))
+            ]
+
+            try:
+                for _ in ids:
+                    yield await results.get()
+            finally:
+                for worker in workers:
+                    worker.cancel()
+
         async def close(self):
             """If you won't be using the client in the future, please close it"""
             await self.session.close()
\ No newline at end of file
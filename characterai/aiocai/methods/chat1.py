@@ -1,4 +1,5 @@
-from .utils import Request, caimethod, validate
+from .utils import Request, caimethod
+from ...errors import ServerError
 from ...types import chat1
 
 class ChatV1(Request):
@@ -9,7 +10,8 @@ class ChatV1(Request):
     @caimethod
     async def send_message(
         self, chat_id: str, tgt: str, text: str,
-        token: str = None, **kwargs
+        token: str = None, timeout: float = None,
+        **kwargs
     ):
         """Sending a message to chat
 
@@ -31,23 +33,78 @@ class ChatV1(Request):
                 Reply to the next generated message from
                 :obj:`~characterai.aiocai.methods.chat1.ChatV1.next_message`
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
         Returns:
             :obj:`~characterai.types.chat1.Message`
         """
-        data = await self.request(
+        data = None
+
+        async for data in self.stream(
             'chat/streaming/',
-            token=token, data={
+            token=token, timeout=timeout, data={
                 'history_external_id': chat_id,
                 'text': text,
                 'tgt': tgt,
                 **kwargs
             }
-        )
+        ): ...
+
+        if data is None:
+            raise ServerError('No answer')
 
-        return chat1.Message.model_validate(
-            data
+        return self._parse(
+            chat1.Message, data
         )
 
+    @caimethod
+    async def stream_message(
+        self, chat_id: str, tgt: str, text: str,
+        token: str = None, timeout: float = None,
+        **kwargs
+    ):
+        """Sending a message to chat and receiving the answer chunk by chunk
+
+        Chunks are parsed as soon as they arrive,
+        the last one has ``is_final_chunk``
+
+        EXAMPLE::
+
+            async for chunk in client.chat1.stream_message(
+                'CHAT_ID', 'TGT', 'TEXT'
+            ):
+                print(chunk.text)
+
+        Args:
+            chat_id (``str``):
+                Chat or room ID
+            
+            tgt (``str``):
+                Old character ID type
+            
+            text (``str``):
+                Message text
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
+        Returns:
+            :obj:`~characterai.types.chat1.Message` chunks
+        """
+        async for data in self.stream(
+            'chat/streaming/',
+            token=token, timeout=timeout, data={
+                'history_external_id': chat_id,
+                'text': text,
+                'tgt': tgt,
+                **kwargs
+            }
+        ):
+            yield self._parse(
+                chat1.Message, data
+            )
+
     @caimethod
     async def get_chat(
         self, char_id: str, chat_id: str,
@@ -77,8 +134,8 @@ class ChatV1(Request):
             }
         )
 
-        return chat1.ChatHistory.model_validate(
-            data
+        return self._parse(
+            chat1.ChatHistory, data
         )
 
     @caimethod
@@ -105,15 +162,16 @@ class ChatV1(Request):
             }
         )
         
-        return chat1.NewChat.model_validate(
-            data
+        return self._parse(
+            chat1.NewChat, data
         )
 
     @caimethod
     async def next_message(
         self, chat_id: str, tgt: str,
         parent_msg_uuid: str, *,
-        token: str = None, **kwargs
+        token: str = None, timeout: float = None,
+        **kwargs
     ):
         """Generate an alternative answer
 
@@ -138,21 +196,77 @@ class ChatV1(Request):
                 ID of the message from which you
                 want to get an alternative reply
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
         Returns:
             :obj:`~characterai.types.chat1.Message`
         """
-        return chat1.Message.model_validate(
-            await self.request(
-                'chat/streaming/',
-                token=token, data={
-                    'history_external_id': chat_id,
-                    'parent_msg_uuid': parent_msg_uuid,
-                    'tgt': tgt,
-                    **kwargs
-                }
-            )
+        data = None
+
+        async for data in self.stream(
+            'chat/streaming/',
+            token=token, timeout=timeout, data={
+                'history_external_id': chat_id,
+                'parent_msg_uuid': parent_msg_uuid,
+                'tgt': tgt,
+                **kwargs
+            }
+        ): ...
+
+        if data is None:
+            raise ServerError('No answer')
+
+        return self._parse(
+            chat1.Message, data
         )
 
+    @caimethod
+    async def stream_next_message(
+        self, chat_id: str, tgt: str,
+        parent_msg_uuid: str, *,
+        token: str = None, timeout: float = None,
+        **kwargs
+    ):
+        """Generate an alternative answer chunk by chunk
+
+        EXAMPLE::
+
+            async for chunk in client.chat1.stream_next_message(
+                'CHAT_ID', 'TGT', msg.last_user_msg_uuid
+            ):
+                print(chunk.text)
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+            
+            tgt (``str``):
+                Old character ID type
+            
+            parent_msg_uuid (``str``):
+                ID of the message from which you
+                want to get an alternative reply
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
+        Returns:
+            :obj:`~characterai.types.chat1.Message` chunks
+        """
+        async for data in self.stream(
+            'chat/streaming/',
+            token=token, timeout=timeout, data={
+                'history_external_id': chat_id,
+                'parent_msg_uuid': parent_msg_uuid,
+                'tgt': tgt,
+                **kwargs
+            }
+        ):
+            yield self._parse(
+                chat1.Message, data
+            )
+
     @caimethod
     async def get_histories(
         self, char: str, *, num: int = 999,
@@ -182,7 +296,7 @@ class ChatV1(Request):
             }
         )
 
-        return validate(
+        return self._parse_list(
             chat1.History,
             data['histories']
         )
@@ -211,10 +325,70 @@ class ChatV1(Request):
             f'{chat_id}', token=token
         )
 
-        return chat1.HisMessages.model_validate(
-            data
+        return self._parse(
+            chat1.HisMessages, data
         )
 
+    @caimethod
+    async def sync_history(
+        self, chat_id: str, store, *,
+        full: bool = False, token: str = None
+    ) -> int:
+        """Save new messages of the chat to a local store
+
+        Pages are requested from the newest message and
+        the sync stops at the first page with a message
+        that was already saved
+
+        EXAMPLE::
+
+            store = Store('history.db')
+
+            await client.chat1.sync_history('CHAT_ID', store)
+            messages = store.messages('CHAT_ID')
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            store (:obj:`~characterai.store.Store`):
+                Where to save messages
+
+            full (``bool``, *optional*):
+                Request all pages, for example
+                if the previous sync was interrupted
+
+        Returns:
+            Number of new messages
+        """
+        added = 0
+        page = None
+
+        while True:
+            url = (
+                'chat/history/msgs/user/?'
+                f'history_external_id={chat_id}'
+            )
+
+            if page is not None:
+                url += f'&page_num={page}'
+
+            data = await self.request(url, token=token)
+            if not data['messages']:
+                break
+
+            new = store.add_messages(chat_id, data['messages'])
+            added += new
+
+            if not data['has_more']:
+                break
+            elif new < len(data['messages']) and not full:
+                break
+
+            page = data['next_page']
+
+        return added
+
     @caimethod
     async def delete_message(
         self, chat_id: str, uuids: list,
@@ -274,6 +448,6 @@ class ChatV1(Request):
             token=token, neo=True
         )
 
-        return chat1.Migrate.model_validate(
-            data['migration']
+        return self._parse(
+            chat1.Migrate, data['migration']
         )
\ No newline at end of file
@@ -1,12 +1,45 @@
-import json
+import asyncio
+import inspect
+import logging
+import time
 import websockets
 from websockets import exceptions
+from contextlib import asynccontextmanager
 import uuid
-
-from .utils import Request, caimethod, validate
-from ...errors import ServerError
+from urllib.parse import quote
+
+from .utils import Request, caimethod
+from ... import codec
+from ...backoff import Backoff
+from ...limiter import AdaptiveLimit
+from ...mirror import Mirror
+from ...retry import RetryPolicy
+from ...deadline import deadline, until, remaining
+from ...errors import (
+    ServerError, ConnectionLostError, DeadlineError
+)
+from ...export import Export
 from ...types import chat2
 
+URL = 'wss://neo.character.ai/ws/'
+
+log = logging.getLogger(__name__)
+
+# Commands that can be safely sent again
+# if the connection was lost before the answer
+IDEMPOTENT = {'remove_turns', 'edit_turn_candidate'}
+
+# Commands answered with a single frame
+ANSWERS = {'remove_turns', 'edit_turn_candidate'}
+
+# Commands the server generates an answer for,
+# it is asked to stop if nobody waits anymore
+GENERATIONS = {'create_and_generate_turn', 'generate_turn_candidate'}
+
+# Seconds the frames of an abandoned command
+# are still expected and dropped
+ORPHANS = 30
+
 class ChatV2(Request):
     def __init__(
         self, session = None,
@@ -43,7 +76,7 @@ class ChatV2(Request):
             token=token, neo=True
         )
 
-        return validate(
+        return self._parse_list(
             chat2.ChatData,
             data['chats']
         )
@@ -66,13 +99,263 @@ class ChatV2(Request):
         Returns:
             :obj:`~characterai.types.chat2.History`
         """
-        return chat2.History.model_validate(
-            await self.request(
+        return self._parse(
+            chat2.History, await self.request(
                 f'turns/{chat_id}/',
                 token=token, neo=True
             )
         )
 
+    @caimethod
+    async def iter_history(
+        self, chat_id: str, *, prefetch: int = 1,
+        until = None, token: str = None,
+        compact: bool = False
+    ):
+        """Go through the whole chat history, from the newest message
+
+        Pages are requested one by one using ``meta.next_token``.
+        The next pages are requested while the current one is
+        being processed, so only a few of them are kept in memory
+
+        EXAMPLE::
+
+            async for turn in client.iter_history('CHAT_ID'):
+                print(turn.candidates[0].raw_content)
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            prefetch (``int``, *optional*):
+                How many pages are requested in advance,
+                ``0`` requests the next page only when needed
+
+            until (``Callable``, *optional*):
+                Function that receives a message and
+                returns ``True`` to stop before it
+
+            compact (``bool``, *optional*):
+                Return :obj:`~characterai.types.chat2.CompactTurn`,
+                several times smaller in memory, for keeping
+                long histories. Ignores the models mode
+
+        Returns:
+            :obj:`~characterai.types.chat2.TurnData`
+            or :obj:`~characterai.types.chat2.CompactTurn`
+        """
+        if prefetch > 0:
+            pages = self._prefetch(
+                self._pages(chat_id, token), prefetch
+            )
+        else:
+            pages = self._pages(chat_id, token)
+
+        try:
+            async for page in pages:
+                if compact:
+                    turns = map(
+                        chat2.CompactTurn.from_dict, page['turns']
+                    )
+                else:
+                    turns = self._parse_list(
+                        chat2.TurnData, page['turns']
+                    )
+
+                for turn in turns:
+                    if until is not None and until(turn):
+                        return
+
+                    yield turn
+        finally:
+            await pages.aclose()
+
+    @caimethod
+    async def sync_history(
+        self, chat_id: str, store, *,
+        full: bool = False, token: str = None
+    ) -> int:
+        """Save new messages of the chat to a local store
+
+        Pages are requested from the newest message and
+        the sync stops at the first page with a message
+        that was already saved
+
+        EXAMPLE::
+
+            store = Store('history.db')
+
+            await chat.sync_history('CHAT_ID', store)
+            turns = store.turns('CHAT_ID')
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            store (:obj:`~characterai.store.Store`):
+                Where to save messages
+
+            full (``bool``, *optional*):
+                Request all pages, for example
+                if the previous sync was interrupted
+
+        Returns:
+            Number of new messages
+        """
+        added = 0
+        pages = self._pages(chat_id, token)
+
+        try:
+            async for page in pages:
+                new = store.add_turns(page['turns'])
+                added += new
+
+                if new < len(page['turns']) and not full:
+                    break
+        finally:
+            await pages.aclose()
+
+        return added
+
+    @caimethod
+    async def export_histories(
+        self, path: str, *, chars: list = None,
+        compression: str = None, prefetch: int = 1,
+        token: str = None
+    ) -> int:
+        """Save all chat2 histories of the account to a file
+
+        Chats of each character are written one by one,
+        page by page, so memory doesn't grow with the history.
+        An interrupted export continues from the last page when
+        it is started again with the same file, see
+        :obj:`~characterai.export.Export`
+
+        EXAMPLE::
+
+            await client.export_histories('histories.jsonl.gz')
+
+            for item in export.read('histories.jsonl.gz'):
+                ...
+
+        Args:
+            path (``str``):
+                File to write, ``.gz`` and ``.xz``
+                files are compressed
+
+            chars (List of ``str``, *optional*):
+                Character IDs, by default all
+                characters of your recent chats
+
+            compression (``str``, *optional*):
+                ``gzip``, ``lzma`` or ``none``,
+                by default it is chosen by the file suffix
+
+            prefetch (``int``, *optional*):
+                How many pages are requested in advance
+
+        Returns:
+            Number of written messages
+        """
+        if chars is None:
+            data = await self.request(
+                'chats/recent/', token=token, neo=True
+            )
+
+            chars = list(dict.fromkeys(
+                c['character_id'] for c in data['chats']
+            ))
+
+        with Export(path, compression) as file:
+            for char in chars:
+                data = await self.request(
+                    f'chats/?character_ids={char}'
+                    '&num_preview_turns=0',
+                    token=token, neo=True
+                )
+
+                for chat in data['chats']:
+                    chat_id = chat['chat_id']
+                    started, next_token = file.resume(chat_id)
+
+                    if started is None:
+                        continue
+                    elif not started:
+                        file.add_chat(chat)
+
+                    pages = self._pages(chat_id, token, next_token)
+
+                    if prefetch > 0:
+                        pages = self._prefetch(pages, prefetch)
+
+                    try:
+                        async for page in pages:
+                            # Written in a thread, so the next
+                            # page is downloaded meanwhile
+                            await asyncio.to_thread(
+                                file.add_turns, page['turns']
+                            )
+                            await asyncio.to_thread(
+                                file.save, chat_id, following(page)
+                            )
+                    finally:
+                        await pages.aclose()
+
+            file.finish()
+
+        return file.turns
+
+    async def _pages(
+        self, chat_id: str, token: str,
+        next_token: str = None
+    ):
+
+        while True:
+            url = f'turns/{chat_id}/'
+
+            if next_token is not None:
+                url += '?next_token=' + quote(next_token, safe='')
+
+            page = await self.request(
+                url, token=token, neo=True
+            )
+
+            yield page
+
+            next_token = (page.get('meta') or {}).get('next_token')
+
+            if not next_token or not page['turns']:
+                return
+
+    async def _prefetch(self, pages, size: int):
+        queue = asyncio.Queue(size)
+
+        async def fetch():
+            try:
+                async for page in pages:
+                    await queue.put(page)
+            except Exception as e:
+                await queue.put(e)
+            else:
+                await queue.put(None)
+            finally:
+                await pages.aclose()
+
+        task = asyncio.create_task(fetch())
+
+        try:
+            while True:
+                page = await queue.get()
+
+                if page is None:
+                    return
+                elif isinstance(page, Exception):
+                    raise page
+
+                yield page
+        finally:
+            task.cancel()
+
     @caimethod
     async def get_chat(
         self, char: str, *,
@@ -91,8 +374,8 @@ class ChatV2(Request):
         Returns:
             :obj:`~characterai.types.chat2.ChatData`
         """
-        return chat2.ChatData.model_validate(
-            (await self.request(
+        return self._parse(
+            chat2.ChatData, (await self.request(
                 f'chats/recent/{char}',
                 token=token, neo=True
             ))['chats'][0]
@@ -127,8 +410,8 @@ class ChatV2(Request):
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
-        return chat2.BotAnswer.model_validate(
-            (await self.request(
+        return self._parse(
+            chat2.BotAnswer, (await self.request(
                 'turn/pin', neo=True,
                 token=token, data={
                     'is_pinned': pinned,
@@ -141,7 +424,8 @@ class ChatV2(Request):
         )
 
     async def delete_message(
-        self, chat_id: str, ids: list
+        self, chat_id: str, ids: list,
+        *, timeout: float = None
     ) -> bool:
         """Deleting messages. Returns ``True`` on success
 
@@ -155,28 +439,33 @@ class ChatV2(Request):
             
             ids (List of ``str``):
                 List of message IDs to be deleted
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the answer
             
         Returns:
             ``bool``
         """
-        await self.ws.send(json.dumps({
-            'command':'remove_turns',
-            'payload': {
-                'chat_id': chat_id,
-                'turn_ids': ids
-            }
-        }))
-
-        response = json.loads(await self.ws.recv())
+        with deadline(timeout):
+            response = await self._retry(lambda: self._ask(
+                'remove_turns', {
+                    'chat_id': chat_id,
+                    'turn_ids': ids
+                }, chat_id=chat_id
+            ))
 
         if response['command'] == 'neo_error':
             raise ServerError(response['comment'])
 
+        if self.mirror is not None:
+            self.mirror.remove(chat_id, ids)
+
         return True
 
     async def next_message(
         self, char: str, chat_id: str, turn_id: str, 
-        *, tts: bool = False, lang: str = 'English'
+        *, tts: bool = False, lang: str = 'English',
+        timeout: float = None
     ):
         """Generate an alternative answer
 
@@ -204,12 +493,67 @@ class ChatV2(Request):
                 That's the language you're most
                 likely to respond in.
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
-        await self.ws.send(json.dumps({
-            'command':'generate_turn_candidate',
-            'payload': {
+        with deadline(timeout):
+            turn = await self._retry(lambda: self._final(
+                self._next_message(
+                    char, chat_id, turn_id, tts, lang
+                )
+            ), idempotent=False)
+
+        return self._parse(chat2.BotAnswer, turn)
+
+    def stream_next_message(
+        self, char: str, chat_id: str, turn_id: str, 
+        *, tts: bool = False, lang: str = 'English',
+        timeout: float = None
+    ):
+        """Generate an alternative answer chunk by chunk
+
+        EXAMPLE::
+
+            async for chunk in chat.stream_next_message(
+                'CHAR', 'CHAT_ID', 'MSG_ID'
+            ):
+                print(chunk.text)
+
+        Args:
+            char (``str``):
+                Character ID
+            
+            chat_id (``str``):
+                Chat ID
+            
+            turn_id (``str``):
+                Message ID
+            
+            tts (``bool``, *optional*):
+                Generate audio for the message
+            
+            lang (``str``, *optional*):
+                The language of your message
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
+        Returns:
+            :obj:`~characterai.aiocai.methods.chat2.Stream`
+        """
+        return Stream(self._next_message(
+            char, chat_id, turn_id, tts, lang, timeout
+        ), self._parse)
+
+    def _next_message(
+        self, char, chat_id, turn_id, tts, lang,
+        timeout = None
+    ):
+        return self._generate(
+            'generate_turn_candidate', {
                 'tts_enabled': tts,
                 'selected_language': lang,
                 'character_id': char,
@@ -217,29 +561,14 @@ class ChatV2(Request):
                     'turn_id': turn_id,
                     'chat_id': chat_id
                 }
-            }
-        }))
-
-        while True:
-            response = json.loads(await self.ws.recv())
-    
-            try:
-                turn = response['turn']
-            except:
-                raise ServerError(response['comment'])
-    
-            if not turn['author']['author_id'].isdigit():
-                try:
-                    turn['candidates'][0]['is_final']
-                except: ...
-                else:
-                    return chat2.BotAnswer.model_validate(
-                        turn
-                    )
+            }, chat_id=chat_id, turn_id=turn_id,
+            timeout=timeout
+        )
 
     async def new_chat(
         self, char: str, creator_id: str,
-        *, greeting: bool = True, chat_id: str = None
+        *, greeting: bool = True, chat_id: str = None,
+        timeout: float = None
     ):
         """Editing the message text
 
@@ -263,6 +592,9 @@ class ChatV2(Request):
                 You can specify your chat ID,
                 it can be any ``str``
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the chat and the greeting
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
@@ -271,41 +603,40 @@ class ChatV2(Request):
         if isinstance(creator_id, int):
             creator_id = str(creator_id)
         
-        await self.ws.send(json.dumps({
-            'command': 'create_chat',
-            'payload': {
-                'chat': {
-                    'chat_id': chat_id,
-                    'creator_id': creator_id,
-                    'visibility': 'VISIBILITY_PRIVATE',
-                    'character_id': char,
-                    'type': 'TYPE_ONE_ON_ONE'
-                },
-                'with_greeting': greeting
-            }
-        }))
-
-        response = json.loads(await self.ws.recv())
-        try: response['chat']
-        except KeyError:
-            raise ServerError(response['comment'])
-        else:
-            answer = chat2.BotAnswer.model_validate(
-                json.loads(
-                    await self.ws.recv()
-                )['turn']
-            )
+        with deadline(timeout):
+            async with self._rpc(
+                'create_chat', {
+                    'chat': {
+                        'chat_id': chat_id,
+                        'creator_id': creator_id,
+                        'visibility': 'VISIBILITY_PRIVATE',
+                        'character_id': char,
+                        'type': 'TYPE_ONE_ON_ONE'
+                    },
+                    'with_greeting': greeting
+                }, chat_id=chat_id
+            ) as call:
+                response = await call.recv()
+                try: response['chat']
+                except KeyError:
+                    call.done = True
+                    raise ServerError(response['comment'])
+                else:
+                    answer = self._parse(
+                        chat2.BotAnswer, (await call.recv())['turn']
+                    )
+                    call.done = True
 
-            response = chat2.ChatData.model_validate(
-                response['chat']
-            )
+                response = self._parse(
+                    chat2.ChatData, response['chat']
+                )
 
-            return response, answer
+                return response, answer
 
     async def send_message(
         self, char: str, chat_id: str, text: str,
         author: dict = {}, *, image: str = None,
-        custom_id: str = None
+        custom_id: str = None, timeout: float = None
     ):
         """Sending a message to chat
 
@@ -330,9 +661,75 @@ class ChatV2(Request):
                 Attach image to message. This should
                 be the URL path on the server
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
+        with deadline(timeout):
+            turn = await self._retry(lambda: self._final(
+                self._send_message(
+                    char, chat_id, text, author,
+                    image, custom_id
+                )
+            ), idempotent=False)
+
+        return self._parse(chat2.BotAnswer, turn)
+
+    def stream_message(
+        self, char: str, chat_id: str, text: str,
+        author: dict = {}, *, image: str = None,
+        custom_id: str = None, timeout: float = None
+    ):
+        """Sending a message to chat and receiving the answer chunk by chunk
+
+        Each chunk is the answer generated so far, the last
+        one is complete. The time it took to get the first
+        chunk is in ``first_chunk``
+
+        EXAMPLE::
+
+            stream = chat.stream_message('CHAR', 'CHAT_ID', 'TEXT')
+
+            async for chunk in stream:
+                print(chunk.text)
+
+            print(stream.first_chunk)
+
+        Args:
+            char (``str``):
+                Character ID
+            
+            chat_id (``str``):
+                Chat ID
+            
+            text (``str``):
+                Message text
+            
+            custom_id (``str``, *optional*):
+                Its ID for the message, can be any ``str``
+            
+            image (``str``, *optional*):
+                Attach image to message. This should
+                be the URL path on the server
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
+        Returns:
+            :obj:`~characterai.aiocai.methods.chat2.Stream`
+        """
+        return Stream(self._send_message(
+            char, chat_id, text, author,
+            image, custom_id, timeout
+        ), self._parse)
+
+    def _send_message(
+        self, char, chat_id, text,
+        author, image, custom_id,
+        timeout = None
+    ):
         turn_key = {
             'chat_id': chat_id
         }
@@ -340,9 +737,8 @@ class ChatV2(Request):
         if custom_id != None:
             turn_key['turn_id'] = custom_id
 
-        message = {
-            'command': 'create_and_generate_turn',
-            'payload': {
+        return self._generate(
+            'create_and_generate_turn', {
                 'character_id': char,
                 'turn': {
                     'turn_key': turn_key,
@@ -354,31 +750,55 @@ class ChatV2(Request):
                         }
                     ]
                 }
-            }
-        }
+            }, chat_id=chat_id, timeout=timeout
+        )
 
-        await self.ws.send(json.dumps(message))
+    async def _final(self, turns) -> dict:
+        async for turn in turns: ...
 
-        while True:
-            response = json.loads(await self.ws.recv())
+        return turn
 
-            try:
-                turn = response['turn']
-            except:
-                raise ServerError(response['comment'])
+    async def _ask(
+        self, command: str, payload: dict, **route
+    ) -> dict:
+        async with self._rpc(
+            command, payload, **route
+        ) as call:
+            response = await call.recv()
+            call.done = True
+
+            return response
+
+    async def _generate(
+        self, command: str, payload: dict, **route
+    ):
+        # Yields the character's turns
+        # until the final one arrives
+        async with self._rpc(
+            command, payload, **route
+        ) as call:
+            while True:
+                response = await call.recv()
 
-            if not turn['author']['author_id'].isdigit():
                 try:
-                    turn['candidates'][0]['is_final']
-                except: ...
-                else:
-                    return chat2.BotAnswer.model_validate(
-                        turn
-                    )
+                    turn = response['turn']
+                except:
+                    call.done = True
+                    raise ServerError(response['comment'])
+
+                if not turn['author']['author_id'].isdigit():
+                    if 'is_final' in turn['candidates'][0]:
+                        call.done = True
+
+                    yield turn
+
+                    if call.done:
+                        return
 
     async def edit_message(
         self, chat_id: str, message_id: str,
-        text: str, *, token: str = None
+        text: str, *, token: str = None,
+        timeout: float = None
     ):
         """Edit the message text
 
@@ -396,31 +816,167 @@ class ChatV2(Request):
             text (``str``):
                 New message text
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the answer
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
-        await self.ws.send(json.dumps({
-            'command':'edit_turn_candidate',
-            'payload': {
-                'turn_key': {
-                    'chat_id': chat_id,
-                    'turn_id': message_id
-                },
-                'new_candidate_raw_content': text
-            }
-        }))
-
-        response = json.loads(await self.ws.recv())
+        with deadline(timeout):
+            response = await self._retry(lambda: self._ask(
+                'edit_turn_candidate', {
+                    'turn_key': {
+                        'chat_id': chat_id,
+                        'turn_id': message_id
+                    },
+                    'new_candidate_raw_content': text
+                }, chat_id=chat_id, turn_id=message_id
+            ))
 
         try: response['turn']
         except KeyError:
             raise ServerError(response['comment'])
         else:
-            return chat2.BotAnswer.model_validate(
-                response['turn']
+            return self._parse(
+                chat2.BotAnswer, response['turn']
+            )
+
+class Stream:
+    """Answer that is being generated
+
+    Iterate over it to get :obj:`~characterai.types.chat2.BotAnswer`
+    chunks as they arrive. It can also be used as a context manager
+    to stop the generation when leaving the block
+
+    EXAMPLE::
+
+        async with chat.stream_message('CHAR', 'CHAT_ID', 'TEXT') as stream:
+            async for chunk in stream:
+                print(chunk.text)
+
+    Parameters:
+        answer (:obj:`~characterai.types.chat2.BotAnswer`):
+            The last received chunk
+
+        first_chunk (``float``):
+            Seconds from the start of the iteration
+            to the first chunk
+    """
+    def __init__(self, turns, parse):
+        self.turns = turns
+        self.parse = parse
+        self.answer = None
+        self.start = None
+        self.first_chunk = None
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        if self.start is None:
+            self.start = time.perf_counter()
+
+        self.answer = self.parse(
+            chat2.BotAnswer, await self.turns.__anext__()
+        )
+
+        if self.first_chunk is None:
+            self.first_chunk = time.perf_counter() - self.start
+
+        return self.answer
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def close(self):
+        await self.turns.aclose()
+
+class Call:
+    """Frames addressed to one command sent over :obj:`WSConnect`"""
+    def __init__(
+        self, request_id: str, message: str,
+        chat_id: str = None, turn_id: str = None,
+        replay: bool = False, command: str = None,
+        until: float = None
+    ):
+        self.request_id = request_id
+        self.message = message
+        self.chat_id = chat_id
+        self.turn_id = turn_id
+        self.replay = replay
+        self.command = command
+        self.until = until
+        self.done = False
+        self.abandoned = None
+        self.frames = asyncio.Queue()
+
+    async def recv(self) -> dict:
+        try:
+            frame = await asyncio.wait_for(
+                self.frames.get(), remaining(self.until)
             )
+        except asyncio.TimeoutError:
+            raise DeadlineError('No answer in time')
+
+        if isinstance(frame, BaseException):
+            raise frame
+
+        return frame
 
 class WSConnect(ChatV2):
+    """Connection to the chat2 WebSocket
+
+    One connection can be shared by any number of coroutines.
+    A background task reads all frames and hands each one to
+    the call it belongs to: by ``request_id`` if the server
+    echoes it, otherwise by the chat and message IDs.
+    Every ``client.connect(...)`` opens a new connection
+    with its own token and options
+
+    If the connection drops, it is restored in the background.
+    Commands that are safe to repeat (editing and deleting
+    messages) are sent again, the others fail with
+    :obj:`~characterai.errors.ServerError`
+
+    Commands can be cancelled at any moment. The server is asked
+    to stop the generation and the rest of the answer is dropped,
+    so it never gets to the next commands of the same chat
+
+    EXAMPLE::
+
+        async with await client.connect() as chat:
+            await asyncio.gather(
+                chat.send_message('CHAR', 'CHAT_1', 'TEXT'),
+                chat.send_message('CHAR', 'CHAT_2', 'TEXT')
+            )
+
+    Args:
+        reconnect (:obj:`~characterai.backoff.Backoff` | ``bool``, *optional*):
+            Delays between reconnection attempts,
+            ``False`` to not reconnect
+
+        on_state (``Callable``, *optional*):
+            Called with ``connected``, ``reconnecting``
+            or ``closed`` when the connection state
+            changes. Can be a coroutine function
+
+        mirror (:obj:`~characterai.mirror.Mirror` | ``bool``, *optional*):
+            Keep the last messages of chats from the
+            received frames, see :obj:`WSConnect.turns`.
+            ``True`` uses the default settings
+
+        retry (:obj:`~characterai.retry.RetryPolicy` | ``bool``, *optional*):
+            Repeat commands that failed because the
+            connection was lost. The client's policy by default
+
+        concurrency (:obj:`~characterai.limiter.AdaptiveLimit` | ``bool``, *optional*):
+            Limit how many commands wait for an answer at
+            the same time. Latency is measured from sending
+            a command to its last frame
+    """
     def __init__(
         self, token: str = None,
         *, start: bool = True
@@ -428,25 +984,120 @@ class WSConnect(ChatV2):
         if not start:
             self.token = token
 
+        self.state = None
+        self.reconnect = Backoff()
+        self.on_state = None
+        self.mirror = None
+
     async def __call__(
         self, token: str = None,
-        *, start: bool = True
+        *, start: bool = True,
+        reconnect: Backoff | bool = True,
+        on_state = None,
+        mirror: Mirror | bool = None,
+        retry: RetryPolicy | bool = None,
+        concurrency: AdaptiveLimit | bool = None
     ):
-        self.token = token or self.token
+        # Each call opens its own connection, so an open one
+        # never changes its account or options while in use
+        conn = WSConnect(token or self.token, start=False)
+        conn.models = self.models
+        conn.retry = self.retry
+
+        if reconnect is True:
+            reconnect = Backoff()
+
+        conn.reconnect = reconnect
+        conn.on_state = on_state
+        conn.mirror = Mirror() if mirror is True else mirror or None
+
+        if retry is not None:
+            conn.retry = RetryPolicy() if retry is True else retry or None
+
+        conn.concurrency = AdaptiveLimit() \
+            if concurrency is True else concurrency or None
         
         if not start:
-            return None
+            return conn
 
-        return await self.__aenter__(self.token)
+        return await conn.__aenter__()
 
     async def __aenter__(
         self, token: str = None
     ):
+        # ``async with await client.connect()``
+        # enters an already open connection
+        if self.state not in (None, 'closed'):
+            return self
+
+        self.state = None
+        self.closed = False
+        self.closing = asyncio.Event()
+        self.connected = asyncio.Event()
+        self.calls = {}
+        self.aborts = set()
+
+        await self._connect()
+        await self._state('connected')
+
+        self.reader = asyncio.create_task(self._read())
+
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    def turns(self, chat_id: str) -> list:
+        """Last messages of the chat received over this connection
+
+        Requires the connection to be opened with ``mirror``
+
+        EXAMPLE::
+
+            chat.turns('CHAT_ID')[-1].candidates[0].raw_content
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+        Returns:
+            List of :obj:`~characterai.types.chat2.TurnData`,
+            from the oldest one
+        """
+        if self.mirror is None:
+            raise ValueError('Connection is opened without mirror')
+
+        return self.mirror.turns(chat_id)
+
+    def last_turn(self, chat_id: str):
+        """The newest message of the chat received over this connection
+
+        Requires the connection to be opened with ``mirror``
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+        Returns:
+            :obj:`~characterai.types.chat2.TurnData`,
+            ``None`` if nothing was received
+        """
+        if self.mirror is None:
+            raise ValueError('Connection is opened without mirror')
+
+        return self.mirror.last_turn(chat_id)
+
+    async def close(self):
+        self.closing.set()
+
+        await self.ws.close()
+        await self.reader
+
+    async def _connect(self):
         cookie = f'HTTP_AUTHORIZATION="Token {self.token}"'
         try:
             self.ws = await websockets.connect(
-                'wss://neo.character.ai/ws/',
-                extra_headers={
+                URL, extra_headers={
                     'Cookie': cookie
                 }
             )
@@ -454,10 +1105,273 @@ class WSConnect(ChatV2):
             if e.status_code == 403:
                 raise ServerError('Wrong token')
 
-        return self
+            raise
 
-    async def __aexit__(self, *args):
-        await self.close()
+        self.connected.set()
 
-    async def close(self):
-        return await self.ws.close()
\ No newline at end of file
+    async def _state(self, state: str):
+        self.state = state
+
+        if self.on_state is not None:
+            result = self.on_state(state)
+
+            if inspect.isawaitable(result):
+                await result
+
+    @asynccontextmanager
+    async def _rpc(
+        self, command: str, payload: dict, *,
+        chat_id: str = None, turn_id: str = None,
+        timeout: float = None
+    ):
+        at = until(timeout)
+
+        try:
+            await asyncio.wait_for(
+                self.connected.wait(), remaining(at)
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineError('Not connected in time')
+
+        if self.closed:
+            raise ServerError('Connection closed')
+
+        request_id = str(uuid.uuid4())
+        message = codec.dumps({
+            'command': command,
+            'request_id': request_id,
+            'payload': payload
+        })
+
+        call = Call(
+            request_id, message, chat_id, turn_id,
+            replay=command in IDEMPOTENT,
+            command=command, until=at
+        )
+
+        async with self._slot(at):
+            self.calls[request_id] = call
+
+            try:
+                try:
+                    await self.ws.send(message)
+                except exceptions.ConnectionClosed:
+                    # It will be sent again after reconnection
+                    if not call.replay:
+                        raise ConnectionLostError('Connection lost')
+
+                yield call
+            finally:
+                if call.done:
+                    self.calls.pop(request_id, None)
+                else:
+                    self._abandon(call)
+
+    def _abandon(self, call: Call):
+        # Nobody waits for the answer anymore (the task was
+        # cancelled, the stream closed or the time is over).
+        # The call stays until its last frame to catch the rest
+        if self.calls.get(call.request_id) is not call:
+            return
+
+        call.abandoned = time.monotonic() + ORPHANS
+
+        if call.command in GENERATIONS:
+            task = asyncio.get_running_loop().create_task(
+                self._abort(call)
+            )
+
+            self.aborts.add(task)
+            task.add_done_callback(self.aborts.discard)
+
+    async def _abort(self, call: Call):
+        payload = {'chat_id': call.chat_id}
+
+        if call.turn_id is not None:
+            payload['turn_key'] = {
+                'chat_id': call.chat_id,
+                'turn_id': call.turn_id
+            }
+
+        # Best effort, the frames are dropped either way
+        try:
+            await self.ws.send(codec.dumps({
+                'command': 'abort_generation',
+                'request_id': str(uuid.uuid4()),
+                'payload': payload
+            }))
+        except exceptions.ConnectionClosed:
+            ...
+
+    async def _read(self):
+        try:
+            while True:
+                try:
+                    async for message in self.ws:
+                        self._receive(message)
+                except exceptions.ConnectionClosed:
+                    ...
+
+                self.connected.clear()
+
+                if self.closing.is_set() or not self.reconnect \
+                or not await self._restore():
+                    break
+        except Exception:
+            log.exception('chat2 connection stopped reading')
+        finally:
+            self.closed = True
+            self.connected.set()
+
+            # Nobody else would answer them
+            for call in self.calls.values():
+                call.frames.put_nowait(
+                    ServerError('Connection closed')
+                )
+
+            await self._state('closed')
+
+    def _receive(self, message):
+        try:
+            frame = codec.loads(message)
+            call = self._route(frame)
+
+            if self.mirror is not None:
+                self.mirror.update(frame)
+        except Exception:
+            # One bad frame shouldn't stop the others
+            log.warning(
+                'Skipped a chat2 frame that can\'t be read: %.200r',
+                message, exc_info=True
+            )
+            return
+
+        if call is None:
+            return
+
+        # Later frames of the answer are
+        # matched by the message ID
+        if call.turn_id is None:
+            call.turn_id = answer(frame)
+
+        if call.abandoned is None:
+            call.frames.put_nowait(frame)
+        elif call.command in ANSWERS or final(frame):
+            self.calls.pop(call.request_id, None)
+
+    async def _restore(self) -> bool:
+        await self._state('reconnecting')
+
+        # Answers to the other commands could have been
+        # lost with the connection, they can't be repeated
+        for request_id, call in list(self.calls.items()):
+            if not call.replay or call.abandoned is not None:
+                del self.calls[request_id]
+                call.frames.put_nowait(
+                    ConnectionLostError('Connection lost')
+                )
+
+        for delay in self.reconnect.delays():
+            try:
+                await asyncio.wait_for(
+                    self.closing.wait(), delay
+                )
+            except asyncio.TimeoutError:
+                ...
+            else:
+                return False
+
+            try:
+                await self._connect()
+            except (OSError, exceptions.WebSocketException):
+                continue
+
+            try:
+                for call in list(self.calls.values()):
+                    await self.ws.send(call.message)
+            except exceptions.ConnectionClosed:
+                # Lost again, the next attempt sends them
+                continue
+
+            await self._state('connected')
+
+            return True
+
+        return False
+
+    def _route(self, frame: dict) -> Call:
+        now = time.monotonic()
+
+        # Nothing came for a call that ran out
+        # of time, its frames are not expected
+        for call in list(self.calls.values()):
+            if call.abandoned is not None \
+            and call.abandoned < now:
+                del self.calls[call.request_id]
+
+        request_id = frame.get('request_id')
+
+        if request_id is not None:
+            # Frames of calls that are no longer
+            # waited for are dropped
+            return self.calls.get(request_id)
+
+        turn = frame.get('turn') or {}
+        key = turn.get('turn_key') or {}
+
+        chat_id = key.get('chat_id') \
+            or (frame.get('chat') or {}).get('chat_id') \
+            or frame.get('chat_id')
+
+        # Dicts keep insertion order, so the
+        # oldest call is always the first
+        calls = list(self.calls.values())
+
+        if chat_id is not None:
+            calls = [
+                c for c in calls
+                if c.chat_id == chat_id
+            ]
+
+            for call in calls:
+                if call.turn_id is not None \
+                and call.turn_id == key.get('turn_id'):
+                    return call
+
+            # A new message belongs to the oldest
+            # call that hasn't got its answer yet
+            calls = [
+                c for c in calls if c.turn_id is None
+            ] or calls
+
+        if calls:
+            return calls[0]
+
+def answer(frame: dict) -> str:
+    """ID of the character's message in the frame"""
+    try:
+        turn = frame['turn']
+
+        if not turn['author']['author_id'].isdigit():
+            return turn['turn_key']['turn_id']
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+def final(frame: dict) -> bool:
+    """Whether the frame is the last one of a command"""
+    if frame.get('command') == 'neo_error':
+        return True
+
+    try:
+        turn = frame['turn']
+
+        return not turn['author']['author_id'].isdigit() \
+            and 'is_final' in turn['candidates'][0]
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return False
+
+def following(page: dict) -> str:
+    """Token of the next page, ``None`` after the last one"""
+    next_token = (page.get('meta') or {}).get('next_token')
+
+    return next_token if next_token and page['turns'] else None
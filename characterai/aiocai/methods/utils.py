@@ -1,140 +1,668 @@
 from characterai.aiocai import client, methods
 from ...errors import (
     ServerError, AuthError,
-    JSONError
+    JSONError, DeadlineError
 )
 
 from curl_cffi import CurlMime
+from curl_cffi._wrapper import lib
 
+from ... import codec, models
+from ...deadline import deadline, until, remaining, expired, current
+from ...retry import retryAfter, classify
+
+from contextlib import asynccontextmanager
 from functools import wraps
+import contextvars
+import inspect
+import asyncio
+import threading
 import json
+import time
+
+PLUS = 'https://plus.character.ai'
+NEO = 'https://neo.character.ai'
+
+# POST endpoints that only read data
+READS = {
+    'chat/character/info/', 'chat/user/public/',
+    'chat/character/histories_v2/', 'chat/history/continue/'
+}
 
 class Request:
+    cache = None
+    limiter = None
+    retry = None
+    concurrency = None
+    models = 'validate'
+    hedge = None
+
     async def request(
         self, url: str, *, token: str = None,
         method: str = 'GET', data: dict = {},
         split: bool = False, neo: bool = False,
-        multipart: CurlMime = None
+        multipart: CurlMime = None,
+        timeout: float = None
     ):
         key = self.token or token
 
         if key == None:
             raise AuthError('No token')
 
+        with deadline(timeout):
+            left = remaining()
+            request = lambda: self._request(
+                url, key, method, data, neo, multipart
+            )
+
+            if left is None:
+                return await request()
+
+            try:
+                return await asyncio.wait_for(request(), left)
+            except DeadlineError:
+                raise
+            except asyncio.TimeoutError:
+                raise DeadlineError(
+                    f'No answer in {left:.1f} seconds'
+                )
+
+    async def _request(
+        self, url: str, key: str, method: str,
+        data: dict, neo: bool, multipart: CurlMime
+    ):
+        if self.cache is not None:
+            res = self.cache.get(url, data, key)
+
+            if res is not None:
+                return res
+
+        link = f'{NEO if neo else PLUS}/{url}'
+
+        if multipart == None and isRead(url, method, data):
+            # Identical reads that are already on the way
+            # share one answer instead of being sent again
+            res = await flights.run(
+                (method, link, json.dumps(data, sort_keys=True), key),
+                lambda: self._retry(lambda: self._hedged(
+                    lambda: self._fetch(link, key, method, data, neo)
+                ))
+            )
+        else:
+            res = await self._retry(
+                lambda: self._fetch(
+                    link, key, method, data, neo, multipart
+                ), idempotent=False
+            )
+
+        if self.cache is not None:
+            self.cache.set(url, data, key, res)
+
+        return res
+
+    async def _fetch(
+        self, link: str, key: str,
+        method: str = 'GET', data: dict = {},
+        neo: bool = False, multipart: CurlMime = None
+    ):
+        await self._limit(key, neo)
+
         headers = {
             "Authorization": f"Token {key}"
         }
-        
-        link = f'https://plus.character.ai/{url}'
 
-        if neo:
-            link = link.replace('plus', 'neo')
+        async with self._slot():
+            if multipart != None:
+                r = await self.session.post(
+                    link, headers=headers, data=data,
+                    multipart=multipart
+                )
+            elif data != {} or data:
+                r = await self.session.post(
+                    link, headers=headers, json=data
+                )
+            elif method == 'GET':
+                r = await self.session.get(
+                    link, headers=headers
+                )
+            elif method == 'PUT':
+                r = await self.session.put(
+                    link, headers=headers, json=data
+                )
 
-        if multipart != None:
-            r = await self.session.post(
-                link, headers=headers, data=data,
-                multipart=multipart
-            )
-        elif data != {} or data:
-            r = await self.session.post(
-                link, headers=headers, json=data
-            )
-        elif method == 'GET':
-            r = await self.session.get(
-                link, headers=headers
-            )
-        elif method == 'PUT':
-            r = await self.session.put(
-                link, headers=headers, json=data
-            )
+            if not r.ok:
+                status = {
+                    'status': r.status_code,
+                    'retry_after': retryAfter(
+                        r.headers.get('Retry-After')
+                    )
+                }
 
-        if neo and not r.ok:
-            try:
-                raise ServerError(r.json()['comment'])
-            except KeyError:
-                raise ServerError(r.text)
+            if neo and not r.ok:
+                try:
+                    raise ServerError(r.json()['comment'], **status)
+                except (KeyError, ValueError):
+                    raise ServerError(r.text, **status)
 
-        if r == 404:
-            raise ServerError('Not Found')
-        elif not r.ok:
-            raise ServerError(r.status_code)
+            if r == 404:
+                raise ServerError('Not Found')
+            elif not r.ok:
+                raise ServerError(r.status_code, **status)
 
-        text = r.text
+        content = r.content
 
-        if '}\n{' in text:
-            text = '{' + text.split('}\n{')[-1]
+        if b'}\n{' in content:
+            content = b'{' + content.split(b'}\n{')[-1]
 
         try:
-            res = json.loads(
-                text.encode('utf-8')
-            )
-        except json.decoder.JSONDecodeError:
+            res = codec.loads(content)
+        except codec.DecodeError:
             raise JSONError(
                 'Unable to decode JSON.'
                 f'Server response: {r.text}'
             )
 
+        return checkResponse(res)
+
+    async def stream(
+        self, url: str, *, token: str = None,
+        data: dict = {}, timeout: float = None
+    ):
+        """POST request whose answer is read line by line
+
+        Every line of the response is a separate JSON
+        object, they are yielded as soon as they arrive.
+        The whole answer must arrive before the current
+        deadline and ``timeout``
+        """
+        key = self.token or token
+
+        if key == None:
+            raise AuthError('No token')
+
+        at = until(timeout)
+
+        await self._limit(key, at=at)
+
         try:
-            if res['force_login']:
-                raise AuthError('Need Auth')
-            elif res['status'] != 'OK' or res['abort']:
-                raise ServerError(res['error'])
-            elif res['error'] != None:
-                raise ServerError(res['error'])
-        except KeyError:
-            return res
+            r = await asyncio.wait_for(self.session.post(
+                f'{PLUS}/{url}', json=data, stream=True,
+                headers={
+                    "Authorization": f"Token {key}"
+                }
+            ), remaining(at))
+        except asyncio.TimeoutError:
+            raise DeadlineError('Deadline exceeded')
+
+        try:
+            if not r.ok:
+                raise ServerError(r.status_code)
+
+            lines = r.aiter_lines()
+
+            while True:
+                try:
+                    left = remaining(at)
+                    line = await asyncio.wait_for(
+                        lines.__anext__(), left
+                    )
+                except StopAsyncIteration:
+                    break
+                except (DeadlineError, asyncio.TimeoutError):
+                    # The transfer stops at its next chunk,
+                    # the rest of the answer isn't waited for
+                    r.quit_now.set()
+                    raise DeadlineError('Deadline exceeded')
+
+                if not line:
+                    continue
+
+                try:
+                    res = codec.loads(line)
+                except codec.DecodeError:
+                    raise JSONError(
+                        'Unable to decode JSON.'
+                        f'Server response: {line}'
+                    )
+
+                yield checkResponse(res)
+        finally:
+            if not r.quit_now.is_set():
+                await r.aclose()
+
+    async def _hedged(self, fetch):
+        if self.hedge is None:
+            return await fetch()
+
+        start = time.monotonic()
+        first = asyncio.ensure_future(fetch())
+        tasks = [first]
+
+        try:
+            await asyncio.wait(tasks, timeout=self.hedge.delay())
+
+            if not first.done() and self.hedge.allow():
+                tasks.append(asyncio.ensure_future(fetch()))
+
+            pending = set(tasks)
+
+            # The first answer wins, a failed
+            # request waits for the other one
+            while True:
+                done, pending = await asyncio.wait(
+                    pending, return_when=asyncio.FIRST_COMPLETED
+                )
+
+                winner = next((
+                    task for task in done
+                    if task.exception() is None
+                ), None)
+
+                if winner is not None or not pending:
+                    break
+
+            if winner is None:
+                return done.pop().result()
+
+            if winner is not first:
+                self.hedge.won += 1
+
+            self.hedge.record(time.monotonic() - start)
+
+            return winner.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    def _parse(self, cls, data):
+        return models.parse(cls, data, self.models)
+
+    def _parse_list(self, cls, data):
+        return models.parse(cls, data, self.models, many=True)
+
+    async def _retry(self, fetch, idempotent: bool = True):
+        policy = self.retry
+
+        if policy is None or policy.idempotent and not idempotent:
+            return await fetch()
+
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            try:
+                return await fetch()
+            except Exception as e:
+                delay = policy.delay(e, attempt, start)
+
+                if delay is None:
+                    raise
+
+                # The next attempt would start after the deadline
+                if expired(delay):
+                    raise DeadlineError('Deadline exceeded') from e
+
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    @asynccontextmanager
+    async def _slot(self, at: float = None):
+        if self.concurrency is None:
+            yield
+            return
+
+        at = until() if at is None else at
+
+        try:
+            await asyncio.wait_for(
+                self.concurrency.wait(), remaining(at)
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineError('No free place in time')
+
+        start = time.monotonic()
+        kind = None
+
+        try:
+            yield
+        except DeadlineError:
+            kind = 'timeout'
+            raise
+        except asyncio.CancelledError:
+            # A deadline cancels the request when its time is over,
+            # other cancellations say nothing about the server
+            if at is not None and at <= time.monotonic():
+                kind = 'timeout'
+            else:
+                start = None
+
+            raise
+        except Exception as e:
+            kind = classify(e)
+            raise
+        finally:
+            self.concurrency.release(start, kind)
+
+    async def _limit(
+        self, key: str, neo: bool = False, at: float = None
+    ):
+        if self.limiter is None:
+            return
+
+        delay = self.limiter.reserve(
+            key, 'neo' if neo else 'plus',
+            until() if at is None else at
+        )
+
+        if delay is None:
+            raise DeadlineError('Deadline exceeded')
+
+        if delay > 0:
+            await asyncio.sleep(delay)
 
     async def close(self):
         return await self.session.close()
 
+class Flight:
+    """One request that is on the way and its callers"""
+    def __init__(self, task: asyncio.Task):
+        self.task = task
+        self.callers = 0
+        self.data = None
+
+    def result(self, res: dict) -> dict:
+        # Callers of a shared answer get their own copies,
+        # so changing one of them doesn't change the others
+        if self.data is None:
+            return res
+
+        return codec.loads(self.data)
+
+class Flights:
+    """Requests that are on the way, by their contents"""
+    def __init__(self):
+        self.tasks = {}
+
+    async def run(self, key: tuple, fetch) -> dict:
+        # Futures belong to an event loop,
+        # so each loop has its own requests
+        key = (asyncio.get_running_loop(), *key)
+        flight = self.tasks.get(key)
+
+        if flight is None:
+            # The request is shared, so it runs without
+            # the deadline of the caller that started it
+            context = contextvars.copy_context()
+            context.run(current.set, None)
+
+            flight = Flight(
+                context.run(asyncio.ensure_future, fetch())
+            )
+            self.tasks[key] = flight
+
+            flight.task.add_done_callback(
+                lambda t: self.done(key, flight)
+            )
+
+        flight.callers += 1
+
+        # Cancelling one of the callers or its deadline
+        # must not cancel the others
+        try:
+            res = await asyncio.wait_for(
+                asyncio.shield(flight.task), remaining()
+            )
+        except asyncio.TimeoutError:
+            raise DeadlineError('Deadline exceeded')
+
+        return flight.result(res)
+
+    def done(self, key: tuple, flight: Flight):
+        del self.tasks[key]
+
+        task = flight.task
+
+        if task.cancelled() or task.exception() is not None:
+            return
+
+        # Nobody can join after this, so
+        # the number of callers is final
+        if flight.callers > 1:
+            flight.data = codec.dumps(task.result())
+
+flights = Flights()
+
+def isRead(url: str, method: str, data: dict) -> bool:
+    if url.split('?')[0] in READS:
+        return True
+
+    return method == 'GET' and not data
+
+def checkResponse(res: dict) -> dict:
+    try:
+        if res['force_login']:
+            raise AuthError('Need Auth')
+        elif res['status'] != 'OK' or res['abort']:
+            raise ServerError(res['error'])
+        elif res['error'] != None:
+            raise ServerError(res['error'])
+    except KeyError:
+        return res
+
 def checkSession(args) -> bool:
     return any(
         isinstance(
             a, client.aiocai.Client
-        ) for a in args
+        ) or bound(a) for a in args
     )
 
+def bound(a) -> bool:
+    # chat1 of a client has its session,
+    # the one of the library class doesn't
+    return isinstance(
+        a, methods.chat1.ChatV1
+    ) and a.session is not None
+
 def delClass(args) -> tuple:
     new = ()
 
+    # HTTP methods called on a chat2 connection
+    # borrow a shared client with its token
     for a in args:
-        if not isinstance(a, (
-            methods.chat1.ChatV1
+        if bound(a) or not isinstance(a, (
+            methods.chat1.ChatV1,
+            methods.chat2.WSConnect
         )):
             new = (a, *new)
 
     return new[::-1]
 
-def caimethod(func):
-    @wraps(func)
-    async def wrapper(*args, **kwargs):
+class Lease:
+    def __init__(self, client, loop):
+        self.client = client
+        self.loop = loop
+        self.users = 0
+        self.used = time.monotonic()
+
+class Sessions:
+    """Clients shared by methods called through the library class
+
+    ``aiocai.get_char(...)`` and ``aiocai.chat1.send_message(...)``
+    borrow a client from here instead of opening a new session
+    for every call, so the connection stays warm between calls.
+    Clients unused for ``ttl`` seconds are closed
+
+    EXAMPLE::
+
+        await aiocai.get_char('CHAR', token='TOKEN')
+
+        # Before the event loop is closed
+        await aiocai.sessions.close()
+
+    Args:
+        ttl (``float``, *optional*):
+            How many seconds an unused client is kept open
+    """
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.leases = {}
+        # Loops of different threads share the clients
+        self.lock = threading.Lock()
+
+    async def acquire(
+        self, token: str = None,
+        identifier: str = 'chrome120'
+    ) -> Lease:
+        await self.evict()
+
+        loop = asyncio.get_running_loop()
+        key = (token, identifier)
+        stale = None
+
+        # Checked and added without awaiting in between,
+        # so two calls never open two clients for one key
+        with self.lock:
+            lease = self.leases.get(key)
+
+            # A session can only be used in the
+            # event loop where it was created
+            if lease is not None and lease.loop is not loop:
+                stale, lease = lease, None
+
+            if lease is None:
+                lease = self.leases[key] = Lease(
+                    client.aiocai.Client(
+                        token=token, identifier=identifier
+                    ), loop
+                )
+
+            lease.users += 1
+
+        if stale is not None:
+            await self._discard(stale)
+
+        return lease
+
+    def release(self, lease: Lease):
+        with self.lock:
+            lease.users -= 1
+            lease.used = time.monotonic()
+
+    async def evict(self):
+        """Close clients that have not been used for ``ttl`` seconds"""
+        now = time.monotonic()
+        idle = []
+
+        with self.lock:
+            for key, lease in list(self.leases.items()):
+                if lease.users == 0 and now - lease.used > self.ttl:
+                    del self.leases[key]
+                    idle.append(lease)
+
+        for lease in idle:
+            await self._discard(lease)
+
+    async def close(self):
+        """Close all clients. They will be reopened on the next call"""
+        with self.lock:
+            leases = list(self.leases.values())
+            self.leases.clear()
+
+        for lease in leases:
+            await self._discard(lease)
+
+    async def _discard(self, lease: Lease):
+        loop = asyncio.get_running_loop()
+
+        if lease.loop is loop:
+            await lease.client.close()
+        elif lease.loop.is_running():
+            # Closed by the loop it belongs to
+            asyncio.run_coroutine_threadsafe(
+                lease.client.close(), lease.loop
+            )
+        else:
+            free(lease.client.session)
+
+def free(session):
+    """Free curl handles of a session whose event loop has stopped
+
+    ``close()`` of the session needs its loop,
+    so the handles are released directly
+    """
+    # These are internals of curl_cffi, setup.py
+    # pins the versions that have them
+    acurl = session._acurl
+
+    if acurl is not None and acurl._curlm is not None:
+        lib.curl_multi_cleanup(acurl._curlm)
+        acurl._curlm = None
+
+    while True:
         try:
-            try:
-                token = kwargs['token']
-            except (AttributeError, KeyError):
-                token = args[0].token
-        except AttributeError:
-            token = None
+            curl = session.pool.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+
+        if curl:
+            curl.close()
 
-        temp = False
+    session._closed = True
 
-        if not checkSession(args):
-            temp = True
+sessions = Sessions()
 
-            args = (client.aiocai.Client(
-                token=token
-            ), *args)
+def getToken(args, kwargs) -> str:
+    try:
+        try:
+            return kwargs['token']
+        except (AttributeError, KeyError):
+            return args[0].token
+    except AttributeError:
+        return None
 
-        args = delClass(args)
+def caimethod(func):
+    if inspect.isasyncgenfunction(func):
+        @wraps(func)
+        async def generator(*args, **kwargs):
+            if checkSession(args):
+                async for item in func(*delClass(args), **kwargs):
+                    yield item
 
-        result = await func(*args, **kwargs)
-        
-        # Closing the session if the function
-        # was used through a library class
-        if temp:
-            await args[0].close()
+                return
 
-        return result
+            lease = await sessions.acquire(
+                getToken(args, kwargs)
+            )
+
+            try:
+                async for item in func(
+                    *delClass((lease.client, *args)),
+                    **kwargs
+                ):
+                    yield item
+            finally:
+                sessions.release(lease)
+
+        return generator
+
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        if checkSession(args):
+            return await func(*delClass(args), **kwargs)
+
+        # The function was used through a library
+        # class, so we borrow a shared client
+        lease = await sessions.acquire(
+            getToken(args, kwargs)
+        )
+
+        try:
+            return await func(
+                *delClass((lease.client, *args)),
+                **kwargs
+            )
+        finally:
+            sessions.release(lease)
     
     return wrapper
 
@@ -149,8 +677,3 @@ def flatten(d, parent_key='', sep=''):
         else:
             items.append((k, v))
     return dict(items)
-
-def validate(_class, data):
-    return [
-        _class(**a) for a in data
-    ]
@@ -0,0 +1,236 @@
+from contextlib import asynccontextmanager
+import asyncio
+import time
+
+from .methods.chat2 import WSConnect
+
+class Slot:
+    def __init__(self, conn: WSConnect):
+        self.conn = conn
+        self.leases = 0
+        self.used = time.monotonic()
+
+class WSPool:
+    """chat2 connections for many accounts
+
+    Connections are opened per token when needed and shared
+    between callers. Each token can have at most ``per_token``
+    sockets and the whole pool at most ``limit``. Sockets that
+    have not been leased for ``ttl`` seconds are closed
+
+    EXAMPLE::
+
+        async with aiocai.WSPool(per_token=2) as pool:
+            await pool.start(['TOKEN_1', 'TOKEN_2'])
+
+            async with pool.lease('TOKEN_1') as chat:
+                await chat.send_message('CHAR', 'CHAT_ID', 'TEXT')
+
+    Args:
+        per_token (``int``, *optional*):
+            Maximum number of sockets for one token
+
+        limit (``int``, *optional*):
+            Maximum number of sockets in the pool
+
+        calls (``int``, *optional*):
+            How many leases share one socket before
+            another one is opened for the token
+
+        ttl (``float``, *optional*):
+            How many seconds an unused socket is kept open
+
+        **kwargs (``Any``):
+            Connection options: ``reconnect``, ``on_state``
+    """
+    def __init__(
+        self, *, per_token: int = 2,
+        limit: int = 100, calls: int = 16,
+        ttl: float = 300, **kwargs
+    ):
+        self.per_token = per_token
+        self.limit = limit
+        self.calls = calls
+        self.ttl = ttl
+        self.options = kwargs
+
+        self.slots = {}
+        self.locks = {}
+        self.warm = {}
+        self.size = 0
+        self.changed = asyncio.Condition()
+        self.reaper = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        await self.close()
+
+    async def start(
+        self, tokens: list = [], warm: int = 1
+    ):
+        """Open connections in advance and start closing unused ones
+
+        Args:
+            tokens (List of ``str``, *optional*):
+                Tokens to open connections for
+
+            warm (``int``, *optional*):
+                How many connections to open for each token.
+                They are kept open even if unused
+        """
+        warm = min(warm, self.per_token)
+
+        for token in tokens:
+            self.warm[token] = warm
+
+        await asyncio.gather(*[
+            self._open(token)
+            for token in tokens
+            for _ in range(warm)
+        ])
+
+        self._watch()
+
+    @asynccontextmanager
+    async def lease(self, token: str):
+        """Borrow a connection for the token
+
+        EXAMPLE::
+
+            async with pool.lease('TOKEN') as chat:
+                await chat.send_message('CHAR', 'CHAT_ID', 'TEXT')
+
+        Returns:
+            :obj:`~characterai.aiocai.methods.chat2.WSConnect`
+        """
+        self._watch()
+
+        slot = await self._acquire(token)
+        slot.leases += 1
+
+        try:
+            yield slot.conn
+        finally:
+            slot.leases -= 1
+            slot.used = time.monotonic()
+
+            async with self.changed:
+                self.changed.notify_all()
+
+    async def close(self):
+        """Close all connections"""
+        if self.reaper is not None:
+            self.reaper.cancel()
+            self.reaper = None
+
+        slots = [
+            slot for slots in self.slots.values()
+            for slot in slots
+        ]
+
+        self.slots.clear()
+        self.size = 0
+
+        await asyncio.gather(*[
+            slot.conn.close() for slot in slots
+        ])
+
+    def _watch(self):
+        # Started by the first use, so pools that
+        # are only leased from close idle sockets too
+        if self.reaper is None:
+            self.reaper = asyncio.create_task(self._reap())
+
+    async def _acquire(self, token: str) -> Slot:
+        lock = self.locks.setdefault(token, asyncio.Lock())
+
+        # Only one connection per token is opened at a time,
+        # so concurrent leases don't open more than needed
+        async with lock:
+            while True:
+                slots = self.slots.setdefault(token, [])
+
+                for slot in [s for s in slots if s.conn.closed]:
+                    slots.remove(slot)
+                    self.size -= 1
+
+                best = min(
+                    slots, default=None,
+                    key=lambda s: s.leases
+                )
+
+                if best is not None and best.leases < self.calls:
+                    return best
+
+                if len(slots) < self.per_token and (
+                    self.size < self.limit
+                    or await self._evict()
+                ):
+                    return await self._open(token)
+
+                if best is not None:
+                    return best
+
+                async with self.changed:
+                    await self.changed.wait()
+
+    async def _open(self, token: str) -> Slot:
+        self.size += 1
+
+        try:
+            conn = await WSConnect(start=False)(
+                token, **self.options
+            )
+        except:
+            self.size -= 1
+            raise
+
+        slot = Slot(conn)
+        self.slots.setdefault(token, []).append(slot)
+
+        return slot
+
+    async def _evict(self) -> bool:
+        # Makes room by closing the socket
+        # that has been unused the longest
+        idle = [
+            (slot.used, token, slot)
+            for token, slots in self.slots.items()
+            for slot in slots if slot.leases == 0
+        ]
+
+        if not idle:
+            return False
+
+        _, token, slot = min(idle, key=lambda i: i[0])
+
+        self.slots[token].remove(slot)
+        self.size -= 1
+
+        await slot.conn.close()
+
+        return True
+
+    async def _reap(self):
+        while True:
+            await asyncio.sleep(max(self.ttl / 2, 1))
+
+            now = time.monotonic()
+
+            for token, slots in list(self.slots.items()):
+                idle = [
+                    slot for slot in slots
+                    if slot.leases == 0
+                    and now - slot.used > self.ttl
+                ]
+
+                # Pre-warmed connections stay open
+                keep = self.warm.get(token, 0) - (len(slots) - len(idle))
+
+                for slot in idle[max(keep, 0):]:
+                    slots.remove(slot)
+                    self.size -= 1
+
+                    await slot.conn.close()
@@ -0,0 +1,369 @@
+from bisect import bisect_left, bisect_right
+import hashlib
+import heapq
+import mmap
+import os
+import struct
+import sys
+
+from . import codec, export, models
+from .types import chat2
+
+# Index numbers are written in the order of the machine,
+# so the reader can look at them without unpacking
+ORDER = b'L' if sys.byteorder == 'little' else b'B'
+
+DATA = b'CAIARC1\n'
+INDEX = b'CAIIDX1' + ORDER
+
+# Lengths of chat_id, turn_id and the turn JSON
+RECORD = struct.Struct('<HHI')
+
+# chat, turn, create_time, offset, size
+ENTRY = struct.Struct('=QQqQQ')
+WORDS = ENTRY.size // 8
+
+def digest(key: bytes) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(key, digest_size=8).digest(), 'little'
+    )
+
+class Writer:
+    """Adds chat2 turns to an archive
+
+    The archive is two files: ``path`` with the turns,
+    which is only appended to, and ``path + '.idx'`` with
+    their places sorted by chat and turn. The index is
+    replaced as a whole when the writer is flushed,
+    so readers never see a half-written one.
+    A turn that is added again replaces the old one
+
+    EXAMPLE::
+
+        with archive.Writer('chats.arc') as writer:
+            writer.add_export('histories.jsonl.gz')
+
+    Args:
+        path (``str``):
+            Data file, it is created if it doesn't exist
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.index = path + '.idx'
+        self.file = open(path, 'ab')
+
+        if self.file.tell() == 0:
+            self.file.write(DATA)
+        else:
+            check(path, DATA)
+
+        self.entries = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_turns(self, turns: list) -> int:
+        """Add turns as they came from the server,
+        :obj:`~characterai.types.chat2.TurnData`
+        or :obj:`~characterai.types.chat2.CompactTurn`
+
+        Returns:
+            Number of added turns
+        """
+        for turn in turns:
+            if isinstance(turn, chat2.CompactTurn):
+                turn = turn.to_dict()
+            elif not isinstance(turn, dict):
+                turn = turn.model_dump(mode='json')
+
+            key = turn['turn_key']
+            chat_id = key['chat_id'].encode()
+            turn_id = key['turn_id'].encode()
+            body = codec.dumps(turn).encode()
+
+            offset = self.file.tell()
+
+            self.file.write(
+                RECORD.pack(len(chat_id), len(turn_id), len(body))
+                + chat_id + turn_id + body
+            )
+
+            self.entries.append((
+                digest(chat_id), digest(turn_id),
+                chat2.micros(turn['create_time']), offset,
+                self.file.tell() - offset
+            ))
+
+        return len(turns)
+
+    def add_export(self, path: str) -> int:
+        """Add all turns of a file written by ``export_histories``
+
+        Returns:
+            Number of added turns
+        """
+        added = 0
+
+        with models.mode('raw'):
+            for item in export.read(path):
+                if 'turn_key' in item:
+                    added += self.add_turns([item])
+
+                    if len(self.entries) >= 100000:
+                        self.flush()
+
+        return added
+
+    def flush(self):
+        """Write the added turns and the new index"""
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+        if not self.entries:
+            if not os.path.exists(self.index):
+                self._merge(())
+
+            return
+
+        self.entries.sort(key=order)
+        self._merge(self.entries)
+        self.entries = []
+
+    def close(self):
+        if self.file.closed:
+            return
+
+        self.flush()
+        self.file.close()
+
+    def _merge(self, entries):
+        temp = self.index + '.tmp'
+
+        old = open(self.index, 'rb') if os.path.exists(self.index) else None
+
+        try:
+            if old is not None:
+                check(self.index, INDEX)
+                old.seek(len(INDEX))
+
+            with open(temp, 'wb') as file:
+                file.write(INDEX)
+
+                last = None
+
+                # Both are sorted, so the old index is read
+                # in parts instead of loading it whole
+                for entry in heapq.merge(
+                    read_entries(old), entries, key=order
+                ):
+                    # The same turn again: the later one wins
+                    if last is not None and last[:2] != entry[:2]:
+                        file.write(ENTRY.pack(*last))
+
+                    last = entry
+
+                if last is not None:
+                    file.write(ENTRY.pack(*last))
+
+                file.flush()
+                os.fsync(file.fileno())
+        finally:
+            if old is not None:
+                old.close()
+
+        os.replace(temp, self.index)
+
+class Reader:
+    """Reads turns of an archive made by :obj:`Writer`
+
+    Both files are mapped to memory, so opening doesn't
+    depend on their size and only the pages that are read
+    are loaded. A turn is found by a binary search
+    in the index
+
+    EXAMPLE::
+
+        with archive.Reader('chats.arc') as reader:
+            turn = reader.turn('CHAT_ID', 'TURN_ID')
+            last = reader.turns('CHAT_ID', limit=20)
+
+    Args:
+        path (``str``):
+            Data file
+    """
+    def __init__(self, path: str):
+        check(path, DATA)
+        check(path + '.idx', INDEX)
+
+        with open(path, 'rb') as file:
+            self.data = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+        with open(path + '.idx', 'rb') as file:
+            self.index = mmap.mmap(
+                file.fileno(), 0, access=mmap.ACCESS_READ
+            )
+
+        self.words = memoryview(self.index)[len(INDEX):].cast('Q')
+        self.keys = Keys(self.words)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def __contains__(self, key: tuple) -> bool:
+        return self.raw(*key) is not None
+
+    def raw(self, chat_id: str, turn_id: str) -> memoryview:
+        """JSON of the turn without copying it
+
+        Returns:
+            ``memoryview`` of the archive, ``None``
+            if there is no such turn
+        """
+        chat = chat_id.encode()
+        turn = turn_id.encode()
+        key = (digest(chat), digest(turn))
+
+        i = bisect_left(self.keys, key)
+
+        if i < len(self.keys) and self.keys[i] == key:
+            return self._record(i, chat, turn)
+
+    def turn(self, chat_id: str, turn_id: str):
+        """Turn by its ID
+
+        Returns:
+            :obj:`~characterai.types.chat2.TurnData`,
+            ``None`` if there is no such turn
+        """
+        data = self.raw(chat_id, turn_id)
+
+        if data is not None:
+            return models.parse(chat2.TurnData, loads(data))
+
+    def turns(
+        self, chat_id: str, *, limit: int = None,
+        compact: bool = False
+    ) -> list:
+        """Turns of the chat, from the newest one
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            limit (``int``, *optional*):
+                Maximum number of turns
+
+            compact (``bool``, *optional*):
+                Return :obj:`~characterai.types.chat2.CompactTurn`
+
+        Returns:
+            List of :obj:`~characterai.types.chat2.TurnData`
+            or :obj:`~characterai.types.chat2.CompactTurn`
+        """
+        chat = chat_id.encode()
+        key = digest(chat)
+
+        start = bisect_left(self.keys, (key, 0))
+        end = bisect_right(self.keys, (key, 1 << 64))
+
+        # Turns of a chat are sorted by ID in the index,
+        # the time is kept next to it for this order
+        found = sorted(
+            range(start, end),
+            key=lambda i: (self.words[i * WORDS + 2], i),
+            reverse=True
+        )[:limit]
+
+        result = []
+
+        for i in found:
+            data = self._record(i, chat)
+
+            if data is None:
+                continue
+
+            if compact:
+                result.append(chat2.CompactTurn.from_dict(loads(data)))
+            else:
+                result.append(
+                    models.parse(chat2.TurnData, loads(data))
+                )
+
+        return result
+
+    def close(self):
+        """Views returned by :obj:`raw` must be released before"""
+        self.words.release()
+        self.index.close()
+        self.data.close()
+
+    def _record(self, i: int, chat: bytes, turn: bytes = None):
+        offset = self.words[i * WORDS + 3]
+        size = self.words[i * WORDS + 4]
+
+        chat_size, turn_size, body = RECORD.unpack_from(
+            self.data, offset
+        )
+
+        start = offset + RECORD.size
+        view = memoryview(self.data)
+
+        # Different IDs can have the same hash
+        if view[start:start + chat_size] != chat:
+            return None
+
+        start += chat_size
+
+        if turn is not None and view[start:start + turn_size] != turn:
+            return None
+
+        return view[offset + size - body:offset + size]
+
+class Keys:
+    """``(chat, turn)`` hashes of the index for ``bisect``"""
+    def __init__(self, words: memoryview):
+        self.words = words
+
+    def __len__(self) -> int:
+        return len(self.words) // WORDS
+
+    def __getitem__(self, i: int) -> tuple:
+        return self.words[i * WORDS], self.words[i * WORDS + 1]
+
+def order(entry: tuple) -> tuple:
+    return entry[0], entry[1], entry[3]
+
+def read_entries(file):
+    if file is None:
+        return
+
+    while True:
+        block = file.read(ENTRY.size * 4096)
+
+        if not block:
+            return
+
+        yield from ENTRY.iter_unpack(block)
+
+def check(path: str, magic: bytes):
+    with open(path, 'rb') as file:
+        if file.read(len(magic)) != magic:
+            raise ValueError(f'Not an archive file: {path}')
+
+def loads(data: memoryview):
+    # The standard json module only reads bytes and str
+    if codec.backend == 'json':
+        data = bytes(data)
+
+    return codec.loads(data)
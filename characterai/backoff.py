@@ -0,0 +1,62 @@
+import random
+
+class Backoff:
+    """Delays between repeated attempts
+
+    Each delay is ``base * factor ** attempt`` seconds, capped
+    at ``limit``. A random part of it is cut off (``jitter``)
+    so that many clients that lost the connection at the same
+    moment don't come back at the same moment too
+
+    EXAMPLE::
+
+        async with await client.connect(
+            reconnect=Backoff(base=1, retries=10)
+        ) as chat:
+            ...
+
+    Args:
+        base (``float``, *optional*):
+            First delay in seconds
+
+        factor (``float``, *optional*):
+            How many times each next delay is longer
+
+        limit (``float``, *optional*):
+            Maximum delay in seconds
+
+        jitter (``float``, *optional*):
+            Which part of the delay can be randomly cut off,
+            from ``0`` (none) to ``1`` (all of it)
+
+        retries (``int``, *optional*):
+            Maximum number of attempts, ``None`` is unlimited
+    """
+    def __init__(
+        self, base: float = 0.5, factor: float = 2,
+        limit: float = 30, jitter: float = 1,
+        retries: int = None
+    ):
+        self.base = base
+        self.factor = factor
+        self.limit = limit
+        self.jitter = jitter
+        self.retries = retries
+
+    def delay(self, attempt: int) -> float:
+        delay = min(
+            self.limit,
+            self.base * self.factor ** attempt
+        )
+
+        return delay - random.uniform(
+            0, delay * self.jitter
+        )
+
+    def delays(self):
+        attempt = 0
+
+        while self.retries is None or attempt < self.retries:
+            yield self.delay(attempt)
+
+            attempt += 1
@@ -0,0 +1,33 @@
+class Result:
+    """Result of one call in a batch
+
+    It can be unpacked: ``id, value, error = result``
+
+    Parameters:
+        id (``Any``):
+            ID the method was called with
+
+        value (``Any``):
+            What the method returned,
+            ``None`` if it failed
+
+        error (``Exception``):
+            Why the method failed,
+            ``None`` if it succeeded
+    """
+    def __init__(
+        self, id, value = None,
+        error: Exception = None
+    ):
+        self.id = id
+        self.value = value
+        self.error = error
+
+    def __iter__(self):
+        return iter((self.id, self.value, self.error))
+
+    def __repr__(self):
+        if self.error is not None:
+            return f'Result({self.id!r}, error={self.error!r})'
+
+        return f'Result({self.id!r}, {self.value!r})'
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+import threading
+import json
+import time
+
+from . import codec
+
+# How many seconds answers of read-only
+# endpoints are kept by default
+TTL = {
+    'chat/character/info/': 300,
+    'chat/curated_categories/characters/': 600,
+    'chat/characters/trending/': 600,
+    'recommendation/v1/user': 600,
+    'chat/character/voices/': 3600,
+    'chat/user/characters/upvoted/': 60,
+    'chat/characters/search/': 300,
+    'chat/user/public/': 300
+}
+
+class Cache:
+    """Server answers cache for read-only methods
+
+    It is used by :obj:`~characterai.aiocai.client.aiocai.Client`
+    for ``get_char``, ``get_category``, ``get_recommended``,
+    ``get_trending``, ``get_voices``, ``upvoted``, ``search``
+    and ``get_user``. Other methods always go to the server
+
+    EXAMPLE::
+
+        client = aiocai.Client('TOKEN', cache=Cache(size=512))
+
+        await client.get_char('CHAR')
+        await client.get_char('CHAR')
+
+        print(client.cache.hits, client.cache.misses)
+
+    Args:
+        ttl (``dict``, *optional*):
+            Seconds to keep answers for each endpoint,
+            merged with the defaults. ``0`` disables
+            the cache for the endpoint
+
+        size (``int``, *optional*):
+            Maximum number of answers, the least
+            recently used ones are removed first
+
+    Parameters:
+        hits (``int``):
+            Answers returned from the cache
+
+        misses (``int``):
+            Answers that had to be requested
+    """
+    def __init__(
+        self, ttl: dict = {}, size: int = 1024
+    ):
+        self.ttl = {**TTL, **ttl}
+        self.size = size
+        self.items = OrderedDict()
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+
+    def lifetime(self, url: str) -> float:
+        return self.ttl.get(url.split('?')[0], 0)
+
+    def key(self, url: str, data: dict, token: str):
+        return url, json.dumps(data, sort_keys=True), token
+
+    def get(
+        self, url: str, data: dict, token: str
+    ) -> dict:
+        if not self.lifetime(url):
+            return None
+
+        key = self.key(url, data, token)
+
+        with self.lock:
+            try:
+                expires, value = self.items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+
+            if expires < time.monotonic():
+                del self.items[key]
+                self.misses += 1
+                return None
+
+            self.items.move_to_end(key)
+            self.hits += 1
+
+        # Each caller gets its own copy, so changing
+        # a result doesn't change the saved answer
+        return codec.loads(value)
+
+    def set(
+        self, url: str, data: dict,
+        token: str, value: dict
+    ):
+        ttl = self.lifetime(url)
+
+        if not ttl or value is None:
+            return
+
+        key = self.key(url, data, token)
+
+        value = codec.dumps(value)
+
+        with self.lock:
+            self.items[key] = (time.monotonic() + ttl, value)
+            self.items.move_to_end(key)
+
+            while len(self.items) > self.size:
+                self.items.popitem(last=False)
+
+    def invalidate(self, url: str = None):
+        """Remove saved answers
+
+        Args:
+            url (``str``, *optional*):
+                Remove only answers of this endpoint,
+                all answers if not specified
+        """
+        with self.lock:
+            if url is None:
+                self.items.clear()
+                return
+
+            for key in [
+                k for k in self.items
+                if k[0].startswith(url)
+            ]:
+                del self.items[key]
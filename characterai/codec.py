@@ -0,0 +1,72 @@
+import json
+
+# Tried in this order when no backend is chosen
+BACKENDS = ('orjson', 'msgspec', 'json')
+
+def use(name: str = None) -> str:
+    """Choose the library that encodes and decodes JSON
+
+    All responses and chat2 frames go through it. By default
+    the fastest installed one is used: ``orjson``, ``msgspec``
+    or the standard ``json`` module
+
+    EXAMPLE::
+
+        from characterai import codec
+
+        codec.use('json')
+
+    Args:
+        name (``str``, *optional*):
+            ``orjson``, ``msgspec`` or ``json``,
+            ``None`` to choose automatically
+
+    Returns:
+        Name of the chosen library
+    """
+    global backend, loads, dumps, DecodeError
+
+    for candidate in BACKENDS if name is None else (name,):
+        try:
+            backend, loads, dumps, DecodeError = load(candidate)
+        except ImportError:
+            if name is not None:
+                raise
+
+            continue
+
+        return backend
+
+def load(name: str) -> tuple:
+    # Frames are sent as text, so encoders
+    # that return bytes are decoded back
+    if name == 'orjson':
+        import orjson
+
+        return (
+            name, orjson.loads,
+            lambda obj: orjson.dumps(obj).decode(),
+            orjson.JSONDecodeError
+        )
+
+    if name == 'msgspec':
+        import msgspec
+
+        decoder = msgspec.json.Decoder()
+        encoder = msgspec.json.Encoder()
+
+        return (
+            name, decoder.decode,
+            lambda obj: encoder.encode(obj).decode(),
+            msgspec.DecodeError
+        )
+
+    if name == 'json':
+        return (
+            name, json.loads, json.dumps,
+            json.JSONDecodeError
+        )
+
+    raise ValueError(f'Unknown JSON library: {name}')
+
+use()
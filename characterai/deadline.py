@@ -0,0 +1,72 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import time
+
+from .errors import DeadlineError
+
+current = ContextVar('deadline', default=None)
+
+@contextmanager
+def deadline(seconds: float = None):
+    """Time limit for everything called inside the block
+
+    Requests and chat2 commands that don't finish in time
+    raise :obj:`~characterai.errors.DeadlineError`.
+    Nested limits can only make the time shorter
+
+    EXAMPLE::
+
+        with deadline(10):
+            char = await client.get_char('CHAR')
+            answer = await chat.send_message('CHAR', 'CHAT_ID', 'TEXT')
+
+    Args:
+        seconds (``float``, *optional*):
+            Seconds from now, ``None`` adds no limit
+    """
+    if seconds is None:
+        yield
+        return
+
+    token = current.set(until(seconds))
+
+    try:
+        yield
+    finally:
+        current.reset(token)
+
+def until(timeout: float = None) -> float:
+    """The moment when a call must end: the nearest
+    of the current deadline and ``timeout`` from now"""
+    at = current.get()
+
+    if timeout is not None:
+        end = time.monotonic() + timeout
+        at = end if at is None else min(at, end)
+
+    return at
+
+def remaining(at: float = None) -> float:
+    """Seconds left until ``at`` or the current deadline
+
+    Returns ``None`` if there is no deadline and raises
+    :obj:`~characterai.errors.DeadlineError` if it has passed
+    """
+    if at is None:
+        at = current.get()
+
+        if at is None:
+            return None
+
+    left = at - time.monotonic()
+
+    if left <= 0:
+        raise DeadlineError('Deadline exceeded')
+
+    return left
+
+def expired(after: float = 0) -> bool:
+    """Whether the current deadline passes in ``after`` seconds"""
+    at = current.get()
+
+    return at is not None and at <= time.monotonic() + after
@@ -2,6 +2,19 @@ class CAIError(Exception):
     ...
 
 class ServerError(CAIError):
+    def __init__(
+        self, *args, status: int = None,
+        retry_after: float = None
+    ):
+        super().__init__(*args)
+
+        self.status = status
+        self.retry_after = retry_after
+
+class ConnectionLostError(ServerError, ConnectionError):
+    ...
+
+class DeadlineError(CAIError, TimeoutError):
     ...
 
 class AuthError(CAIError):
@@ -0,0 +1,226 @@
+import gzip
+import lzma
+import os
+
+from . import codec, models
+from .types import chat2
+
+# First bytes of the compressed files
+MAGIC = {
+    b'\x1f\x8b': 'gzip',
+    b'\xfd7zXZ\x00': 'lzma'
+}
+
+SUFFIXES = {
+    '.gz': 'gzip',
+    '.xz': 'lzma',
+    '.lzma': 'lzma'
+}
+
+class Export:
+    """JSON Lines file with chat2 histories
+
+    Each line is ``{"chat": ...}`` or ``{"turn": ...}``
+    as they came from the server. The turns of a chat follow
+    its line, from the newest one. Data is written as soon as
+    it comes, so only one page is kept in memory
+
+    The progress is saved to ``path + '.checkpoint'``.
+    The export that is started again with the same file
+    continues from the last saved page. The checkpoint
+    is removed when the export is finished
+
+    Compressed data is closed before each save, so after
+    a stop the file can be cut to the saved size
+    and continued. The file is several gzip or xz
+    streams, which is read as one by any of their tools
+
+    Used by ``export_histories`` of aiocai and pycai
+
+    Args:
+        path (``str``):
+            File to write
+
+        compression (``str``, *optional*):
+            ``gzip``, ``lzma`` or ``none``,
+            by default it is chosen by the file suffix
+    """
+    def __init__(self, path: str, compression: str = None):
+        if compression is None:
+            compression = SUFFIXES.get(
+                os.path.splitext(path)[1], 'none'
+            )
+
+        if compression not in ('gzip', 'lzma', 'none'):
+            raise ValueError(f'Unknown compression: {compression}')
+
+        self.path = path
+        self.checkpoint = path + '.checkpoint'
+        self.compression = compression
+
+        self.state = {
+            'size': 0, 'done': [], 'chat_id': None,
+            'next_token': None, 'turns': 0
+        }
+
+        if os.path.exists(self.checkpoint) and os.path.exists(path):
+            with open(self.checkpoint, 'rb') as file:
+                self.state = codec.loads(file.read())
+
+        self.done = set(self.state['done'])
+
+        self.file = open(path, 'r+b' if self.state['size'] else 'wb')
+        # Everything after the last save is incomplete
+        self.file.truncate(self.state['size'])
+        self.file.seek(self.state['size'])
+
+        self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @property
+    def turns(self) -> int:
+        """Number of written turns"""
+        return self.state['turns']
+
+    def resume(self, chat_id: str) -> tuple:
+        """Where to start the chat
+
+        Returns:
+            ``(started, next_token)``, ``started`` is ``None``
+            if the chat is already written
+        """
+        if chat_id in self.done:
+            return None, None
+
+        if chat_id == self.state['chat_id']:
+            return True, self.state['next_token']
+
+        return False, None
+
+    def add_chat(self, chat: dict):
+        self._write({'chat': chat})
+
+    def add_turns(self, turns: list):
+        for turn in turns:
+            self._write({'turn': turn})
+
+        self.state['turns'] += len(turns)
+
+    def save(self, chat_id: str, next_token: str = None):
+        """Remember that the chat is written up to ``next_token``,
+        ``None`` means that the whole chat is written"""
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        self.file.flush()
+
+        if next_token is None:
+            self.done.add(chat_id)
+            self.state['done'].append(chat_id)
+            chat_id = None
+
+        self.state.update(
+            size=self.file.tell(), chat_id=chat_id,
+            next_token=next_token
+        )
+
+        # A stop while writing keeps the previous checkpoint
+        temp = self.checkpoint + '.tmp'
+
+        with open(temp, 'w') as file:
+            file.write(codec.dumps(self.state))
+
+        os.replace(temp, self.checkpoint)
+
+    def finish(self):
+        """Close the file and remove the checkpoint"""
+        self.close()
+
+        if os.path.exists(self.checkpoint):
+            os.remove(self.checkpoint)
+
+    def close(self):
+        if self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+        self.file.close()
+
+    def _write(self, line: dict):
+        if self.stream is None:
+            self.stream = self._open()
+
+        self.stream.write(codec.dumps(line).encode() + b'\n')
+
+    def _open(self):
+        if self.compression == 'gzip':
+            return gzip.GzipFile(fileobj=self.file, mode='wb')
+
+        if self.compression == 'lzma':
+            return lzma.LZMAFile(self.file, 'wb')
+
+        return Plain(self.file)
+
+class Plain:
+    def __init__(self, file):
+        self.write = file.write
+
+    def close(self):
+        ...
+
+def read(path: str, *, compact: bool = False):
+    """Go through an export file
+
+    EXAMPLE::
+
+        for item in export.read('histories.jsonl.gz'):
+            if isinstance(item, chat2.ChatData):
+                print(item.chat_id)
+            else:
+                print(item.candidates[0].raw_content)
+
+    Args:
+        path (``str``):
+            File written by ``export_histories``
+
+        compact (``bool``, *optional*):
+            Return turns as
+            :obj:`~characterai.types.chat2.CompactTurn`
+
+    Returns:
+        :obj:`~characterai.types.chat2.ChatData`
+        and :obj:`~characterai.types.chat2.TurnData`
+        in the order of the file
+    """
+    with open(path, 'rb') as file:
+        head = file.read(6)
+
+    compression = next((
+        name for magic, name in MAGIC.items()
+        if head.startswith(magic)
+    ), None)
+
+    if compression == 'gzip':
+        file = gzip.open(path, 'rb')
+    elif compression == 'lzma':
+        file = lzma.open(path, 'rb')
+    else:
+        file = open(path, 'rb')
+
+    with file:
+        for line in file:
+            line = codec.loads(line)
+
+            if 'turn' in line:
+                if compact:
+                    yield chat2.CompactTurn.from_dict(line['turn'])
+                else:
+                    yield models.parse(chat2.TurnData, line['turn'])
+            else:
+                yield models.parse(chat2.ChatData, line['chat'])
@@ -0,0 +1,91 @@
+from collections import deque
+
+class Hedge:
+    """Second copies of slow reading requests
+
+    If a reading request has not been answered for longer than
+    most requests take (``percentile`` of the recent latencies),
+    the same request is sent once more. The first answer is used
+    and the other request is cancelled. ``budget`` limits how
+    many extra requests can be sent
+
+    EXAMPLE::
+
+        client = aiocai.Client('TOKEN', hedge=Hedge(
+            percentile=0.9, budget=0.1
+        ))
+
+        ...
+
+        print(client.hedge.hedged, client.hedge.won)
+
+    Args:
+        percentile (``float``, *optional*):
+            Which part of requests is answered before
+            the copy is sent, from ``0`` to ``1``
+
+        budget (``float``, *optional*):
+            Extra requests per request, ``0.05`` is
+            at most one copy for 20 requests
+
+        initial (``float``, *optional*):
+            Delay in seconds until enough latencies are known
+
+        minimum (``float``, *optional*):
+            The copy is never sent earlier
+
+        window (``int``, *optional*):
+            How many last latencies the delay is based on
+
+    Parameters:
+        requests (``int``):
+            Requests that could be hedged
+
+        hedged (``int``):
+            Copies that were sent
+
+        won (``int``):
+            Copies that were answered first
+    """
+    def __init__(
+        self, percentile: float = 0.95,
+        budget: float = 0.05, initial: float = 1,
+        minimum: float = 0.02, window: int = 200
+    ):
+        self.percentile = percentile
+        self.budget = budget
+        self.initial = initial
+        self.minimum = minimum
+        self.latencies = deque(maxlen=window)
+        self.credit = 0.0
+
+        self.requests = 0
+        self.hedged = 0
+        self.won = 0
+
+    def delay(self) -> float:
+        """Seconds after which the copy is sent"""
+        self.requests += 1
+        self.credit = min(self.credit + self.budget, 10)
+
+        if len(self.latencies) < 20:
+            return self.initial
+
+        latencies = sorted(self.latencies)
+
+        return max(self.minimum, latencies[
+            int((len(latencies) - 1) * self.percentile)
+        ])
+
+    def allow(self) -> bool:
+        """Take a place in the budget for a copy"""
+        if self.credit < 1:
+            return False
+
+        self.credit -= 1
+        self.hedged += 1
+
+        return True
+
+    def record(self, latency: float):
+        self.latencies.append(latency)
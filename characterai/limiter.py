@@ -0,0 +1,331 @@
+from collections import deque
+import threading
+import asyncio
+import time
+
+class TokenBucket:
+    """``rate`` requests per second with bursts of up to ``burst``"""
+    def __init__(self, rate: float, burst: int = 1):
+        self.interval = 1 / rate
+        self.tolerance = (max(burst, 1) - 1) * self.interval
+        self.next = 0
+
+    def wait(self, now: float) -> float:
+        """Seconds until a token is free, nothing is taken"""
+        return max(0, max(self.next, now) - self.tolerance - now)
+
+    def reserve(self, now: float) -> float:
+        # The bucket is kept as the moment when it will be
+        # full again, so taking a token is just moving it
+        start = max(self.next, now)
+        self.next = start + self.interval
+
+        return max(0, start - self.tolerance - now)
+
+class RateLimiter:
+    """Limits how often requests are sent
+
+    Each token and each host (``plus`` and ``neo``) has its own
+    bucket, a request waits until both of them allow it. Waiting
+    requests are not failed, they are just sent later
+
+    The server limits are not published, the defaults are
+    conservative guesses. One limiter can be shared by
+    several clients, then the host limits are common
+
+    EXAMPLE::
+
+        client = aiocai.Client('TOKEN', limiter=RateLimiter(
+            rate=2, burst=5, hosts={'neo': (10, 10)}
+        ))
+
+        ...
+
+        print(client.limiter.delayed, client.limiter.waited)
+
+    Args:
+        rate (``float``, *optional*):
+            Requests per second for one token
+
+        burst (``int``, *optional*):
+            How many requests of one token can
+            be sent at once after a pause
+
+        hosts (``dict``, *optional*):
+            ``(rate, burst)`` for ``plus`` and ``neo``,
+            merged with the defaults
+
+    Parameters:
+        requests (``int``):
+            Requests that went through the limiter
+
+        delayed (``int``):
+            Requests that had to wait
+
+        waited (``float``):
+            Total seconds requests waited
+
+        max_wait (``float``):
+            Longest wait in seconds
+    """
+    def __init__(
+        self, rate: float = 5, burst: int = 10,
+        hosts: dict = {}
+    ):
+        self.rate = rate
+        self.burst = burst
+        self.lock = threading.Lock()
+        self.tokens = {}
+        self.hosts = {
+            host: TokenBucket(*limit)
+            for host, limit in {
+                'plus': (20, 20), 'neo': (20, 20), **hosts
+            }.items()
+        }
+
+        self.requests = 0
+        self.delayed = 0
+        self.waited = 0.0
+        self.max_wait = 0.0
+
+    def reserve(
+        self, token: str, host: str, at: float = None
+    ) -> float:
+        """Take a place for the request
+
+        Args:
+            at (``float``, *optional*):
+                Deadline of the request (``time.monotonic()``)
+
+        Returns:
+            Seconds to wait before sending it or ``None``
+            if it can't be sent before ``at``
+        """
+        with self.lock:
+            now = time.monotonic()
+            bucket = self.tokens.get(token)
+
+            if bucket is None:
+                bucket = self.tokens[token] = TokenBucket(
+                    self.rate, self.burst
+                )
+
+            buckets = [bucket]
+
+            if host in self.hosts:
+                buckets.append(self.hosts[host])
+
+            delay = max(b.wait(now) for b in buckets)
+
+            # A request that is rejected takes no tokens,
+            # so the requests after it aren't delayed
+            if at is not None and at <= now + delay:
+                return None
+
+            for b in buckets:
+                b.reserve(now)
+
+            self.requests += 1
+
+            if delay > 0:
+                self.delayed += 1
+                self.waited += delay
+                self.max_wait = max(self.max_wait, delay)
+
+            return delay
+
+class AdaptiveLimit:
+    """Limits how many requests are sent at the same time
+
+    The limit is found while working: it grows by one after
+    each full round of requests while their latency stays
+    flat, and is cut in half when the server throttles
+    (429, 503), requests time out or the slowest requests
+    (p95) become much slower than usual
+
+    EXAMPLE::
+
+        client = aiocai.Client('TOKEN', concurrency=AdaptiveLimit(
+            initial=4, maximum=64
+        ))
+
+        ...
+
+        print(client.concurrency.limit, client.concurrency.p95)
+
+    Args:
+        initial (``int``, *optional*):
+            Limit at the start
+
+        minimum (``int``, *optional*):
+            The limit is never lower
+
+        maximum (``int``, *optional*):
+            The limit is never higher
+
+        decrease (``float``, *optional*):
+            What the limit is multiplied by when cut
+
+        tolerance (``float``, *optional*):
+            How many times p95 may be longer than the usual
+            latency before the limit is cut
+
+        window (``int``, *optional*):
+            How many latencies p95 is measured over
+
+    Parameters:
+        limit (``int``):
+            Current limit
+
+        inflight (``int``):
+            Requests being sent right now
+
+        p95 (``float``):
+            p95 latency of the last window in seconds
+
+        throttled (``int``):
+            How many times the limit was cut
+    """
+    def __init__(
+        self, initial: int = 8, minimum: int = 1,
+        maximum: int = 256, decrease: float = 0.5,
+        tolerance: float = 2, window: int = 50
+    ):
+        self.current = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease = decrease
+        self.tolerance = tolerance
+        self.window = window
+
+        self.cond = threading.Condition()
+        self.waiters = deque()
+        self.latencies = []
+        self.baseline = None
+        self.cut = 0
+
+        self.inflight = 0
+        self.p95 = None
+        self.throttled = 0
+
+    @property
+    def limit(self) -> int:
+        return int(self.current)
+
+    def acquire(self, timeout: float = None) -> bool:
+        """Wait for a free place, blocking the thread
+
+        Returns:
+            ``False`` if no place was free in ``timeout`` seconds
+        """
+        with self.cond:
+            if not self.cond.wait_for(
+                lambda: not self.waiters
+                and self.inflight < self.limit, timeout
+            ):
+                return False
+
+            self.inflight += 1
+
+            return True
+
+    async def wait(self):
+        """Wait for a free place in the event loop"""
+        with self.cond:
+            if not self.waiters and self.inflight < self.limit:
+                self.inflight += 1
+                return
+
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self.waiters.append((loop, future))
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            with self.cond:
+                try:
+                    self.waiters.remove((loop, future))
+                except ValueError:
+                    # The place was already given to us
+                    self.inflight -= 1
+                    self._wake()
+
+            raise
+
+    def release(
+        self, start: float = None, kind: str = None
+    ):
+        """Free the place and adjust the limit
+
+        Args:
+            start (``float``, *optional*):
+                :py:func:`time.monotonic` when the request
+                was sent, ``None`` if it shouldn't be counted
+
+            kind (``str``, *optional*):
+                Kind of the failure from
+                :obj:`~characterai.retry.classify`
+        """
+        with self.cond:
+            self.inflight -= 1
+
+            # Requests that were sent before the last
+            # cut say nothing about the new limit
+            if start is not None and start >= self.cut:
+                if kind in ('throttled', 'timeout'):
+                    self._cut()
+                elif kind is None:
+                    self._sample(time.monotonic() - start)
+
+            self._wake()
+
+    def _sample(self, latency: float):
+        self.latencies.append(latency)
+
+        # Grows by about one per round of requests,
+        # only if the limit is actually reached
+        if self.inflight + 1 >= self.limit:
+            self.current = min(
+                self.maximum, self.current + 1 / self.current
+            )
+
+        if len(self.latencies) < self.window:
+            return
+
+        latencies = sorted(self.latencies)
+        self.latencies.clear()
+
+        median = latencies[len(latencies) // 2]
+        self.p95 = latencies[int((len(latencies) - 1) * 0.95)]
+
+        # The usual latency follows the best medians,
+        # but slowly moves up if the network got slower
+        if self.baseline is None or median < self.baseline:
+            self.baseline = median
+        else:
+            self.baseline += (median - self.baseline) * 0.05
+
+        if self.p95 > self.baseline * self.tolerance:
+            self._cut()
+
+    def _cut(self):
+        self.cut = time.monotonic()
+        self.throttled += 1
+        self.latencies.clear()
+        self.current = max(
+            self.minimum, self.current * self.decrease
+        )
+
+    def _wake(self):
+        while self.waiters and self.inflight < self.limit:
+            loop, future = self.waiters.popleft()
+            self.inflight += 1
+
+            loop.call_soon_threadsafe(give, future)
+
+        self.cond.notify_all()
+
+def give(future):
+    if not future.done():
+        future.set_result(None)
@@ -0,0 +1,106 @@
+from collections import OrderedDict
+import threading
+
+from .types import chat2
+
+class Mirror:
+    """Last messages of chats, kept from chat2 WebSocket frames
+
+    Every turn that arrives over the connection (sent, generated,
+    regenerated or edited messages) replaces the saved one with
+    the same ID, deleted messages are removed. The current state
+    of the chat is known without requesting the history
+
+    EXAMPLE::
+
+        async with await client.connect(mirror=True) as chat:
+            await chat.send_message('CHAR', 'CHAT_ID', 'TEXT')
+
+            for turn in chat.turns('CHAT_ID'):
+                print(turn.author.name, turn.candidates[0].raw_content)
+
+    Args:
+        size (``int``, *optional*):
+            How many last messages of each chat are kept
+
+        chats (``int``, *optional*):
+            How many chats are kept,
+            the least recently updated ones are removed first
+    """
+    def __init__(
+        self, size: int = 100, chats: int = 1000
+    ):
+        self.size = size
+        self.limit = chats
+        self.chats = OrderedDict()
+        self.lock = threading.Lock()
+
+    def update(self, frame: dict):
+        """Save the turn from a server frame, if it has one"""
+        turn = frame.get('turn')
+
+        if not isinstance(turn, dict):
+            return
+
+        try:
+            key = turn['turn_key']
+            chat_id, turn_id = key['chat_id'], key['turn_id']
+        except (KeyError, TypeError):
+            return
+
+        with self.lock:
+            turns = self.chats.get(chat_id)
+
+            if turns is None:
+                turns = self.chats[chat_id] = OrderedDict()
+
+            self.chats.move_to_end(chat_id)
+
+            # Chunks of an answer and edits keep
+            # the place of the message in the chat
+            turns[turn_id] = turn
+
+            while len(turns) > self.size:
+                turns.popitem(last=False)
+
+            while len(self.chats) > self.limit:
+                self.chats.popitem(last=False)
+
+    def remove(self, chat_id: str, ids: list):
+        """Remove deleted messages"""
+        with self.lock:
+            turns = self.chats.get(chat_id, {})
+
+            for turn_id in ids:
+                turns.pop(turn_id, None)
+
+    def turns(self, chat_id: str) -> list:
+        """Saved messages of the chat, from the oldest one
+
+        Returns:
+            List of :obj:`~characterai.types.chat2.TurnData`
+        """
+        with self.lock:
+            turns = list(self.chats.get(chat_id, {}).values())
+
+        return [
+            chat2.TurnData.model_validate(turn)
+            for turn in turns
+        ]
+
+    def last_turn(self, chat_id: str) -> chat2.TurnData:
+        """The newest saved message of the chat
+
+        Returns:
+            :obj:`~characterai.types.chat2.TurnData`,
+            ``None`` if nothing is saved
+        """
+        with self.lock:
+            turns = self.chats.get(chat_id)
+
+            if not turns:
+                return None
+
+            turn = next(reversed(turns.values()))
+
+        return chat2.TurnData.model_validate(turn)
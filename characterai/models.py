@@ -0,0 +1,340 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+import typing
+
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import ValidationError
+
+MODES = ('validate', 'construct', 'lazy', 'raw')
+
+current = ContextVar('models', default=None)
+
+@contextmanager
+def mode(name: str):
+    """What methods called inside the block return
+
+    ``validate`` checks answers and returns models,
+    ``construct`` builds models without any checks,
+    ``lazy`` checks each field on first access and
+    ``raw`` returns the decoded JSON as it is
+
+    ``raw`` is several times cheaper for large answers.
+    ``lazy`` costs only the fields that are read, for
+    example the name of a character with a long definition.
+    ``construct`` is not faster than ``validate`` (pydantic
+    checks in compiled code), it is for answers that
+    don't pass the checks, for example after the API changed
+
+    EXAMPLE::
+
+        with models.mode('raw'):
+            history = await client.get_history('CHAT_ID')
+
+        history['turns'][0]['candidates'][0]['raw_content']
+
+    Args:
+        name (``str``):
+            ``validate``, ``construct``, ``lazy`` or ``raw``
+    """
+    if name not in MODES:
+        raise ValueError(f'Unknown mode: {name}')
+
+    token = current.set(name)
+
+    try:
+        yield
+    finally:
+        current.reset(token)
+
+def parse(
+    cls, data, mode: str = 'validate',
+    many: bool = False
+):
+    """Turn decoded JSON into ``cls`` according to the mode
+
+    The mode of the current :obj:`mode` block
+    takes precedence over ``mode``
+    """
+    mode = current.get() or mode
+
+    if mode == 'raw':
+        return data
+
+    if mode == 'construct':
+        if many:
+            return [construct(cls, a) for a in data]
+
+        return construct(cls, data)
+
+    if mode == 'lazy':
+        if many:
+            return [lazy(cls, a) for a in data]
+
+        return lazy(cls, data)
+
+    if many:
+        return adapter(cls).validate_python(data)
+
+    return cls.model_validate(data)
+
+adapters = {}
+
+def adapter(cls) -> TypeAdapter:
+    """Validator of ``List[cls]``, made once for each model
+
+    A whole list is checked in one call instead
+    of creating the models one by one
+    """
+    validator = adapters.get(cls)
+
+    if validator is None:
+        validator = adapters[cls] = TypeAdapter(typing.List[cls])
+
+    return validator
+
+class Remap:
+    """Moves values from nested JSON to the fields of a flat model
+
+    The paths are known in advance, so only the needed
+    values are taken instead of flattening the whole answer.
+    Empty strings become ``None``, missing values are skipped
+
+    EXAMPLE::
+
+        PROFILE = Remap(
+            username='user.user.username',
+            bio='user.bio'
+        )
+
+        account.Profile.model_validate(PROFILE(data))
+
+    Args:
+        **paths (``str``):
+            Field name and the dotted path to its value
+    """
+    def __init__(self, **paths: str):
+        # Fields with the same parent are taken
+        # together, so each level is looked up once
+        tree = {}
+
+        for field, path in paths.items():
+            *parents, key = path.split('.')
+            tree.setdefault(tuple(parents), []).append((field, key))
+
+        self.groups = tuple(
+            (parents, tuple(fields))
+            for parents, fields in tree.items()
+        )
+
+    def __call__(self, data: dict) -> dict:
+        result = {}
+
+        for parents, fields in self.groups:
+            node = data
+
+            try:
+                for parent in parents:
+                    node = node[parent]
+            except (KeyError, TypeError):
+                continue
+
+            if not isinstance(node, dict):
+                continue
+
+            for field, key in fields:
+                if key in node:
+                    value = node[key]
+                    result[field] = None if value == '' else value
+
+        return result
+
+def construct(cls, data: dict):
+    """Build the model and the nested ones without checks
+
+    Values are kept as they came, for example
+    dates stay strings. Missing fields are not set
+    """
+    fields = nested(cls)
+
+    if fields:
+        data = dict(data)
+
+        for key, model, many in fields:
+            value = data.get(key)
+
+            if value is None:
+                continue
+
+            data[key] = [
+                construct(model, v) for v in value
+            ] if many else construct(model, value)
+
+    return cls.model_construct(**data)
+
+plans = {}
+
+def nested(cls) -> tuple:
+    """Fields of ``cls`` that hold other models
+
+    Returns:
+        ``(key, model, many)`` for each of them,
+        ``key`` is the name in the JSON
+    """
+    plan = plans.get(cls)
+
+    if plan is not None:
+        return plan
+
+    plan = []
+
+    for name, field in cls.model_fields.items():
+        annotation = field.annotation
+        many = False
+
+        # Optional[List[Model]] -> Model
+        while True:
+            origin = typing.get_origin(annotation)
+            args = [
+                a for a in typing.get_args(annotation)
+                if a is not type(None)
+            ]
+
+            if origin is typing.Union and len(args) == 1:
+                annotation = args[0]
+            elif origin is list and len(args) == 1:
+                annotation = args[0]
+                many = True
+            else:
+                break
+
+        if isinstance(annotation, type) \
+        and issubclass(annotation, BaseModel):
+            alias = field.validation_alias
+
+            plan.append((
+                alias if isinstance(alias, str) else name,
+                annotation, many
+            ))
+
+    plan = plans[cls] = tuple(plan)
+
+    return plan
+
+class Lazy:
+    """Base of lazy models, see :obj:`lazy`"""
+    def __getattr__(self, name: str):
+        field = type(self).model_fields.get(name)
+
+        if field is None:
+            return super().__getattr__(name)
+
+        data = self.__pydantic_private__['data']
+        alias = field.validation_alias
+        key = alias if isinstance(alias, str) else name
+
+        if key in data:
+            # Checks only this field and saves it in __dict__
+            self.__pydantic_validator__.validate_assignment(
+                self, name, data[key]
+            )
+        elif field.is_required():
+            raise ValidationError.from_exception_data(
+                type(self).__name__, [{
+                    'type': 'missing', 'loc': (key,), 'input': data
+                }]
+            )
+        else:
+            self.__dict__[name] = field.get_default(
+                call_default_factory=True
+            )
+
+        return self.__dict__[name]
+
+    def _load(self):
+        fields = type(self).model_fields
+
+        if len(self.__dict__) < len(fields):
+            for name in fields:
+                getattr(self, name)
+
+            # In the order of the fields, like a usual model
+            object.__setattr__(self, '__dict__', {
+                name: self.__dict__[name] for name in fields
+            })
+
+        return self
+
+    # Everything that reads __dict__ directly
+    # needs all the fields first
+
+    def model_dump(self, **kwargs) -> dict:
+        return super(Lazy, self._load()).model_dump(**kwargs)
+
+    def model_dump_json(self, **kwargs) -> str:
+        return super(Lazy, self._load()).model_dump_json(**kwargs)
+
+    def __repr_args__(self):
+        return super(Lazy, self._load()).__repr_args__()
+
+    def __iter__(self):
+        return super(Lazy, self._load()).__iter__()
+
+    def __reduce__(self):
+        # The class is made at runtime and can't be
+        # pickled, so it becomes a usual model
+        state = super(Lazy, self._load()).__getstate__()
+        state['__pydantic_private__'] = None
+
+        return unpickle, (origin(self), state)
+
+    def __eq__(self, other):
+        if not isinstance(other, BaseModel):
+            return NotImplemented
+
+        if isinstance(other, Lazy):
+            other._load()
+
+        return origin(self) is origin(other) \
+            and self._load().__dict__ == other.__dict__
+
+def origin(model: BaseModel) -> type:
+    return getattr(type(model), '__lazy_model__', type(model))
+
+def unpickle(cls, state: dict) -> BaseModel:
+    model = cls.__new__(cls)
+    model.__setstate__(state)
+
+    return model
+
+lazies = {}
+
+def lazy(cls, data: dict):
+    """Model that keeps the decoded JSON and checks each field
+    when it is read for the first time
+
+    The result is an instance of ``cls``, properties
+    and methods work as usual. A missing or wrong
+    field raises ``ValidationError`` when it is read
+    """
+    if not isinstance(data, dict):
+        return cls.model_validate(data)
+
+    kind = lazies.get(cls)
+
+    if kind is None:
+        kind = lazies[cls] = type(cls.__name__, (Lazy, cls), {
+            '__module__': cls.__module__,
+            '__qualname__': cls.__qualname__,
+            '__doc__': cls.__doc__,
+            '__lazy_model__': cls
+        })
+
+    model = kind.__new__(kind)
+    init = object.__setattr__
+
+    init(model, '__dict__', {})
+    init(model, '__pydantic_fields_set__', set())
+    init(model, '__pydantic_extra__', None)
+    init(model, '__pydantic_private__', {'data': data})
+
+    return model
@@ -1,8 +1,43 @@
 from ...types import account, character
-from .utils import flatten, caimethod, validate
+from ...models import Remap
+from .utils import caimethod
 
 import uuid
 
+# Where the fields of the account are in ``chat/user/``
+PROFILE = Remap(
+    name='user.name',
+    avatar_type='user.user.account.avatar_type',
+    onboarding_complete='user.user.account.onboarding_complete',
+    avatar_file_name='user.user.account.avatar_file_name',
+    mobile_onboarding_complete='user.user.account.mobile_onboarding_complete',
+    bio='user.bio',
+    username='user.user.username',
+    id='user.user.id',
+    first_name='user.user.first_name',
+    is_staff='user.user.is_staff',
+    subscription='user.user.subscription',
+    is_human='user.is_human',
+    email='user.email',
+    needs_to_acknowledge_policy='user.needs_to_acknowledge_policy',
+    suspended_until='user.suspended_until',
+    hidden_characters='user.hidden_characters',
+    blocked_users='user.blocked_users'
+)
+
+GUEST = Remap(
+    username='user.user.username',
+    id='user.user.id',
+    account='user.user.account',
+    is_staff='user.user.is_staff',
+    subscription='user.user.subscription',
+    is_human='user.is_human',
+    name='user.name',
+    email='user.email',
+    hidden_characters='user.hidden_characters',
+    blocked_users='user.blocked_users'
+)
+
 class Account:
     @caimethod
     def get_me(self, *, token: str = None):
@@ -24,12 +59,12 @@ class Account:
         if name == 'ANONYMOUS':
             return account.Anonymous()
         elif name.startswith('Guest'):
-            return account.Guest.model_validate(
-                flatten(data)
+            return self._parse(
+                account.Guest, GUEST(data)
             )
 
-        return account.Profile.model_validate(
-            flatten(data)
+        return self._parse(
+            account.Profile, PROFILE(data)
         )
 
     @caimethod
@@ -105,7 +140,7 @@ class Account:
             token=token
         )
 
-        return validate(
+        return self._parse_list(
             account.PersonaShort,
             data['personas']
         )
@@ -157,8 +192,8 @@ class Account:
             }
         )
         
-        return account.Persona.model_validate(
-            data['persona']
+        return self._parse(
+            account.Persona, data['persona']
         )
 
     @caimethod
@@ -183,8 +218,8 @@ class Account:
             token=token
         )
 
-        return account.Persona.model_validate(
-            data['persona']
+        return self._parse(
+            account.Persona, data['persona']
         )
     
     @caimethod
@@ -217,8 +252,8 @@ class Account:
             }
         )
 
-        return account.Persona.model_validate(
-            data['persona']
+        return self._parse(
+            account.Persona, data['persona']
         )
 
 
@@ -276,7 +311,7 @@ class Account:
             token=token
         )
 
-        return validate(
+        return self._parse_list(
             character.CharShort,
             data['characters']
         )
@@ -1,4 +1,4 @@
-from .utils import caimethod, validate
+from .utils import caimethod
 from ...types import character
 
 import uuid
@@ -26,8 +26,8 @@ class Characters:
             data={'external_id': external_id}
         )
 
-        return character.Character.model_validate(
-            data['character']
+        return self._parse(
+            character.Character, data['character']
         )
 
     @caimethod
@@ -46,7 +46,7 @@ class Characters:
             token=token
         )
 
-        return validate(
+        return self._parse_list(
             character.CharShort,
             data['characters']
         )
@@ -76,12 +76,12 @@ class Characters:
         categories = data['characters_by_curated_category']
 
         if name != 'All':
-            return character.CharShort.model_validate(
-                categories[name]
+            return self._parse(
+                character.CharShort, categories[name]
             )
 
-        return character.Categories.model_validate(
-            categories
+        return self._parse(
+            character.Categories, categories
         )
 
     @caimethod
@@ -101,7 +101,7 @@ class Characters:
             'chat/characters/trending/'
         )
         
-        return validate(
+        return self._parse_list(
             character.CharShort,
             data['trending_characters']
         )
@@ -124,7 +124,7 @@ class Characters:
             token=token, neo=True
         )
 
-        return validate(
+        return self._parse_list(
             character.CharShort,
             data['characters']
         )
@@ -201,8 +201,8 @@ class Characters:
             }
         )
  
-        return character.Character.model_validate(
-            data['character']
+        return self._parse(
+            character.Character, data['character']
         )
 
     @caimethod
@@ -281,6 +281,10 @@ class Characters:
         Returns:
             :obj:`~characterai.types.character.Character`
         """
+        # The current info must not come from the cache
+        if self.cache is not None:
+            self.cache.invalidate('chat/character/info/')
+
         info = self.request(
             'chat/character/info/', token=token,
             data={'external_id': char}
@@ -309,6 +313,9 @@ class Characters:
             }
         )
 
-        return character.Character.model_validate(
-            data['character']
+        if self.cache is not None:
+            self.cache.invalidate('chat/character/info/')
+
+        return self._parse(
+            character.Character, data['character']
         )
\ No newline at end of file
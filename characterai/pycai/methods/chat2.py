@@ -1,12 +1,40 @@
-import json
 from websockets import exceptions
 from websockets.sync import client as websockets
+from contextlib import contextmanager
+import threading
+import time
 import uuid
-
-from .utils import Request, caimethod, validate
-from ...errors import ServerError
+from urllib.parse import quote
+
+from .utils import Request, caimethod
+from ... import codec
+from ...backoff import Backoff
+from ...mirror import Mirror
+from ...retry import RetryPolicy
+from ...deadline import deadline, until, remaining
+from ...errors import (
+    ServerError, ConnectionLostError, DeadlineError
+)
+from ...export import Export
 from ...types import chat2
 
+URL = 'wss://neo.character.ai/ws/'
+
+# Commands that can be safely sent again
+# if the connection was lost before the answer
+IDEMPOTENT = {'remove_turns', 'edit_turn_candidate'}
+
+# Commands answered with a single frame
+ANSWERS = {'remove_turns', 'edit_turn_candidate'}
+
+# Commands the server generates an answer for,
+# it is asked to stop if nobody waits anymore
+GENERATIONS = {'create_and_generate_turn', 'generate_turn_candidate'}
+
+# Seconds the frames of an abandoned command
+# are still expected and skipped
+ORPHANS = 30
+
 class ChatV2(Request):
     def __init__(
         self, session = None,
@@ -43,7 +71,7 @@ class ChatV2(Request):
             token=token, neo=True
         )
 
-        return validate(
+        return self._parse_list(
             chat2.ChatData,
             data['chats']
         )
@@ -66,13 +94,203 @@ class ChatV2(Request):
         Returns:
             :obj:`~characterai.types.chat2.History`
         """
-        return chat2.History.model_validate(
-            self.request(
+        return self._parse(
+            chat2.History, self.request(
                 f'turns/{chat_id}/',
                 token=token, neo=True
             )
         )
 
+    @caimethod
+    def iter_history(
+        self, chat_id: str, *,
+        until = None, token: str = None,
+        compact: bool = False
+    ):
+        """Go through the whole chat history, from the newest message
+
+        Pages are requested one by one using ``meta.next_token``,
+        the next page only when the current one is finished
+
+        EXAMPLE::
+
+            for turn in client.iter_history('CHAT_ID'):
+                print(turn.candidates[0].raw_content)
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            until (``Callable``, *optional*):
+                Function that receives a message and
+                returns ``True`` to stop before it
+
+            compact (``bool``, *optional*):
+                Return :obj:`~characterai.types.chat2.CompactTurn`,
+                several times smaller in memory, for keeping
+                long histories. Ignores the models mode
+
+        Returns:
+            :obj:`~characterai.types.chat2.TurnData`
+            or :obj:`~characterai.types.chat2.CompactTurn`
+        """
+        for page in self._pages(chat_id, token):
+            if compact:
+                turns = map(
+                    chat2.CompactTurn.from_dict, page['turns']
+                )
+            else:
+                turns = self._parse_list(
+                    chat2.TurnData, page['turns']
+                )
+
+            for turn in turns:
+                if until is not None and until(turn):
+                    return
+
+                yield turn
+
+    @caimethod
+    def sync_history(
+        self, chat_id: str, store, *,
+        full: bool = False, token: str = None
+    ) -> int:
+        """Save new messages of the chat to a local store
+
+        Pages are requested from the newest message and
+        the sync stops at the first page with a message
+        that was already saved
+
+        EXAMPLE::
+
+            store = Store('history.db')
+
+            chat.sync_history('CHAT_ID', store)
+            turns = store.turns('CHAT_ID')
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            store (:obj:`~characterai.store.Store`):
+                Where to save messages
+
+            full (``bool``, *optional*):
+                Request all pages, for example
+                if the previous sync was interrupted
+
+        Returns:
+            Number of new messages
+        """
+        added = 0
+        pages = self._pages(chat_id, token)
+
+        try:
+            for page in pages:
+                new = store.add_turns(page['turns'])
+                added += new
+
+                if new < len(page['turns']) and not full:
+                    break
+        finally:
+            pages.close()
+
+        return added
+
+    @caimethod
+    def export_histories(
+        self, path: str, *, chars: list = None,
+        compression: str = None, token: str = None
+    ) -> int:
+        """Save all chat2 histories of the account to a file
+
+        Chats of each character are written one by one,
+        page by page, so memory doesn't grow with the history.
+        An interrupted export continues from the last page when
+        it is started again with the same file, see
+        :obj:`~characterai.export.Export`
+
+        EXAMPLE::
+
+            client.export_histories('histories.jsonl.gz')
+
+            for item in export.read('histories.jsonl.gz'):
+                ...
+
+        Args:
+            path (``str``):
+                File to write, ``.gz`` and ``.xz``
+                files are compressed
+
+            chars (List of ``str``, *optional*):
+                Character IDs, by default all
+                characters of your recent chats
+
+            compression (``str``, *optional*):
+                ``gzip``, ``lzma`` or ``none``,
+                by default it is chosen by the file suffix
+
+        Returns:
+            Number of written messages
+        """
+        if chars is None:
+            data = self.request(
+                'chats/recent/', token=token, neo=True
+            )
+
+            chars = list(dict.fromkeys(
+                c['character_id'] for c in data['chats']
+            ))
+
+        with Export(path, compression) as file:
+            for char in chars:
+                data = self.request(
+                    f'chats/?character_ids={char}'
+                    '&num_preview_turns=0',
+                    token=token, neo=True
+                )
+
+                for chat in data['chats']:
+                    chat_id = chat['chat_id']
+                    started, next_token = file.resume(chat_id)
+
+                    if started is None:
+                        continue
+                    elif not started:
+                        file.add_chat(chat)
+
+                    for page in self._pages(
+                        chat_id, token, next_token
+                    ):
+                        file.add_turns(page['turns'])
+                        file.save(chat_id, following(page))
+
+            file.finish()
+
+        return file.turns
+
+    def _pages(
+        self, chat_id: str, token: str,
+        next_token: str = None
+    ):
+
+        while True:
+            url = f'turns/{chat_id}/'
+
+            if next_token is not None:
+                url += '?next_token=' + quote(next_token, safe='')
+
+            page = self.request(
+                url, token=token, neo=True
+            )
+
+            yield page
+
+            next_token = (page.get('meta') or {}).get('next_token')
+
+            if not next_token or not page['turns']:
+                return
+
     @caimethod
     def get_chat(
         self, char: str, *,
@@ -91,8 +309,8 @@ class ChatV2(Request):
         Returns:
             :obj:`~characterai.types.chat2.ChatData`
         """
-        return chat2.ChatData.model_validate(
-            (self.request(
+        return self._parse(
+            chat2.ChatData, (self.request(
                 f'chats/recent/{char}',
                 token=token, neo=True
             ))['chats'][0]
@@ -127,8 +345,8 @@ class ChatV2(Request):
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
-        return chat2.BotAnswer.model_validate(
-            (self.request(
+        return self._parse(
+            chat2.BotAnswer, (self.request(
                 'turn/pin', neo=True,
                 token=token, data={
                     'is_pinned': pinned,
@@ -141,7 +359,8 @@ class ChatV2(Request):
         )
 
     def delete_message(
-        self, chat_id: str, ids: list
+        self, chat_id: str, ids: list,
+        *, timeout: float = None
     ) -> bool:
         """Deleting messages. Returns ``True`` on success
 
@@ -156,27 +375,32 @@ class ChatV2(Request):
             ids (List of ``str``):
                 List of message IDs to be deleted
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the answer
+
         Returns:
             ``bool``
         """
-        self.ws.send(json.dumps({
-            'command':'remove_turns',
-            'payload': {
-                'chat_id': chat_id,
-                'turn_ids': ids
-            }
-        }))
-
-        response = json.loads(self.ws.recv())
+        with deadline(timeout):
+            response = self._retry(lambda: self._ask(
+                'remove_turns', {
+                    'chat_id': chat_id,
+                    'turn_ids': ids
+                }, chat_id=chat_id
+            ))
 
         if response['command'] == 'neo_error':
             raise ServerError(response['comment'])
 
+        if self.mirror is not None:
+            self.mirror.remove(chat_id, ids)
+
         return True
 
     def next_message(
         self, char: str, chat_id: str, turn_id: str, 
-        *, tts: bool = False, lang: str = 'English'
+        *, tts: bool = False, lang: str = 'English',
+        timeout: float = None
     ):
         """Generate an alternative answer
 
@@ -204,12 +428,67 @@ class ChatV2(Request):
                 That's the language you're most
                 likely to respond in.
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
-        self.ws.send(json.dumps({
-            'command':'generate_turn_candidate',
-            'payload': {
+        with deadline(timeout):
+            turn = self._retry(lambda: self._final(
+                self._next_message(
+                    char, chat_id, turn_id, tts, lang
+                )
+            ), idempotent=False)
+
+        return self._parse(chat2.BotAnswer, turn)
+
+    def stream_next_message(
+        self, char: str, chat_id: str, turn_id: str, 
+        *, tts: bool = False, lang: str = 'English',
+        timeout: float = None
+    ):
+        """Generate an alternative answer chunk by chunk
+
+        EXAMPLE::
+
+            for chunk in chat.stream_next_message(
+                'CHAR', 'CHAT_ID', 'MSG_ID'
+            ):
+                print(chunk.text)
+
+        Args:
+            char (``str``):
+                Character ID
+            
+            chat_id (``str``):
+                Chat ID
+            
+            turn_id (``str``):
+                Message ID
+            
+            tts (``bool``, *optional*):
+                Generate audio for the message
+            
+            lang (``str``, *optional*):
+                The language of your message
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
+        Returns:
+            :obj:`~characterai.aiocai.methods.chat2.Stream`
+        """
+        return Stream(self._next_message(
+            char, chat_id, turn_id, tts, lang, timeout
+        ), self._parse)
+
+    def _next_message(
+        self, char, chat_id, turn_id, tts, lang,
+        timeout = None
+    ):
+        return self._generate(
+            'generate_turn_candidate', {
                 'tts_enabled': tts,
                 'selected_language': lang,
                 'character_id': char,
@@ -217,29 +496,14 @@ class ChatV2(Request):
                     'turn_id': turn_id,
                     'chat_id': chat_id
                 }
-            }
-        }))
-
-        while True:
-            response = json.loads(self.ws.recv())
-    
-            try:
-                turn = response['turn']
-            except:
-                raise ServerError(response['comment'])
-    
-            if not turn['author']['author_id'].isdigit():
-                try:
-                    turn['candidates'][0]['is_final']
-                except: ...
-                else:
-                    return chat2.BotAnswer.model_validate(
-                        turn
-                    )
+            }, chat_id=chat_id, turn_id=turn_id,
+            timeout=timeout
+        )
 
     def new_chat(
         self, char: str, creator_id: str,
-        *, greeting: bool = True, chat_id: str = None
+        *, greeting: bool = True, chat_id: str = None,
+        timeout: float = None
     ):
         """Editing the message text
 
@@ -263,6 +527,9 @@ class ChatV2(Request):
                 You can specify your chat ID,
                 it can be any ``str``
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the chat and the greeting
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
@@ -271,41 +538,40 @@ class ChatV2(Request):
         if isinstance(creator_id, int):
             creator_id = str(creator_id)
         
-        self.ws.send(json.dumps({
-            'command': 'create_chat',
-            'payload': {
-                'chat': {
-                    'chat_id': chat_id,
-                    'creator_id': creator_id,
-                    'visibility': 'VISIBILITY_PRIVATE',
-                    'character_id': char,
-                    'type': 'TYPE_ONE_ON_ONE'
-                },
-                'with_greeting': greeting
-            }
-        }))
-
-        response = json.loads(self.ws.recv())
-        try: response['chat']
-        except KeyError:
-            raise ServerError(response['comment'])
-        else:
-            answer = chat2.BotAnswer.model_validate(
-                json.loads(
-                    self.ws.recv()
-                )['turn']
-            )
+        with deadline(timeout):
+            with self._rpc(
+                'create_chat', {
+                    'chat': {
+                        'chat_id': chat_id,
+                        'creator_id': creator_id,
+                        'visibility': 'VISIBILITY_PRIVATE',
+                        'character_id': char,
+                        'type': 'TYPE_ONE_ON_ONE'
+                    },
+                    'with_greeting': greeting
+                }, chat_id=chat_id
+            ) as call:
+                response = call.recv()
+                try: response['chat']
+                except KeyError:
+                    call.done = True
+                    raise ServerError(response['comment'])
+                else:
+                    answer = self._parse(
+                        chat2.BotAnswer, (call.recv())['turn']
+                    )
+                    call.done = True
 
-            response = chat2.ChatData.model_validate(
-                response['chat']
-            )
+                response = self._parse(
+                    chat2.ChatData, response['chat']
+                )
 
-            return response, answer
+                return response, answer
 
     def send_message(
         self, char: str, chat_id: str, text: str,
         author: dict = {}, *, image: str = None,
-        custom_id: str = None
+        custom_id: str = None, timeout: float = None
     ):
         """Sending a message to chat
 
@@ -330,9 +596,75 @@ class ChatV2(Request):
                 Attach image to message. This should
                 be the URL path on the server
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
+        with deadline(timeout):
+            turn = self._retry(lambda: self._final(
+                self._send_message(
+                    char, chat_id, text, author,
+                    image, custom_id
+                )
+            ), idempotent=False)
+
+        return self._parse(chat2.BotAnswer, turn)
+
+    def stream_message(
+        self, char: str, chat_id: str, text: str,
+        author: dict = {}, *, image: str = None,
+        custom_id: str = None, timeout: float = None
+    ):
+        """Sending a message to chat and receiving the answer chunk by chunk
+
+        Each chunk is the answer generated so far, the last
+        one is complete. The time it took to get the first
+        chunk is in ``first_chunk``
+
+        EXAMPLE::
+
+            stream = chat.stream_message('CHAR', 'CHAT_ID', 'TEXT')
+
+            for chunk in stream:
+                print(chunk.text)
+
+            print(stream.first_chunk)
+
+        Args:
+            char (``str``):
+                Character ID
+            
+            chat_id (``str``):
+                Chat ID
+            
+            text (``str``):
+                Message text
+            
+            custom_id (``str``, *optional*):
+                Its ID for the message, can be any ``str``
+            
+            image (``str``, *optional*):
+                Attach image to message. This should
+                be the URL path on the server
+
+            timeout (``float``, *optional*):
+                Seconds to wait for the whole answer
+
+        Returns:
+            :obj:`~characterai.aiocai.methods.chat2.Stream`
+        """
+        return Stream(self._send_message(
+            char, chat_id, text, author,
+            image, custom_id, timeout
+        ), self._parse)
+
+    def _send_message(
+        self, char, chat_id, text,
+        author, image, custom_id,
+        timeout = None
+    ):
         turn_key = {
             'chat_id': chat_id
         }
@@ -340,9 +672,8 @@ class ChatV2(Request):
         if custom_id != None:
             turn_key['turn_id'] = custom_id
 
-        message = {
-            'command': 'create_and_generate_turn',
-            'payload': {
+        return self._generate(
+            'create_and_generate_turn', {
                 'character_id': char,
                 'turn': {
                     'turn_key': turn_key,
@@ -354,31 +685,55 @@ class ChatV2(Request):
                         }
                     ]
                 }
-            }
-        }
+            }, chat_id=chat_id, timeout=timeout
+        )
 
-        self.ws.send(json.dumps(message))
+    def _final(self, turns) -> dict:
+        for turn in turns: ...
 
-        while True:
-            response = json.loads(self.ws.recv())
+        return turn
 
-            try:
-                turn = response['turn']
-            except:
-                raise ServerError(response['comment'])
+    def _ask(
+        self, command: str, payload: dict, **route
+    ) -> dict:
+        with self._rpc(
+            command, payload, **route
+        ) as call:
+            response = call.recv()
+            call.done = True
+
+            return response
+
+    def _generate(
+        self, command: str, payload: dict, **route
+    ):
+        # Yields the character's turns
+        # until the final one arrives
+        with self._rpc(
+            command, payload, **route
+        ) as call:
+            while True:
+                response = call.recv()
 
-            if not turn['author']['author_id'].isdigit():
                 try:
-                    turn['candidates'][0]['is_final']
-                except: ...
-                else:
-                    return chat2.BotAnswer.model_validate(
-                        turn
-                    )
+                    turn = response['turn']
+                except:
+                    call.done = True
+                    raise ServerError(response['comment'])
+
+                if not turn['author']['author_id'].isdigit():
+                    if 'is_final' in turn['candidates'][0]:
+                        call.done = True
+
+                    yield turn
+
+                    if call.done:
+                        return
 
     def edit_message(
         self, chat_id: str, message_id: str,
-        text: str, *, token: str = None
+        text: str, *, token: str = None,
+        timeout: float = None
     ):
         """Edit the message text
 
@@ -396,31 +751,178 @@ class ChatV2(Request):
             text (``str``):
                 New message text
 
+            timeout (``float``, *optional*):
+                Seconds to wait for the answer
+
         Returns:
             :obj:`~characterai.types.chat2.BotAnswer`
         """
-        self.ws.send(json.dumps({
-            'command':'edit_turn_candidate',
-            'payload': {
-                'turn_key': {
-                    'chat_id': chat_id,
-                    'turn_id': message_id
-                },
-                'new_candidate_raw_content': text
-            }
-        }))
-
-        response = json.loads(self.ws.recv())
+        with deadline(timeout):
+            response = self._retry(lambda: self._ask(
+                'edit_turn_candidate', {
+                    'turn_key': {
+                        'chat_id': chat_id,
+                        'turn_id': message_id
+                    },
+                    'new_candidate_raw_content': text
+                }, chat_id=chat_id, turn_id=message_id
+            ))
 
         try: response['turn']
         except KeyError:
             raise ServerError(response['comment'])
         else:
-            return chat2.BotAnswer.model_validate(
-                response['turn']
+            return self._parse(
+                chat2.BotAnswer, response['turn']
             )
 
+class Stream:
+    """Answer that is being generated
+
+    Iterate over it to get :obj:`~characterai.types.chat2.BotAnswer`
+    chunks as they arrive. It can also be used as a context manager
+    to stop the generation when leaving the block
+
+    Parameters:
+        answer (:obj:`~characterai.types.chat2.BotAnswer`):
+            The last received chunk
+
+        first_chunk (``float``):
+            Seconds from the start of the iteration
+            to the first chunk
+    """
+    def __init__(self, turns, parse):
+        self.turns = turns
+        self.parse = parse
+        self.answer = None
+        self.start = None
+        self.first_chunk = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        if self.start is None:
+            self.start = time.perf_counter()
+
+        self.answer = self.parse(
+            chat2.BotAnswer, next(self.turns)
+        )
+
+        if self.first_chunk is None:
+            self.first_chunk = time.perf_counter() - self.start
+
+        return self.answer
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self.turns.close()
+
+class Call:
+    """Frames addressed to one command sent over :obj:`WSConnect`"""
+    def __init__(
+        self, conn, request_id: str, message: str,
+        chat_id: str = None, turn_id: str = None,
+        replay: bool = False, command: str = None,
+        until: float = None
+    ):
+        self.conn = conn
+        self.request_id = request_id
+        self.message = message
+        self.chat_id = chat_id
+        self.turn_id = turn_id
+        self.replay = replay
+        self.command = command
+        self.until = until
+        self.done = False
+        self.abandoned = None
+
+    def send(self):
+        try:
+            self.conn.ws.send(self.message)
+        except exceptions.ConnectionClosed:
+            self.resend()
+
+    def resend(self):
+        self.conn._restore()
+
+        # Answers to the other commands could have been
+        # lost with the connection, they can't be repeated
+        if not self.replay:
+            raise ConnectionLostError('Connection lost')
+
+        self.send()
+
+    def recv(self) -> dict:
+        while True:
+            try:
+                frame = codec.loads(self.conn.ws.recv(
+                    remaining(self.until), decode=False
+                ))
+            except exceptions.ConnectionClosed:
+                self.resend()
+                continue
+            except TimeoutError:
+                raise DeadlineError('No answer in time')
+
+            if self.conn.mirror is not None:
+                self.conn.mirror.update(frame)
+
+            # Frames left over from other
+            # commands are skipped
+            if self.conn._orphan(frame) or frame.get(
+                'request_id', self.request_id
+            ) != self.request_id:
+                continue
+
+            if self.turn_id is None:
+                self.turn_id = answer(frame)
+
+            return frame
+
 class WSConnect(ChatV2):
+    """Connection to the chat2 WebSocket
+
+    The connection can be shared between threads,
+    commands are sent one at a time. Every command
+    carries a ``request_id``, so frames that belong
+    to another command are never returned.
+    Every ``client.connect(...)`` opens a new connection
+    with its own token and options
+
+    If the connection drops, it is restored. Commands
+    that are safe to repeat (editing and deleting messages)
+    are sent again, the others fail with
+    :obj:`~characterai.errors.ServerError`
+
+    A stream can be closed before the answer is complete. The
+    server is asked to stop the generation and the rest of the
+    answer is skipped, so it never gets to the next commands
+
+    Args:
+        reconnect (:obj:`~characterai.backoff.Backoff` | ``bool``, *optional*):
+            Delays between reconnection attempts,
+            ``False`` to not reconnect
+
+        on_state (``Callable``, *optional*):
+            Called with ``connected``, ``reconnecting``
+            or ``closed`` when the connection state
+            changes
+
+        mirror (:obj:`~characterai.mirror.Mirror` | ``bool``, *optional*):
+            Keep the last messages of chats from the
+            received frames, see :obj:`WSConnect.turns`.
+            ``True`` uses the default settings
+
+        retry (:obj:`~characterai.retry.RetryPolicy` | ``bool``, *optional*):
+            Repeat commands that failed because the
+            connection was lost. The client's policy by default
+    """
     def __init__(
         self, token: str = None,
         *, start: bool = True
@@ -428,19 +930,63 @@ class WSConnect(ChatV2):
         if not start:
             self.token = token
 
+        self.state = None
+        self.reconnect = Backoff()
+        self.on_state = None
+        self.mirror = None
+
     def __enter__(self):
         return self
 
     def __exit__(self, *args):
         self.close()
 
-    def _connect(self):
+    def turns(self, chat_id: str) -> list:
+        """Last messages of the chat received over this connection
+
+        Requires the connection to be opened with ``mirror``
+
+        EXAMPLE::
+
+            chat.turns('CHAT_ID')[-1].candidates[0].raw_content
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+        Returns:
+            List of :obj:`~characterai.types.chat2.TurnData`,
+            from the oldest one
+        """
+        if self.mirror is None:
+            raise ValueError('Connection is opened without mirror')
+
+        return self.mirror.turns(chat_id)
+
+    def last_turn(self, chat_id: str):
+        """The newest message of the chat received over this connection
+
+        Requires the connection to be opened with ``mirror``
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+        Returns:
+            :obj:`~characterai.types.chat2.TurnData`,
+            ``None`` if nothing was received
+        """
+        if self.mirror is None:
+            raise ValueError('Connection is opened without mirror')
+
+        return self.mirror.last_turn(chat_id)
+
+    def _open(self):
         cookie = f'HTTP_AUTHORIZATION="Token {self.token}"'
 
         try:
             self.ws = websockets.connect(
-                'wss://neo.character.ai/ws/',
-                additional_headers={
+                URL, additional_headers={
                     'Cookie': cookie
                 }
             )
@@ -448,15 +994,200 @@ class WSConnect(ChatV2):
             if e.status_code == 403:
                 raise ServerError('Wrong token')
 
+            raise
+
+        # Frames of the old connection don't come anymore
+        self.orphans = {}
+
+    def _connect(self):
+        self._open()
+        self._state('connected')
+
+        self.lock = threading.Lock()
+
         return self
 
+    def _restore(self):
+        if not self.reconnect:
+            self._state('closed')
+            raise ServerError('Connection closed')
+
+        self._state('reconnecting')
+
+        for delay in self.reconnect.delays():
+            time.sleep(delay)
+
+            try:
+                self._open()
+            except (OSError, exceptions.WebSocketException):
+                continue
+
+            return self._state('connected')
+
+        self._state('closed')
+        raise ServerError('Connection closed')
+
+    def _state(self, state: str):
+        self.state = state
+
+        if self.on_state is not None:
+            self.on_state(state)
+
     def __call__(
         self, token: str = None,
-        *, start: bool = True
+        *, start: bool = True,
+        reconnect: Backoff | bool = True,
+        on_state = None,
+        mirror: Mirror | bool = None,
+        retry: RetryPolicy | bool = None
     ):
-        self.token = token or self.token
+        # Each call opens its own connection, so an open one
+        # never changes its account or options while in use
+        conn = WSConnect(token or self.token, start=False)
+        conn.models = self.models
+        conn.retry = self.retry
+
+        if reconnect is True:
+            reconnect = Backoff()
+
+        conn.reconnect = reconnect
+        conn.on_state = on_state
+        conn.mirror = Mirror() if mirror is True else mirror or None
+
+        if retry is not None:
+            conn.retry = RetryPolicy() if retry is True else retry or None
         
-        return self._connect()
+        return conn._connect()
 
     def close(self):
-        return self.ws.close()
+        self.ws.close()
+        self._state('closed')
+
+    @contextmanager
+    def _rpc(
+        self, command: str, payload: dict, *,
+        chat_id: str = None, turn_id: str = None,
+        timeout: float = None
+    ):
+        request_id = str(uuid.uuid4())
+
+        call = Call(
+            self, request_id, codec.dumps({
+                'command': command,
+                'request_id': request_id,
+                'payload': payload
+            }), chat_id, turn_id,
+            replay=command in IDEMPOTENT,
+            command=command, until=until(timeout)
+        )
+
+        left = remaining(call.until)
+
+        if not self.lock.acquire(
+            timeout=-1 if left is None else left
+        ):
+            raise DeadlineError('Connection is busy')
+
+        try:
+            call.send()
+
+            yield call
+        except ConnectionLostError:
+            # The rest of the answer was lost with the connection
+            call.done = True
+            raise
+        finally:
+            try:
+                if not call.done:
+                    self._abandon(call)
+            finally:
+                self.lock.release()
+
+    def _abandon(self, call: Call):
+        # Nobody waits for the answer anymore (the stream
+        # was closed or the time is over). The next frames
+        # of the chat are skipped until its last one
+        call.abandoned = time.monotonic() + ORPHANS
+
+        if call.chat_id is not None:
+            self.orphans[call.chat_id] = call
+
+        if call.command not in GENERATIONS:
+            return
+
+        payload = {'chat_id': call.chat_id}
+
+        if call.turn_id is not None:
+            payload['turn_key'] = {
+                'chat_id': call.chat_id,
+                'turn_id': call.turn_id
+            }
+
+        # Best effort, the frames are skipped either way
+        try:
+            self.ws.send(codec.dumps({
+                'command': 'abort_generation',
+                'request_id': str(uuid.uuid4()),
+                'payload': payload
+            }))
+        except exceptions.ConnectionClosed:
+            ...
+
+    def _orphan(self, frame: dict) -> bool:
+        turn = frame.get('turn') or {}
+
+        chat_id = (turn.get('turn_key') or {}).get('chat_id') \
+            or (frame.get('chat') or {}).get('chat_id') \
+            or frame.get('chat_id')
+
+        call = self.orphans.get(chat_id)
+        turn_id = answer(frame)
+
+        if call is None or frame.get(
+            'request_id', call.request_id
+        ) != call.request_id:
+            return False
+
+        # Answers to the next commands have other IDs
+        if None not in (call.turn_id, turn_id) \
+        and call.turn_id != turn_id:
+            return False
+
+        # Nothing came in time, its frames are not expected
+        if call.abandoned < time.monotonic():
+            del self.orphans[chat_id]
+            return False
+
+        if call.command in ANSWERS or final(frame):
+            del self.orphans[chat_id]
+
+        return True
+
+def answer(frame: dict) -> str:
+    """ID of the character's message in the frame"""
+    try:
+        turn = frame['turn']
+
+        if not turn['author']['author_id'].isdigit():
+            return turn['turn_key']['turn_id']
+    except (KeyError, TypeError, AttributeError):
+        return None
+
+def final(frame: dict) -> bool:
+    """Whether the frame is the last one of a command"""
+    if frame.get('command') == 'neo_error':
+        return True
+
+    try:
+        turn = frame['turn']
+
+        return not turn['author']['author_id'].isdigit() \
+            and 'is_final' in turn['candidates'][0]
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return False
+
+def following(page: dict) -> str:
+    """Token of the next page, ``None`` after the last one"""
+    next_token = (page.get('meta') or {}).get('next_token')
+
+    return next_token if next_token and page['turns'] else None
@@ -1,4 +1,4 @@
-from .utils import caimethod, validate
+from .utils import caimethod
 from ...types import other
 
 class Chats:
@@ -23,7 +23,7 @@ class Chats:
             f'chat/characters/search/?query={query}'
         )
 
-        return validate(
+        return self._parse_list(
             other.QueryChar, data['characters']
         )
 
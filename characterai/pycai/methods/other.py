@@ -1,4 +1,4 @@
-from .utils import caimethod, validate
+from .utils import caimethod
 from ...types import other
 
 from curl_cffi import CurlMime
@@ -109,6 +109,6 @@ class Other:
             token=token
         )
         
-        return validate(
+        return self._parse_list(
             other.Voice, data['voices']
         )
\ No newline at end of file
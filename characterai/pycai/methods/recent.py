@@ -1,5 +1,5 @@
 from ...types import character, recent
-from .utils import caimethod, validate
+from .utils import caimethod
 
 class Recent:
     @caimethod
@@ -18,7 +18,7 @@ class Recent:
             token=token
         )
 
-        return validate(
+        return self._parse_list(
             character.CharShort,
             data['characters']
         )
@@ -39,7 +39,7 @@ class Recent:
             token=token
         )
 
-        return validate(
+        return self._parse_list(
             recent.Room, data['rooms']
         )
 
@@ -59,6 +59,6 @@ class Recent:
             token=token
         )
 
-        return validate(
+        return self._parse_list(
             recent.Chat, data['chats']
         )
\ No newline at end of file
@@ -31,6 +31,6 @@ class Users:
                 f'User {username} not found.'
             )
 
-        return user.User.model_validate(
-            data['public_user']
+        return self._parse(
+            user.User, data['public_user']
         )
\ No newline at end of file
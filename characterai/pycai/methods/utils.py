@@ -1,137 +1,573 @@
 from characterai.pycai import client, methods
 from ...errors import (
     ServerError, AuthError,
-    JSONError
+    JSONError, DeadlineError
 )
 
 from curl_cffi import CurlMime
 
+from ... import codec, models
+from ...deadline import deadline, until, remaining, expired, current
+from ...retry import retryAfter, classify
+
+from concurrent.futures import (
+    Future, ThreadPoolExecutor,
+    TimeoutError as FutureTimeout
+)
+from contextlib import contextmanager
 from functools import wraps
+import contextvars
+import inspect
+import threading
+import atexit
 import json
+import time
+
+PLUS = 'https://plus.character.ai'
+NEO = 'https://neo.character.ai'
+
+# POST endpoints that only read data
+READS = {
+    'chat/character/info/', 'chat/user/public/',
+    'chat/character/histories_v2/', 'chat/history/continue/'
+}
 
 class Request:
+    cache = None
+    limiter = None
+    retry = None
+    concurrency = None
+    models = 'validate'
+
     def request(
         self, url: str, *, token: str = None,
         method: str = 'GET', data: dict = {},
         split: bool = False, neo: bool = False,
-        multipart: CurlMime = None
+        multipart: CurlMime = None,
+        timeout: float = None
     ):
         key = self.token or token
 
         if key == None:
             raise AuthError('No token')
 
+        with deadline(timeout):
+            try:
+                return self._request(
+                    url, key, method, data, neo, multipart
+                )
+            except DeadlineError:
+                raise
+            except Exception as e:
+                # Requests cut off by the deadline
+                # fail with curl timeouts
+                if expired():
+                    raise DeadlineError('Deadline exceeded') from e
+
+                raise
+
+    def _request(
+        self, url: str, key: str, method: str,
+        data: dict, neo: bool, multipart: CurlMime
+    ):
+        if self.cache is not None:
+            res = self.cache.get(url, data, key)
+
+            if res is not None:
+                return res
+
+        link = f'{NEO if neo else PLUS}/{url}'
+
+        if multipart == None and isRead(url, method, data):
+            # Identical reads that are already on the way
+            # share one answer instead of being sent again
+            res = flights.run(
+                (method, link, json.dumps(data, sort_keys=True), key),
+                lambda: self._retry(
+                    lambda: self._fetch(link, key, method, data, neo)
+                )
+            )
+        else:
+            res = self._retry(
+                lambda: self._fetch(
+                    link, key, method, data, neo, multipart
+                ), idempotent=False
+            )
+
+        if self.cache is not None:
+            self.cache.set(url, data, key, res)
+
+        return res
+
+    def _fetch(
+        self, link: str, key: str,
+        method: str = 'GET', data: dict = {},
+        neo: bool = False, multipart: CurlMime = None
+    ):
+        self._limit(key, neo)
+
         headers = {
             "Authorization": f"Token {key}"
         }
 
-        link = f'https://plus.character.ai/{url}'
+        left = remaining()
+        limit = {} if left is None else {'timeout': left}
 
-        if neo:
-            link = link.replace('plus', 'neo')
+        with self._slot():
+            if multipart != None:
+                r = self.session.post(
+                    link, headers=headers, data=data,
+                    multipart=multipart, **limit
+                )
+            elif data != {} or data:
+                r = self.session.post(
+                    link, headers=headers, json=data, **limit
+                )
+            elif method == 'GET':
+                r = self.session.get(
+                    link, headers=headers, **limit
+                )
+            elif method == 'PUT':
+                r = self.session.put(
+                    link, headers=headers, json=data, **limit
+                )
 
-        if multipart != None:
-            r = self.session.post(
-                link, headers=headers, data=data,
-                multipart=multipart
-            )
-        elif data != {} or data:
-            r = self.session.post(
-                link, headers=headers, json=data
-            )
-        elif method == 'GET':
-            r = self.session.get(
-                link, headers=headers
-            )
-        elif method == 'PUT':
-            r = self.session.put(
-                link, headers=headers, json=data
-            )
+            if not r.ok:
+                status = {
+                    'status': r.status_code,
+                    'retry_after': retryAfter(
+                        r.headers.get('Retry-After')
+                    )
+                }
 
-        if neo and not r.ok:
-            try:
-                raise ServerError(r.json()['comment'])
-            except KeyError:
-                raise ServerError(r.text)
+            if neo and not r.ok:
+                try:
+                    raise ServerError(r.json()['comment'], **status)
+                except (KeyError, ValueError):
+                    raise ServerError(r.text, **status)
 
-        if r == 404:
-            raise ServerError('Not Found')
-        elif not r.ok:
-            raise ServerError(r.status_code)
+            if r == 404:
+                raise ServerError('Not Found')
+            elif not r.ok:
+                raise ServerError(r.status_code, **status)
 
-        text = r.text
+        content = r.content
 
-        if '}\n{' in text:
-            text = '{' + text.split('}\n{')[-1]
+        if b'}\n{' in content:
+            content = b'{' + content.split(b'}\n{')[-1]
 
         try:
-            res = json.loads(
-                text.encode('utf-8')
-            )
-        except json.decoder.JSONDecodeError:
+            res = codec.loads(content)
+        except codec.DecodeError:
             raise JSONError(
                 'Unable to decode JSON.'
                 f'Server response: {r.text}'
             )
 
+        return checkResponse(res)
+
+    def stream(
+        self, url: str, *, token: str = None,
+        data: dict = {}, timeout: float = None
+    ):
+        """POST request whose answer is read line by line
+
+        Every line of the response is a separate JSON
+        object, they are yielded as soon as they arrive.
+        The whole answer must arrive before the current
+        deadline and ``timeout``
+        """
+        key = self.token or token
+
+        if key == None:
+            raise AuthError('No token')
+
+        at = until(timeout)
+
+        self._limit(key, at=at)
+
+        left = remaining(at)
+        limit = {} if left is None else {'timeout': left}
+
+        r = self.session.post(
+            f'{PLUS}/{url}', json=data, stream=True,
+            headers={
+                "Authorization": f"Token {key}"
+            }, **limit
+        )
+
         try:
-            if res['force_login']:
-                raise AuthError('Need Auth')
-            elif res['status'] != 'OK' or res['abort']:
-                raise ServerError(res['error'])
-            elif res['error'] != None:
-                raise ServerError(res['error'])
-        except KeyError:
+            if not r.ok:
+                raise ServerError(r.status_code)
+
+            lines = r.iter_lines()
+
+            while True:
+                try:
+                    line = next(lines)
+                except StopIteration:
+                    break
+                except Exception as e:
+                    # For streams curl uses the timeout for
+                    # connecting and for a stalled answer
+                    if at is not None and at <= time.monotonic():
+                        raise DeadlineError('Deadline exceeded') from e
+
+                    raise
+
+                if not line:
+                    continue
+
+                try:
+                    res = codec.loads(line)
+                except codec.DecodeError:
+                    raise JSONError(
+                        'Unable to decode JSON.'
+                        f'Server response: {line}'
+                    )
+
+                remaining(at)
+
+                yield checkResponse(res)
+        finally:
+            r.close()
+
+    def _parse(self, cls, data):
+        return models.parse(cls, data, self.models)
+
+    def _parse_list(self, cls, data):
+        return models.parse(cls, data, self.models, many=True)
+
+    def _retry(self, fetch, idempotent: bool = True):
+        policy = self.retry
+
+        if policy is None or policy.idempotent and not idempotent:
+            return fetch()
+
+        start = time.monotonic()
+        attempt = 0
+
+        while True:
+            try:
+                return fetch()
+            except Exception as e:
+                delay = policy.delay(e, attempt, start)
+
+                if delay is None:
+                    raise
+
+                # The next attempt would start after the deadline
+                if expired(delay):
+                    raise DeadlineError('Deadline exceeded') from e
+
+            time.sleep(delay)
+            attempt += 1
+
+    @contextmanager
+    def _slot(self, at: float = None):
+        if self.concurrency is None:
+            yield
+            return
+
+        if not self.concurrency.acquire(remaining(at)):
+            raise DeadlineError('No free place in time')
+
+        start = time.monotonic()
+        kind = None
+
+        try:
+            yield
+        except DeadlineError:
+            kind = 'timeout'
+            raise
+        except Exception as e:
+            kind = classify(e)
+            raise
+        finally:
+            self.concurrency.release(start, kind)
+
+    def _limit(
+        self, key: str, neo: bool = False, at: float = None
+    ):
+        if self.limiter is None:
+            return
+
+        delay = self.limiter.reserve(
+            key, 'neo' if neo else 'plus',
+            until() if at is None else at
+        )
+
+        if delay is None:
+            raise DeadlineError('Deadline exceeded')
+
+        if delay > 0:
+            time.sleep(delay)
+
+class Flight:
+    """One request that is on the way and its callers"""
+    def __init__(self):
+        self.future = Future()
+        self.callers = 0
+        self.data = None
+
+    def result(self, timeout: float = None) -> dict:
+        res = self.future.result(timeout)
+
+        # Callers of a shared answer get their own copies,
+        # so changing one of them doesn't change the others
+        if self.data is None:
             return res
 
+        return codec.loads(self.data)
+
+class Flights:
+    """Requests that are on the way, by their contents
+
+    Args:
+        workers (``int``, *optional*):
+            How many shared requests of callers with a
+            deadline can be on the way at the same time
+    """
+    def __init__(self, workers: int = 8):
+        self.futures = {}
+        self.lock = threading.Lock()
+
+        # Threads are started only when needed
+        # and are reused by the next requests
+        self.executor = ThreadPoolExecutor(
+            workers, thread_name_prefix='pycai-flights'
+        )
+
+    def run(self, key: tuple, fetch) -> dict:
+        with self.lock:
+            flight = self.futures.get(key)
+            first = flight is None
+
+            if first:
+                flight = self.futures[key] = Flight()
+
+            flight.callers += 1
+
+        if first:
+            # The request is shared, so it runs without
+            # the deadline of the caller that started it
+            context = contextvars.copy_context()
+            context.run(current.set, None)
+
+            # A caller without a deadline can wait in it
+            if current.get() is None:
+                self.fetch(key, flight, fetch)
+            else:
+                self.executor.submit(
+                    context.run, self.fetch, key, flight, fetch
+                )
+
+        try:
+            return flight.result(remaining())
+        except FutureTimeout:
+            raise DeadlineError('Deadline exceeded')
+
+    def fetch(self, key: tuple, flight: Flight, fetch):
+        try:
+            res = fetch()
+        except BaseException as e:
+            with self.lock:
+                del self.futures[key]
+
+            flight.future.set_exception(e)
+            return
+
+        # Nobody can join after this, so
+        # the number of callers is final
+        with self.lock:
+            del self.futures[key]
+
+        if flight.callers > 1:
+            flight.data = codec.dumps(res)
+
+        flight.future.set_result(res)
+
+flights = Flights()
+
+def isRead(url: str, method: str, data: dict) -> bool:
+    if url.split('?')[0] in READS:
+        return True
+
+    return method == 'GET' and not data
+
+def checkResponse(res: dict) -> dict:
+    try:
+        if res['force_login']:
+            raise AuthError('Need Auth')
+        elif res['status'] != 'OK' or res['abort']:
+            raise ServerError(res['error'])
+        elif res['error'] != None:
+            raise ServerError(res['error'])
+    except KeyError:
+        return res
+
 def checkSession(args) -> bool:
     return any(
         isinstance(
             a, client.pycai.Client
-        ) for a in args
+        ) or bound(a) for a in args
     )
 
+def bound(a) -> bool:
+    # chat1 of a client has its session,
+    # the one of the library class doesn't
+    return isinstance(
+        a, methods.chat1.ChatV1
+    ) and a.session is not None
+
 def delClass(args) -> tuple:
     new = ()
 
+    # HTTP methods called on a chat2 connection
+    # borrow a shared client with its token
     for a in args:
-        if not isinstance(a, (
-            methods.chat1.ChatV1
+        if bound(a) or not isinstance(a, (
+            methods.chat1.ChatV1,
+            methods.chat2.WSConnect
         )):
             new = (a, *new)
 
     return new[::-1]
 
-def caimethod(func):
-    @wraps(func)
-    def wrapper(*args, **kwargs):
+class Lease:
+    def __init__(self, client):
+        self.client = client
+        self.users = 0
+        self.used = time.monotonic()
+
+class Sessions:
+    """Clients shared by methods called through the library class
+
+    ``pycai.get_char(...)`` and ``pycai.chat1.send_message(...)``
+    borrow a client from here instead of opening a new session
+    for every call, so the connection stays warm between calls.
+    Clients unused for ``ttl`` seconds are closed
+
+    EXAMPLE::
+
+        pycai.get_char('CHAR', token='TOKEN')
+
+        pycai.sessions.close()
+
+    Args:
+        ttl (``float``, *optional*):
+            How many seconds an unused client is kept open
+    """
+    def __init__(self, ttl: float = 300):
+        self.ttl = ttl
+        self.leases = {}
+        self.lock = threading.Lock()
+
+    def acquire(
+        self, token: str = None,
+        identifier: str = 'chrome120'
+    ) -> Lease:
+        self.evict()
+
+        key = (token, identifier)
+
+        with self.lock:
+            lease = self.leases.get(key)
+
+            if lease is None:
+                lease = self.leases[key] = Lease(
+                    client.pycai.Client(
+                        token=token, identifier=identifier
+                    )
+                )
+
+            lease.users += 1
+
+        return lease
+
+    def release(self, lease: Lease):
+        with self.lock:
+            lease.users -= 1
+            lease.used = time.monotonic()
+
+    def evict(self):
+        """Close clients that have not been used for ``ttl`` seconds"""
+        now = time.monotonic()
+        idle = []
+
+        with self.lock:
+            for key, lease in list(self.leases.items()):
+                if lease.users == 0 and now - lease.used > self.ttl:
+                    del self.leases[key]
+                    idle.append(lease)
+
+        for lease in idle:
+            lease.client.close()
+
+    def close(self):
+        """Close all clients. They will be reopened on the next call"""
+        with self.lock:
+            leases = list(self.leases.values())
+            self.leases.clear()
+
+        for lease in leases:
+            lease.client.close()
+
+sessions = Sessions()
+atexit.register(sessions.close)
+
+def getToken(args, kwargs) -> str:
+    try:
         try:
-            try:
-                token = kwargs['token']
-            except (AttributeError, KeyError):
-                token = args[0].token
-        except AttributeError:
-            token = None
+            return kwargs['token']
+        except (AttributeError, KeyError):
+            return args[0].token
+    except AttributeError:
+        return None
 
-        temp = False
+def caimethod(func):
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator(*args, **kwargs):
+            if checkSession(args):
+                for item in func(*delClass(args), **kwargs):
+                    yield item
 
-        if not checkSession(args):
-            temp = True
+                return
 
-            args = (client.pycai.Client(
-                token=token
-            ), *args)
+            lease = sessions.acquire(
+                getToken(args, kwargs)
+            )
 
-        args = delClass(args)
+            try:
+                for item in func(
+                    *delClass((lease.client, *args)),
+                    **kwargs
+                ):
+                    yield item
+            finally:
+                sessions.release(lease)
+
+        return generator
 
-        result = func(*args, **kwargs)
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if checkSession(args):
+            return func(*delClass(args), **kwargs)
 
-        # Closing the session if the function
-        # was used through a library class
-        if temp:
-            args[0].close()
+        # The function was used through a library
+        # class, so we borrow a shared client
+        lease = sessions.acquire(
+            getToken(args, kwargs)
+        )
 
-        return result
+        try:
+            return func(
+                *delClass((lease.client, *args)),
+                **kwargs
+            )
+        finally:
+            sessions.release(lease)
     
     return wrapper
 
@@ -146,8 +582,3 @@ def flatten(d, parent_key='', sep=''):
         else:
             items.append((k, v))
     return dict(items)
-
-def validate(_class, data):
-    return [
-        _class(**a) for a in data
-    ]
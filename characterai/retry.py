@@ -0,0 +1,147 @@
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+import asyncio
+import time
+
+from curl_cffi.curl import CurlError
+from websockets import exceptions
+
+from .backoff import Backoff
+from .errors import ServerError, DeadlineError
+
+STATUSES = {429, 500, 502, 503, 504}
+
+# curl error codes
+TIMEOUT = {28}
+CONNECTION = {7, 16, 35, 52, 55, 56, 92}
+
+class RetryPolicy:
+    """When and how failed requests are sent again
+
+    Only failures that can pass by themselves are repeated:
+    server errors (5xx), throttling (429, 503), timeouts and lost
+    connections. By default only requests that don't change
+    anything are repeated (reading methods like ``get_*`` and
+    ``ping``), others could be done twice
+
+    EXAMPLE::
+
+        client = aiocai.Client('TOKEN', retry=RetryPolicy(
+            retries=5, deadline=60
+        ))
+
+    Args:
+        retries (``int``, *optional*):
+            Maximum number of repeats
+
+        backoff (:obj:`~characterai.backoff.Backoff`, *optional*):
+            Delays between repeats. ``Retry-After``
+            from the server is used if it is longer
+
+        deadline (``float``, *optional*):
+            Seconds from the first attempt after
+            which the request is not repeated
+
+        statuses (Set of ``int``, *optional*):
+            Response codes that are repeated
+
+        idempotent (``bool``, *optional*):
+            Repeat only requests that don't change anything
+
+    Parameters:
+        retried (``int``):
+            How many times requests were repeated
+    """
+    def __init__(
+        self, retries: int = 3, backoff: Backoff = None,
+        deadline: float = 30,
+        statuses: set = STATUSES,
+        idempotent: bool = True
+    ):
+        self.retries = retries
+        self.backoff = backoff or Backoff(base=0.5, limit=10)
+        self.deadline = deadline
+        self.statuses = statuses
+        self.idempotent = idempotent
+
+        self.retried = 0
+
+    def classify(self, error: BaseException) -> str:
+        """Kind of the failure, see :obj:`classify`"""
+        return classify(error, self.statuses)
+
+    def delay(
+        self, error: BaseException,
+        attempt: int, start: float
+    ) -> float:
+        """Seconds to wait before the next attempt
+
+        Returns:
+            ``None`` if the request shouldn't be repeated
+        """
+        if attempt >= self.retries or self.classify(error) is None:
+            return None
+
+        delay = max(
+            self.backoff.delay(attempt),
+            getattr(error, 'retry_after', None) or 0
+        )
+
+        if time.monotonic() + delay - start > self.deadline:
+            return None
+
+        self.retried += 1
+
+        return delay
+
+def classify(
+    error: BaseException, statuses: set = STATUSES
+) -> str:
+    """Kind of the failure
+
+    Returns:
+        ``throttled``, ``server``, ``timeout``,
+        ``connection`` or ``None`` if it shouldn't be repeated
+    """
+    # The time is over, repeating won't help
+    if isinstance(error, DeadlineError):
+        return None
+
+    if isinstance(error, ServerError):
+        if error.status in statuses:
+            return 'throttled' \
+                if error.status in (429, 503) else 'server'
+
+    code = getattr(error, 'code', None) \
+        if isinstance(error, CurlError) else None
+
+    if code in TIMEOUT or isinstance(
+        error, (TimeoutError, asyncio.TimeoutError)
+    ):
+        return 'timeout'
+
+    if code in CONNECTION or isinstance(error, (
+        ConnectionError, exceptions.ConnectionClosed
+    )):
+        return 'connection'
+
+    return None
+
+def retryAfter(value: str) -> float:
+    """Seconds from the ``Retry-After`` header"""
+    if not value:
+        return None
+
+    try:
+        return max(float(value), 0)
+    except ValueError:
+        ...
+
+    try:
+        date = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+
+    return max((
+        date - datetime.now(timezone.utc)
+    ).total_seconds(), 0)
@@ -0,0 +1,195 @@
+import sqlite3
+import threading
+import json
+
+from .types import chat1, chat2
+from . import codec
+
+class Store:
+    """Local copy of chat histories in SQLite
+
+    ``sync_history`` of chat1 and chat2 saves new messages
+    here, after that the history is read without requests
+
+    EXAMPLE::
+
+        store = Store('history.db')
+
+        async with await client.connect() as chat:
+            await chat.sync_history('CHAT_ID', store)
+
+        for turn in store.turns('CHAT_ID', limit=20):
+            print(turn.candidates[0].raw_content)
+
+    Args:
+        path (``str``, *optional*):
+            Database file, by default it is kept in memory
+    """
+    def __init__(self, path: str = ':memory:'):
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(
+            path, check_same_thread=False
+        )
+
+        with self.db:
+            self.db.executescript('''
+                CREATE TABLE IF NOT EXISTS turns (
+                    chat_id TEXT NOT NULL,
+                    turn_id TEXT NOT NULL,
+                    create_time TEXT NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (chat_id, turn_id)
+                );
+
+                CREATE INDEX IF NOT EXISTS turns_time
+                ON turns (chat_id, create_time);
+
+                CREATE TABLE IF NOT EXISTS messages (
+                    chat_id TEXT NOT NULL,
+                    id INTEGER NOT NULL,
+                    data TEXT NOT NULL,
+                    PRIMARY KEY (chat_id, id)
+                );
+            ''')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def add_turns(self, turns: list) -> int:
+        """Save chat2 turns as they came from the server
+
+        Returns the number of turns that were not saved before
+        """
+        return self._add('turns', [(
+            t['turn_key']['chat_id'], t['turn_key']['turn_id'],
+            t['create_time'], json.dumps(t)
+        ) for t in turns])
+
+    def add_messages(
+        self, chat_id: str, messages: list
+    ) -> int:
+        """Save chat1 messages as they came from the server
+
+        Returns the number of messages that were not saved before
+        """
+        return self._add('messages', [
+            (chat_id, m['id'], json.dumps(m))
+            for m in messages
+        ])
+
+    def turns(
+        self, chat_id: str, *, limit: int = None,
+        compact: bool = False
+    ) -> list:
+        """Saved chat2 turns, from the newest one
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            limit (``int``, *optional*):
+                Maximum number of turns
+
+            compact (``bool``, *optional*):
+                Return :obj:`~characterai.types.chat2.CompactTurn`,
+                several times smaller in memory
+
+        Returns:
+            List of :obj:`~characterai.types.chat2.TurnData`
+            or :obj:`~characterai.types.chat2.CompactTurn`
+        """
+        if compact:
+            parse = lambda data: chat2.CompactTurn.from_dict(
+                codec.loads(data)
+            )
+        else:
+            parse = chat2.TurnData.model_validate_json
+
+        return [
+            parse(row[0])
+            for row in self._select(
+                'SELECT data FROM turns WHERE chat_id = ? '
+                'ORDER BY create_time DESC, rowid DESC',
+                chat_id, limit
+            )
+        ]
+
+    def messages(
+        self, chat_id: str, *, limit: int = None
+    ) -> list:
+        """Saved chat1 messages, from the newest one
+
+        Args:
+            chat_id (``str``):
+                Chat ID
+
+            limit (``int``, *optional*):
+                Maximum number of messages
+
+        Returns:
+            List of :obj:`~characterai.types.chat1.HisMessage`
+        """
+        return [
+            chat1.HisMessage.model_validate_json(row[0])
+            for row in self._select(
+                'SELECT data FROM messages WHERE chat_id = ? '
+                'ORDER BY id DESC',
+                chat_id, limit
+            )
+        ]
+
+    def delete(self, chat_id: str):
+        """Remove everything saved for the chat"""
+        with self.lock, self.db:
+            self.db.execute(
+                'DELETE FROM turns WHERE chat_id = ?',
+                (chat_id,)
+            )
+            self.db.execute(
+                'DELETE FROM messages WHERE chat_id = ?',
+                (chat_id,)
+            )
+
+    def close(self):
+        with self.lock:
+            self.db.close()
+
+    def _add(self, table: str, rows: list) -> int:
+        if not rows:
+            return 0
+
+        places = ', '.join('?' * len(rows[0]))
+
+        with self.lock, self.db:
+            before = self.db.total_changes
+
+            self.db.executemany(
+                f'INSERT OR IGNORE INTO {table} VALUES ({places})',
+                rows
+            )
+
+            added = self.db.total_changes - before
+
+            # Messages that were already saved
+            # could have been edited since then
+            self.db.executemany(
+                f'UPDATE {table} SET data = ? '
+                'WHERE chat_id = ? AND ' + (
+                    'turn_id' if table == 'turns' else 'id'
+                ) + ' = ?',
+                [(r[-1], r[0], r[1]) for r in rows]
+            )
+
+        return added
+
+    def _select(
+        self, query: str, chat_id: str, limit: int
+    ) -> list:
+        with self.lock:
+            return self.db.execute(
+                query + ' LIMIT ?',
+                (chat_id, -1 if limit is None else limit)
+            ).fetchall()
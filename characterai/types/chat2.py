@@ -1,6 +1,7 @@
-from pydantic import BaseModel
-from datetime import datetime
+from pydantic import BaseModel, TypeAdapter
+from datetime import datetime, timedelta, timezone
 from typing import List, Optional
+import sys
 
 class Author(BaseModel):
     """Message author
@@ -52,7 +53,7 @@ class Candidate(BaseModel):
         editor (:obj:`~characterai.types.chat2.Editor`):
             Information about who modified the message
         
-        is_final (``bool``):
+        is_final (``bool``, *optional*):
             Is this the last chunk of the message
         
         base_candidate_id (``str``):
@@ -62,7 +63,7 @@ class Candidate(BaseModel):
     create_time: datetime
     raw_content: str
     editor: Optional[Editor] = None
-    is_final: bool
+    is_final: bool = False
     base_candidate_id: Optional[str] = None
 
 class BotAnswer(BaseModel):
@@ -190,7 +191,7 @@ class ChatData(BaseModel):
     preview_turns: Optional[List[TurnData]] = None
 
 class Meta(BaseModel):
-    next_token: str
+    next_token: Optional[str] = None
 
 class History(BaseModel):
     """Chat history
@@ -202,4 +203,213 @@ class History(BaseModel):
         I don't know what it is, maybe someone could use it
     """
     turns: List[TurnData]
-    meta: Meta
\ No newline at end of file
+    meta: Meta
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+MICROSECOND = timedelta(microseconds=1)
+
+class CompactTurn:
+    """Chat message that takes little memory
+
+    Made for holding millions of messages: no dict and no
+    nested models, dates are microseconds since 1970 (UTC),
+    chat IDs, authors and states are shared between messages.
+    Read-only, the full model is made with :obj:`to_model`
+
+    EXAMPLE::
+
+        turns = [
+            turn async for turn in client.iter_history(
+                'CHAT_ID', compact=True
+            )
+        ]
+
+        print(turns[0].text, turns[0].author_name)
+
+    Parameters:
+        chat_id (``str``):
+            Chat ID
+
+        turn_id (``str``):
+            Message ID
+
+        create_time (``int``):
+            Date of message creation in microseconds
+
+        last_update_time (``int``):
+            Date of message update in microseconds
+
+        state (``str``):
+            Message state
+
+        author_id (``str``):
+            Account ID of the author
+
+        author_name (``str``):
+            Name of the author
+
+        is_human (``bool``, *optional*):
+            Is the author an account
+
+        primary_candidate_id (``str``):
+            ID of the shown candidate
+
+        candidates (Tuple of ``tuple``):
+            ``(candidate_id, create_time, raw_content,
+            is_final, base_candidate_id, editor)``,
+            ``editor`` is ``(author_id, name)`` or ``None``
+    """
+    __slots__ = (
+        'chat_id', 'turn_id', 'create_time', 'last_update_time',
+        'state', 'author_id', 'author_name', 'is_human',
+        'primary_candidate_id', 'candidates'
+    )
+
+    def __init__(
+        self, chat_id: str, turn_id: str, create_time: int,
+        last_update_time: int, state: str, author_id: str,
+        author_name: str, is_human: Optional[bool],
+        primary_candidate_id: str, candidates: tuple
+    ):
+        init = object.__setattr__
+
+        init(self, 'chat_id', sys.intern(chat_id))
+        init(self, 'turn_id', turn_id)
+        init(self, 'create_time', create_time)
+        init(self, 'last_update_time', last_update_time)
+        init(self, 'state', sys.intern(state))
+        init(self, 'author_id', sys.intern(author_id))
+        init(self, 'author_name', sys.intern(author_name))
+        init(self, 'is_human', is_human)
+        init(self, 'primary_candidate_id', primary_candidate_id)
+        init(self, 'candidates', candidates)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('CompactTurn is read-only')
+
+    def __delattr__(self, name):
+        raise AttributeError('CompactTurn is read-only')
+
+    def __repr__(self):
+        return (
+            f'CompactTurn(turn_id={self.turn_id!r}, '
+            f'author_name={self.author_name!r}, text={self.text!r})'
+        )
+
+    def __eq__(self, other):
+        if not isinstance(other, CompactTurn):
+            return NotImplemented
+
+        return all(
+            getattr(self, name) == getattr(other, name)
+            for name in self.__slots__
+        )
+
+    def __hash__(self):
+        return hash((self.chat_id, self.turn_id, self.last_update_time))
+
+    @classmethod
+    def from_dict(cls, turn: dict) -> 'CompactTurn':
+        """Make it from a turn of the server answer"""
+        key = turn['turn_key']
+        author = turn['author']
+
+        return cls(
+            key['chat_id'], key['turn_id'],
+            micros(turn['create_time']),
+            micros(turn['last_update_time']),
+            turn['state'], author['author_id'],
+            author['name'], author.get('is_human'),
+            turn['primary_candidate_id'], tuple(
+                compact_candidate(c) for c in turn['candidates']
+            )
+        )
+
+    @property
+    def text(self) -> str:
+        """Text of the shown candidate"""
+        for candidate in self.candidates:
+            if candidate[0] == self.primary_candidate_id:
+                return candidate[2]
+
+        return self.candidates[0][2] if self.candidates else None
+
+    def to_dict(self) -> dict:
+        """The turn as it came from the server"""
+        return {
+            'turn_key': {
+                'chat_id': self.chat_id,
+                'turn_id': self.turn_id
+            },
+            'create_time': isoformat(self.create_time),
+            'last_update_time': isoformat(self.last_update_time),
+            'state': self.state,
+            'author': {
+                'author_id': self.author_id,
+                'name': self.author_name,
+                'is_human': self.is_human
+            },
+            'candidates': [
+                {
+                    'candidate_id': candidate_id,
+                    'create_time': isoformat(create_time),
+                    'raw_content': raw_content,
+                    'is_final': is_final,
+                    'base_candidate_id': base_candidate_id,
+                    'editor': None if editor is None else {
+                        'author_id': editor[0],
+                        'name': editor[1]
+                    }
+                }
+                for candidate_id, create_time, raw_content,
+                    is_final, base_candidate_id, editor
+                in self.candidates
+            ],
+            'primary_candidate_id': self.primary_candidate_id
+        }
+
+    def to_model(self) -> TurnData:
+        """Full :obj:`~characterai.types.chat2.TurnData`"""
+        return TurnData.model_validate(self.to_dict())
+
+def compact_candidate(candidate: dict) -> tuple:
+    editor = candidate.get('editor')
+
+    if editor:
+        name = editor.get('name')
+        editor = (
+            sys.intern(editor['author_id']),
+            sys.intern(name) if name else name
+        )
+
+    return (
+        candidate['candidate_id'],
+        micros(candidate['create_time']),
+        candidate['raw_content'],
+        bool(candidate.get('is_final', False)),
+        candidate.get('base_candidate_id'),
+        editor or None
+    )
+
+datetimes = TypeAdapter(datetime)
+
+def micros(value) -> int:
+    """Microseconds since 1970 (UTC) from an ISO date"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(
+                value[:-1] + '+00:00' if value.endswith('Z') else value
+            )
+        except ValueError:
+            # Precision that older Pythons can't read
+            value = datetimes.validate_python(value)
+
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+
+    return (value - EPOCH) // MICROSECOND
+
+def isoformat(value: int) -> str:
+    return (
+        EPOCH + value * MICROSECOND
+    ).strftime('%Y-%m-%dT%H:%M:%S.%fZ')
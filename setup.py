@@ -13,7 +13,8 @@ setup(
     url='https://github.com/kramcat/characterai',
     author='kramcat',
     license='MIT',
-    install_requires=['pydantic', 'curl_cffi', 'websockets'],
+    install_requires=['pydantic', 'curl_cffi>=0.7,<0.17', 'websockets'],
+    extras_require={'fast': ['orjson']},
     packages=find_packages(include=['characterai*']),
     project_urls={
         'Community': 'https://discord.gg/ZHJe3tXQkf',
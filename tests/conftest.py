@@ -0,0 +1,338 @@
+import asyncio
+import json
+import queue
+import threading
+import time
+
+import pytest
+from websockets import exceptions
+
+from characterai import aiocai, pycai
+from characterai.aiocai.methods import chat2 as aio_chat2
+from characterai.pycai.methods import chat2 as sync_chat2
+
+class Response:
+    """Answer of :obj:`Session`, like the one of curl_cffi"""
+    def __init__(
+        self, data: dict = None, status: int = 200,
+        delay: float = 0, headers: dict = None, lines: list = None
+    ):
+        self.data = {} if data is None else data
+        self.status_code = status
+        self.delay = delay
+        self.headers = headers or {}
+        self.lines = [json.dumps(line).encode() for line in lines or []]
+        self.quit_now = threading.Event()
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        return json.dumps(self.data).encode()
+
+    @property
+    def text(self) -> str:
+        return self.content.decode()
+
+    def json(self) -> dict:
+        return self.data
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            yield line
+
+    def iter_lines(self):
+        return iter(self.lines)
+
+    async def aclose(self):
+        ...
+
+    def close(self):
+        ...
+
+class Session:
+    """Session that answers requests with ``answer(method, url, kwargs)``,
+    which returns a :obj:`Response` or a list of them, one per attempt"""
+    def __init__(self, answer=None):
+        self.answer = answer or (lambda *args: Response())
+        self.calls = []
+
+    def respond(self, method: str, url: str, kwargs: dict) -> Response:
+        self.calls.append((method, url, kwargs))
+        res = self.answer(method, url, kwargs)
+
+        if isinstance(res, list):
+            res = res[min(len(self.calls), len(res)) - 1]
+
+        return res
+
+class AsyncSession(Session):
+    async def request(self, method: str, url: str, **kwargs):
+        res = self.respond(method, url, kwargs)
+        await asyncio.sleep(res.delay)
+        return res
+
+    async def get(self, url: str, **kwargs):
+        return await self.request('GET', url, **kwargs)
+
+    async def post(self, url: str, **kwargs):
+        return await self.request('POST', url, **kwargs)
+
+    async def put(self, url: str, **kwargs):
+        return await self.request('PUT', url, **kwargs)
+
+    async def close(self):
+        ...
+
+class SyncSession(Session):
+    def request(self, method: str, url: str, **kwargs):
+        res = self.respond(method, url, kwargs)
+        time.sleep(res.delay)
+        return res
+
+    def get(self, url: str, **kwargs):
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url: str, **kwargs):
+        return self.request('POST', url, **kwargs)
+
+    def put(self, url: str, **kwargs):
+        return self.request('PUT', url, **kwargs)
+
+    def close(self):
+        ...
+
+def use(client, session):
+    client.session = client.chat1.session = session
+    return client
+
+@pytest.fixture
+def aio_client():
+    """``aio_client(answer, **options)`` makes an aiocai client
+    whose requests are answered by :obj:`AsyncSession`"""
+    def make(answer=None, **options):
+        options.setdefault('models', 'raw')
+        return use(
+            aiocai.Client('TOKEN', **options), AsyncSession(answer)
+        )
+
+    return make
+
+@pytest.fixture
+def sync_client():
+    """The same as ``aio_client`` for pycai"""
+    def make(answer=None, **options):
+        options.setdefault('models', 'raw')
+        return use(
+            pycai.Client('TOKEN', **options), SyncSession(answer)
+        )
+
+    return make
+
+def turn(
+    chat_id: str, turn_id: str, text: str,
+    final: bool = True, human: bool = False
+) -> dict:
+    candidate = {
+        'candidate_id': turn_id + '-c',
+        'create_time': '2024-05-01T12:00:00Z',
+        'raw_content': text
+    }
+
+    if final:
+        candidate['is_final'] = True
+
+    return {
+        'turn_key': {'chat_id': chat_id, 'turn_id': turn_id},
+        'create_time': '2024-05-01T12:00:00Z',
+        'last_update_time': '2024-05-01T12:00:00Z',
+        'state': 'STATE_OK',
+        'author': {
+            'author_id': '1' if human else 'CHAR',
+            'name': 'Me' if human else 'Char',
+            'is_human': human
+        },
+        'candidates': [candidate],
+        'primary_candidate_id': turn_id + '-c'
+    }
+
+class Server:
+    """The chat2 side of :obj:`Socket`
+
+    A generation answers with the turn of the user and then
+    the answer of the character word by word, ``delay``
+    seconds apart. ``echo`` adds ``request_id`` to the frames
+    """
+    def __init__(self):
+        self.echo = True
+        self.delay = 0.01
+        self.silent = False
+        self.sockets = []
+        self.sent = []
+        self.count = 0
+
+    def answer(self, frame: dict) -> list:
+        """Frames and pauses (``float``) sent after ``frame``"""
+        self.sent.append(frame)
+
+        command = frame['command']
+        payload = frame['payload']
+        extra = {'request_id': frame['request_id']} if self.echo else {}
+
+        if self.silent or command == 'abort_generation':
+            return []
+
+        if command == 'create_and_generate_turn':
+            self.count += 1
+            chat_id = payload['turn']['turn_key']['chat_id']
+            text = payload['turn']['candidates'][0]['raw_content']
+            words = ('echo ' + text).split()
+
+            frames = [{
+                'command': 'add_turn', **extra,
+                'turn': turn(chat_id, f'u{self.count}', text, human=True)
+            }]
+
+            for i in range(1, len(words) + 1):
+                frames += [self.delay, {
+                    'command': 'update_turn', **extra,
+                    'turn': turn(
+                        chat_id, f'b{self.count}',
+                        ' '.join(words[:i]), i == len(words)
+                    )
+                }]
+
+            return frames
+
+        if command == 'edit_turn_candidate':
+            key = payload['turn_key']
+
+            return [{
+                'command': 'update_turn', **extra,
+                'turn': turn(
+                    key['chat_id'], key['turn_id'],
+                    payload['new_candidate_raw_content'], human=True
+                )
+            }]
+
+        if command == 'remove_turns':
+            return [{
+                'command': 'remove_turns_response',
+                'chat_id': payload['chat_id'], **extra
+            }]
+
+        return []
+
+    def commands(self, name: str) -> list:
+        return [f for f in self.sent if f['command'] == name]
+
+class Socket:
+    """WebSocket of aiocai connected to :obj:`Server`"""
+    def __init__(self, server: Server):
+        self.server = server
+        self.frames = asyncio.Queue()
+        self.tasks = set()
+        self.closed = False
+
+    async def send(self, message: str):
+        if self.closed:
+            raise exceptions.ConnectionClosed(None, None)
+
+        task = asyncio.ensure_future(
+            self.play(self.server.answer(json.loads(message)))
+        )
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    async def play(self, frames: list):
+        for frame in frames:
+            if isinstance(frame, float):
+                await asyncio.sleep(frame)
+            elif not self.closed:
+                self.frames.put_nowait(json.dumps(frame))
+
+    def drop(self):
+        """The server closes the connection"""
+        self.closed = True
+        self.frames.put_nowait(None)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self) -> str:
+        message = await self.frames.get()
+
+        if message is None:
+            raise StopAsyncIteration
+
+        return message
+
+    async def close(self):
+        if not self.closed:
+            self.drop()
+
+        for task in self.tasks:
+            task.cancel()
+
+class SyncSocket:
+    """WebSocket of pycai connected to :obj:`Server`"""
+    def __init__(self, server: Server):
+        self.server = server
+        self.frames = queue.Queue()
+        self.closed = False
+
+    def send(self, message: str):
+        if self.closed:
+            raise exceptions.ConnectionClosed(None, None)
+
+        frames = self.server.answer(json.loads(message))
+
+        threading.Thread(
+            target=self.play, args=(frames,), daemon=True
+        ).start()
+
+    def play(self, frames: list):
+        for frame in frames:
+            if isinstance(frame, float):
+                time.sleep(frame)
+            elif not self.closed:
+                self.frames.put(json.dumps(frame).encode())
+
+    def recv(self, timeout: float = None, decode: bool = None):
+        try:
+            message = self.frames.get(timeout=timeout)
+        except queue.Empty:
+            raise TimeoutError
+
+        if message is None:
+            raise exceptions.ConnectionClosed(None, None)
+
+        return message
+
+    def drop(self):
+        self.closed = True
+        self.frames.put(None)
+
+    def close(self):
+        if not self.closed:
+            self.drop()
+
+@pytest.fixture
+def server(monkeypatch):
+    """:obj:`Server` that both ``connect`` methods are connected to"""
+    server = Server()
+
+    async def connect(url, **kwargs):
+        server.sockets.append(Socket(server))
+        return server.sockets[-1]
+
+    def connect_sync(url, **kwargs):
+        server.sockets.append(SyncSocket(server))
+        return server.sockets[-1]
+
+    monkeypatch.setattr(aio_chat2.websockets, 'connect', connect)
+    monkeypatch.setattr(sync_chat2.websockets, 'connect', connect_sync)
+
+    return server
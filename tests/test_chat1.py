@@ -0,0 +1,55 @@
+import asyncio
+
+import pytest
+
+from characterai.errors import ServerError
+
+from conftest import Response
+
+def message(text: str) -> dict:
+    return {
+        'replies': [{'text': text, 'id': 1}],
+        'src_char': {'participant': {'name': 'Char'}},
+        'is_final_chunk': False, 'last_user_msg_id': 1
+    }
+
+def answer(*texts):
+    return lambda *args: Response(lines=[message(t) for t in texts])
+
+def test_send_message_returns_last_chunk(aio_client):
+    client = aio_client(answer('Hel', 'Hello'))
+
+    res = asyncio.run(client.chat1.send_message(
+        'CHAT_ID', 'TGT', 'text', timeout=5
+    ))
+
+    assert res['replies'][0]['text'] == 'Hello'
+
+    _, _, kwargs = client.session.calls[0]
+
+    # The timeout is not a field of the message
+    assert 'timeout' not in kwargs['json']
+
+@pytest.mark.parametrize('method, args', [
+    ('send_message', ('CHAT_ID', 'TGT', 'text')),
+    ('next_message', ('CHAT_ID', 'TGT', 'UUID'))
+])
+def test_empty_answer_raises(aio_client, method, args):
+    client = aio_client(answer())
+
+    with pytest.raises(ServerError):
+        asyncio.run(getattr(client.chat1, method)(*args))
+
+def test_sync_send_message(sync_client):
+    client = sync_client(answer('Hel', 'Hello'))
+
+    res = client.chat1.send_message('CHAT_ID', 'TGT', 'text', timeout=5)
+
+    assert res['replies'][0]['text'] == 'Hello'
+    assert 'timeout' not in client.session.calls[0][2]['json']
+
+def test_sync_empty_answer_raises(sync_client):
+    client = sync_client(answer())
+
+    with pytest.raises(ServerError):
+        client.chat1.next_message('CHAT_ID', 'TGT', 'UUID')
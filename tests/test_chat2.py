@@ -0,0 +1,182 @@
+import asyncio
+import threading
+
+import pytest
+
+from characterai import aiocai, pycai
+from characterai import store as stores
+from characterai.aiocai import client as aio_client
+from characterai.pycai import client as sync_client
+from characterai.backoff import Backoff
+from characterai.errors import ConnectionLostError, DeadlineError
+
+from conftest import AsyncSession, Response, SyncSession, turn
+
+def quick() -> Backoff:
+    return Backoff(base=0.01, limit=0.01, retries=3)
+
+@pytest.mark.parametrize('echo', [True, False])
+def test_answers_go_to_their_calls(server, echo):
+    server.echo = echo
+
+    async def main():
+        async with await aiocai.Client('TOKEN').connect() as chat:
+            return await asyncio.gather(*(
+                chat.send_message('CHAR', f'chat-{i}', f'text {i}')
+                for i in range(10)
+            ))
+
+    answers = asyncio.run(main())
+
+    assert [a.text for a in answers] == [
+        f'echo text {i}' for i in range(10)
+    ]
+
+def test_cancelled_command_doesnt_leak_into_next_one(server):
+    server.delay = 0.02
+
+    async def main():
+        async with await aiocai.Client('TOKEN').connect() as chat:
+            task = asyncio.ensure_future(chat.send_message(
+                'CHAR', 'CHAT_ID', 'a long message of many words'
+            ))
+            await asyncio.sleep(0.05)
+            task.cancel()
+
+            return await chat.send_message('CHAR', 'CHAT_ID', 'next')
+
+    answer = asyncio.run(main())
+
+    assert answer.text == 'echo next'
+    assert server.commands('abort_generation')
+
+def test_command_deadline(server):
+    server.silent = True
+
+    async def main():
+        async with await aiocai.Client('TOKEN').connect() as chat:
+            await chat.send_message('CHAR', 'CHAT_ID', 'text', timeout=0.05)
+
+    with pytest.raises(DeadlineError):
+        asyncio.run(main())
+
+def test_lost_connection_repeats_idempotent_commands(server):
+    async def main():
+        chat = await aiocai.Client('TOKEN').connect(reconnect=quick())
+
+        server.silent = True
+        task = asyncio.ensure_future(
+            chat.edit_message('CHAT_ID', 'TURN_ID', 'edited')
+        )
+        await asyncio.sleep(0.02)
+
+        server.silent = False
+        server.sockets[-1].drop()
+
+        try:
+            return await asyncio.wait_for(task, 1)
+        finally:
+            await chat.close()
+
+    answer = asyncio.run(main())
+
+    assert answer.text == 'edited'
+    assert len(server.sockets) == 2
+    assert len(server.commands('edit_turn_candidate')) == 2
+
+def test_lost_connection_fails_generations(server):
+    async def main():
+        chat = await aiocai.Client('TOKEN').connect(reconnect=quick())
+
+        server.silent = True
+        task = asyncio.ensure_future(
+            chat.send_message('CHAR', 'CHAT_ID', 'text')
+        )
+        await asyncio.sleep(0.02)
+        server.sockets[-1].drop()
+
+        try:
+            return await asyncio.wait_for(task, 1)
+        finally:
+            await chat.close()
+
+    with pytest.raises(ConnectionLostError):
+        asyncio.run(main())
+
+    assert len(server.commands('create_and_generate_turn')) == 1
+
+def test_every_connect_opens_its_own_connection(server):
+    async def main():
+        first = await aiocai.connect('FIRST', mirror=True)
+        second = await aiocai.connect('SECOND')
+
+        try:
+            assert first is not second
+            assert (first.token, second.token) == ('FIRST', 'SECOND')
+            assert second.mirror is None
+            assert aiocai.connect.state is None
+        finally:
+            await first.close()
+            await second.close()
+
+    asyncio.run(main())
+
+    assert len(server.sockets) == 2
+
+def test_sync_answers_go_to_their_calls(server):
+    answers = {}
+
+    with pycai.Client('TOKEN').connect() as chat:
+        def send(i):
+            answers[i] = chat.send_message(
+                'CHAR', f'chat-{i}', f'text {i}'
+            ).text
+
+        threads = [
+            threading.Thread(target=send, args=(i,)) for i in range(5)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+    assert answers == {i: f'echo text {i}' for i in range(5)}
+
+def test_sync_command_deadline(server):
+    server.silent = True
+
+    with pycai.Client('TOKEN').connect() as chat:
+        with pytest.raises(DeadlineError):
+            chat.send_message('CHAR', 'CHAT_ID', 'text', timeout=0.05)
+
+def history(method: str, url: str, kwargs: dict) -> Response:
+    return Response({
+        'turns': [turn('CHAT_ID', f't{i}', f'text {i}') for i in range(3)],
+        'meta': {'next_token': None}
+    })
+
+def test_history_methods_work_on_a_connection(server, monkeypatch):
+    monkeypatch.setattr(
+        aio_client, 'AsyncSession', lambda **kwargs: AsyncSession(history)
+    )
+    store = stores.Store()
+
+    async def main():
+        async with await aiocai.connect('HISTORY') as chat:
+            return await chat.sync_history('CHAT_ID', store)
+
+    assert asyncio.run(main()) == 3
+    assert len(store.turns('CHAT_ID')) == 3
+
+def test_sync_history_methods_work_on_a_connection(server, monkeypatch):
+    monkeypatch.setattr(
+        sync_client, 'Session', lambda **kwargs: SyncSession(history)
+    )
+    store = stores.Store()
+
+    with pycai.connect('HISTORY') as chat:
+        assert chat.sync_history('CHAT_ID', store) == 3
+
+    assert len(store.turns('CHAT_ID')) == 3
@@ -0,0 +1,104 @@
+import os
+
+import pytest
+
+from characterai import archive, export, models
+from characterai.types import chat2
+
+from conftest import turn
+
+def chat(chat_id: str) -> dict:
+    return {
+        'chat_id': chat_id, 'create_time': '2024-05-01T12:00:00Z',
+        'creator_id': '1', 'character_id': 'CHAR',
+        'state': 'STATE_ACTIVE', 'type': 'TYPE_ONE_ON_ONE',
+        'visibility': 'VISIBILITY_PRIVATE'
+    }
+
+@pytest.mark.parametrize('name', [
+    'histories.jsonl', 'histories.jsonl.gz', 'histories.jsonl.xz'
+])
+def test_export_continues_from_checkpoint(tmp_path, name):
+    path = str(tmp_path / name)
+
+    with export.Export(path) as file:
+        file.add_chat(chat('A'))
+        file.add_turns([turn('A', 'a1', 'one')])
+        file.save('A')
+
+        file.add_chat(chat('B'))
+        file.add_turns([turn('B', 'b2', 'two')])
+        file.save('B', 'TOKEN')
+
+        # Written after the last save, so it is lost
+        file.add_turns([turn('B', 'lost', 'lost')])
+
+    file = export.Export(path)
+
+    assert file.resume('A') == (None, None)
+    assert file.resume('B') == (True, 'TOKEN')
+    assert file.resume('C') == (False, None)
+    assert file.turns == 2
+
+    file.add_turns([turn('B', 'b1', 'three')])
+    file.save('B')
+    file.finish()
+
+    assert not os.path.exists(path + '.checkpoint')
+
+    items = list(export.read(path, compact=True))
+
+    assert [
+        item.turn_id if isinstance(item, chat2.CompactTurn)
+        else item.chat_id for item in items
+    ] == ['A', 'a1', 'B', 'b2', 'b1']
+
+def test_export_read_models(tmp_path):
+    path = str(tmp_path / 'histories.jsonl')
+
+    with export.Export(path) as file:
+        file.add_chat(chat('A'))
+        file.add_turns([turn('A', 'a1', 'one')])
+        file.save('A')
+
+    first, second = export.read(path)
+
+    assert isinstance(first, chat2.ChatData)
+    assert isinstance(second, chat2.TurnData)
+    assert second.candidates[0].raw_content == 'one'
+
+def test_archive_finds_turns(tmp_path):
+    path = str(tmp_path / 'chats.arc')
+
+    with archive.Writer(path) as writer:
+        writer.add_turns([turn('A', f'a{i}', f'text {i}') for i in range(5)])
+        writer.add_turns([turn('B', 'b0', 'other')])
+
+    # Added later, replaces the old turn
+    with archive.Writer(path) as writer:
+        writer.add_turns([turn('A', 'a2', 'changed')])
+
+    with archive.Reader(path) as reader:
+        assert len(reader) == 6
+        assert ('A', 'a4') in reader
+        assert ('A', 'nothing') not in reader
+        assert reader.turn('A', 'a2').candidates[0].raw_content == 'changed'
+        assert reader.turn('C', 'a2') is None
+
+        assert len(reader.turns('A')) == 5
+        assert [t.turn_id for t in reader.turns('B', compact=True)] == ['b0']
+
+def test_archive_adds_export(tmp_path):
+    path = str(tmp_path / 'histories.jsonl.gz')
+
+    with export.Export(path) as file:
+        file.add_chat(chat('A'))
+        file.add_turns([turn('A', f'a{i}', 'text') for i in range(3)])
+        file.save('A')
+
+    with archive.Writer(str(tmp_path / 'chats.arc')) as writer:
+        assert writer.add_export(path) == 3
+
+    with archive.Reader(str(tmp_path / 'chats.arc')) as reader, \
+    models.mode('raw'):
+        assert reader.turn('A', 'a1')['turn_key']['turn_id'] == 'a1'
@@ -0,0 +1,44 @@
+import asyncio
+import time
+
+import pytest
+
+from characterai.errors import DeadlineError
+from characterai.limiter import RateLimiter
+
+from conftest import Response
+
+def test_rejected_request_takes_no_token():
+    limiter = RateLimiter(rate=10, burst=1)
+
+    assert limiter.reserve('TOKEN', 'plus') == 0
+
+    # The next token is free in 0.1 seconds
+    assert limiter.reserve('TOKEN', 'plus', time.monotonic() + 0.01) is None
+
+    delay = limiter.reserve('TOKEN', 'plus')
+
+    assert 0 < delay <= 0.1
+    assert limiter.requests == 2
+
+def test_request_that_cant_wait_fails_at_once(aio_client):
+    client = aio_client(
+        lambda *args: Response(), limiter=RateLimiter(rate=1, burst=1)
+    )
+
+    async def main():
+        await client.request('chat/user/update/', data={'a': 1})
+        start = time.monotonic()
+
+        with pytest.raises(DeadlineError):
+            await client.request(
+                'chat/user/update/', data={'a': 1}, timeout=0.05
+            )
+
+        # Not after waiting for the whole timeout
+        assert time.monotonic() - start < 0.04
+
+    asyncio.run(main())
+
+    assert len(client.session.calls) == 1
+    assert client.limiter.requests == 1
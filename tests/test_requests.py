@@ -0,0 +1,243 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from characterai import deadline
+from characterai.backoff import Backoff
+from characterai.errors import DeadlineError, ServerError
+from characterai.limiter import AdaptiveLimit
+from characterai.retry import RetryPolicy
+
+from conftest import Response
+
+def fast_retry() -> RetryPolicy:
+    return RetryPolicy(backoff=Backoff(base=0.01, limit=0.01))
+
+def test_requests_are_routed_by_method(aio_client):
+    client = aio_client(lambda *args: Response({'ok': 1}))
+
+    async def main():
+        await client.request('chat/user/')
+        await client.request('chat/character/', data={'external_id': 'CHAR'})
+        await client.request('recent', neo=True)
+
+    asyncio.run(main())
+
+    (get, url, _), (post, post_url, kwargs), (_, neo_url, _) = \
+        client.session.calls
+
+    assert (get, post) == ('GET', 'POST')
+    assert url == 'https://plus.character.ai/chat/user/'
+    assert post_url == 'https://plus.character.ai/chat/character/'
+    assert kwargs['json'] == {'external_id': 'CHAR'}
+    assert kwargs['headers']['Authorization'] == 'Token TOKEN'
+    assert neo_url == 'https://neo.character.ai/recent'
+
+def test_failed_request_raises(aio_client):
+    client = aio_client(lambda *args: Response({}, status=500))
+
+    with pytest.raises(ServerError):
+        asyncio.run(client.request('chat/user/'))
+
+def test_identical_reads_share_one_request(aio_client):
+    client = aio_client(lambda *args: Response({'n': 1}, delay=0.05))
+
+    async def main():
+        return await asyncio.gather(*(
+            client.request('chat/user/') for _ in range(5)
+        ))
+
+    results = asyncio.run(main())
+
+    assert len(client.session.calls) == 1
+    assert results == [{'n': 1}] * 5
+
+    # Each caller can change its answer
+    results[0]['n'] = 2
+    assert results[1] == {'n': 1}
+    assert len({id(res) for res in results}) == 5
+
+def test_writes_are_not_shared(aio_client):
+    client = aio_client(lambda *args: Response({}, delay=0.02))
+
+    async def main():
+        await asyncio.gather(*(
+            client.request('chat/user/update/', data={'name': 'A'})
+            for _ in range(3)
+        ))
+
+    asyncio.run(main())
+
+    assert len(client.session.calls) == 3
+
+def test_request_timeout(aio_client):
+    client = aio_client(lambda *args: Response({}, delay=1))
+
+    start = time.monotonic()
+
+    with pytest.raises(DeadlineError):
+        asyncio.run(client.request('chat/user/', timeout=0.05))
+
+    assert time.monotonic() - start < 0.5
+
+def test_caller_deadline_does_not_end_shared_read(aio_client):
+    client = aio_client(lambda *args: Response({'n': 1}, delay=0.2))
+
+    async def hurried():
+        with deadline.deadline(0.05):
+            return await client.request('chat/user/')
+
+    async def patient():
+        await asyncio.sleep(0.01)
+        return await client.request('chat/user/')
+
+    async def main():
+        return await asyncio.gather(
+            hurried(), patient(), return_exceptions=True
+        )
+
+    hurried, patient = asyncio.run(main())
+
+    assert isinstance(hurried, DeadlineError)
+    assert patient == {'n': 1}
+    assert len(client.session.calls) == 1
+
+def test_retry_repeats_failed_reads(aio_client):
+    client = aio_client(
+        lambda *args: [Response(status=503), Response({'n': 1})],
+        retry=fast_retry()
+    )
+
+    assert asyncio.run(client.request('chat/user/')) == {'n': 1}
+    assert len(client.session.calls) == 2
+    assert client.retry.retried == 1
+
+def test_retry_keeps_writes_by_default(aio_client):
+    client = aio_client(
+        lambda *args: [Response(status=503), Response({'n': 1})],
+        retry=fast_retry()
+    )
+
+    with pytest.raises(ServerError):
+        asyncio.run(client.request('chat/user/update/', data={'a': 1}))
+
+    assert len(client.session.calls) == 1
+
+def test_timed_out_requests_cut_the_limit(aio_client):
+    client = aio_client(
+        lambda *args: Response({}, delay=1),
+        concurrency=AdaptiveLimit(initial=8)
+    )
+
+    with pytest.raises(DeadlineError):
+        asyncio.run(client.request(
+            'chat/user/update/', data={'a': 1}, timeout=0.05
+        ))
+
+    assert client.concurrency.throttled == 1
+    assert client.concurrency.limit == 4
+    assert client.concurrency.latencies == []
+
+def test_cancelled_requests_are_not_measured(aio_client):
+    client = aio_client(
+        lambda *args: Response({}, delay=1),
+        concurrency=AdaptiveLimit(initial=8)
+    )
+
+    async def main():
+        task = asyncio.ensure_future(client.request('chat/user/'))
+        await asyncio.sleep(0.02)
+        task.cancel()
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(main())
+
+    assert client.concurrency.throttled == 0
+    assert client.concurrency.latencies == []
+    assert client.concurrency.inflight == 0
+
+def test_sync_identical_reads_share_one_request(sync_client):
+    client = sync_client(lambda *args: Response({'n': 1}, delay=0.1))
+    results = []
+
+    def read():
+        results.append(client.request('chat/user/'))
+
+    threads = [threading.Thread(target=read) for _ in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert len(client.session.calls) == 1
+    assert results == [{'n': 1}] * 4
+    assert len({id(res) for res in results}) == 4
+
+def test_sync_caller_deadline_does_not_end_shared_read(sync_client):
+    client = sync_client(lambda *args: Response({'n': 1}, delay=0.2))
+    results = {}
+
+    def hurried():
+        try:
+            with deadline.deadline(0.05):
+                results['hurried'] = client.request('chat/user/')
+        except DeadlineError as e:
+            results['hurried'] = e
+
+    def patient():
+        time.sleep(0.01)
+        results['patient'] = client.request('chat/user/')
+
+    threads = [
+        threading.Thread(target=hurried),
+        threading.Thread(target=patient)
+    ]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert isinstance(results['hurried'], DeadlineError)
+    assert results['patient'] == {'n': 1}
+    assert len(client.session.calls) == 1
+
+def test_sync_retry_repeats_failed_reads(sync_client):
+    client = sync_client(
+        lambda *args: [Response(status=502), Response({'n': 1})],
+        retry=fast_retry()
+    )
+
+    assert client.request('chat/user/') == {'n': 1}
+    assert len(client.session.calls) == 2
+
+def test_sync_shared_reads_use_few_threads(sync_client):
+    client = sync_client(lambda *args: Response({'n': 1}, delay=0.05))
+    results = []
+
+    def read(i):
+        with deadline.deadline(1):
+            results.append(client.request(f'chat/user/?n={i}'))
+
+    threads = [threading.Thread(target=read, args=(i,)) for i in range(20)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    workers = [
+        t for t in threading.enumerate()
+        if t.name.startswith('pycai-flights')
+    ]
+
+    assert results == [{'n': 1}] * 20
+    assert 0 < len(workers) <= 8
@@ -0,0 +1,50 @@
+import asyncio
+
+from characterai.aiocai.methods import utils
+
+async def lease(sessions):
+    lease = await sessions.acquire('TOKEN')
+    sessions.release(lease)
+    return lease
+
+def test_concurrent_calls_share_one_client():
+    sessions = utils.Sessions()
+    discard = sessions._discard
+
+    async def slow(lease):
+        await asyncio.sleep(0.01)
+        await discard(lease)
+
+    sessions._discard = slow
+    asyncio.run(lease(sessions))
+
+    async def main():
+        # Closing the client of the stopped loop makes the
+        # first call wait, the second one comes in meanwhile
+        first, second = await asyncio.gather(
+            sessions.acquire('TOKEN'), sessions.acquire('TOKEN')
+        )
+
+        try:
+            assert first is second
+            assert first.users == 2
+            assert list(sessions.leases.values()) == [first]
+        finally:
+            await sessions.close()
+
+    asyncio.run(main())
+
+def test_client_of_stopped_loop_is_closed():
+    sessions = utils.Sessions()
+    old = asyncio.run(lease(sessions))
+
+    async def main():
+        new = await lease(sessions)
+
+        try:
+            assert new is not old
+            assert old.client.session._closed
+        finally:
+            await sessions.close()
+
+    asyncio.run(main())
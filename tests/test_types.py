@@ -0,0 +1,23 @@
+import pytest
+
+from characterai.types import chat2
+
+from conftest import turn
+
+def test_compact_turn_is_read_only():
+    compact = chat2.CompactTurn.from_dict(turn('CHAT_ID', 'TURN_ID', 'text'))
+
+    with pytest.raises(AttributeError, match='read-only'):
+        compact.turn_id = 'OTHER'
+
+    with pytest.raises(AttributeError, match='read-only'):
+        del compact.turn_id
+
+    assert compact.turn_id == 'TURN_ID'
+
+def test_compact_turn_matches_model():
+    data = turn('CHAT_ID', 'TURN_ID', 'text')
+    compact = chat2.CompactTurn.from_dict(data)
+
+    assert compact.text == 'text'
+    assert compact.to_model() == chat2.TurnData.model_validate(data)